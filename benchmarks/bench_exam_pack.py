@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+So sánh mở kho câu hỏi từ cache pickle (QuestionCache) và từ exam pack (.qpack, mmap): thời gian tới khi có câu
+đầu tiên, thời gian hiển thị 50 câu + chấm điểm, và bộ nhớ thường trú tăng thêm (mỗi cách đo trong tiến trình riêng,
+đọc /proc/self/statm nên chỉ chạy trên Linux).
+Chạy: python benchmarks/bench_exam_pack.py [--sizes 100000 1000000]
+"""
+import argparse
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from main import ExamPack, ExamSession, QuestionBank, SessionStats  # noqa: E402
+from suite import COLUMNS, synthetic_rows  # noqa: E402
+
+
+def build_files(n, directory):
+    bank = QuestionBank.from_records(dict(zip(COLUMNS, row)) for row in synthetic_rows(n))
+    pickle_path = os.path.join(directory, f"bank_{n}.pkl")
+    with open(pickle_path, 'wb') as f:
+        pickle.dump(bank, f, protocol=pickle.HIGHEST_PROTOCOL)
+    pack_path = os.path.join(directory, f"bank_{n}{ExamPack.EXTENSION}")
+    start = time.perf_counter()
+    ExamPack.write(bank, pack_path)
+    return pickle_path, pack_path, time.perf_counter() - start
+
+
+def resident_mb():
+    # ru_maxrss được giữ qua fork/exec từ tiến trình cha nên không dùng được ở đây
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+
+def child(kind, path):
+    """Chạy trong tiến trình con: mở kho, hiển thị 50 câu đầu của đề xáo trộn, chấm điểm"""
+    base = resident_mb()
+    start = time.perf_counter()
+    if kind == 'pickle':
+        with open(path, 'rb') as f:
+            bank = pickle.load(f)
+    else:
+        bank = ExamPack.open(path)
+    session = ExamSession.draw(bank, 50, seed=1, shuffle_options=True)
+    session.options(0)
+    opened = time.perf_counter() - start
+    stats = SessionStats(session)
+    for position in range(len(session)):
+        bank.question(session.bank_index(position))
+        session.options(position)
+        stats.set_answer(position, 'A')
+    used = time.perf_counter() - start - opened
+    print(f"{opened:.4f} {used:.4f} {resident_mb() - base:.1f} {stats.correct_count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            pickle_path, pack_path, pack_time = build_files(n, tmp)
+            print(f"{n:,} câu: pickle {os.path.getsize(pickle_path) / 2**20:.0f} MB, "
+                  f"qpack {os.path.getsize(pack_path) / 2**20:.0f} MB (ghi {pack_time:.1f} s)")
+            for kind, path in (('pickle', pickle_path), ('qpack', pack_path)):
+                output = subprocess.run([sys.executable, __file__, '--child', kind, path],
+                                        capture_output=True, text=True, check=True).stdout.split()
+                opened, used, resident, correct = output
+                print(f"  {kind:7} mở + câu đầu {float(opened) * 1000:9.1f} ms   50 câu + chấm {float(used) * 1000:6.2f} ms"
+                      f"   bộ nhớ tăng {float(resident):7.1f} MB   ({correct} câu đúng)")
+
+
+if __name__ == '__main__':
+    main()
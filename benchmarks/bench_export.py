@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Đo thời gian và bộ nhớ đỉnh (tracemalloc) khi xuất kết quả bài thi ra CSV/JSONL/Parquet/XLSX.
+Các dòng được sinh dần từ phiên làm bài nên bộ nhớ đỉnh gần như không đổi khi số câu tăng.
+Chạy: python benchmarks/bench_export.py [--sizes 10000 100000] [--formats .csv .jsonl .parquet .xlsx]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from main import ExamSession, QuestionBank, export_result_rows, iter_result_rows  # noqa: E402
+
+
+def make_session(n, seed=0):
+    rng = random.Random(seed)
+    records = [{
+        'cau_hoi': f"Câu hỏi số {i}: nhiệm vụ của quân đội nhân dân Việt Nam trong tình hình mới là gì?",
+        'tra_loi_a': "Bảo vệ Tổ quốc", 'tra_loi_b': "Xây dựng đất nước", 'tra_loi_c': "Cả hai đáp án trên",
+        'tra_loi_d': None, 'dap_an_dung': 'C', 'giai_thich': "Theo Luật Quốc phòng." if i % 3 else None,
+    } for i in range(n)]
+    session = ExamSession(QuestionBank.from_records(records), seed=1, shuffle_questions=True, shuffle_options=True)
+    answers = {i: rng.choice('ABC') for i in range(n) if rng.random() < 0.9}
+    return session, answers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--formats', nargs='+', default=['.csv', '.jsonl', '.parquet', '.xlsx'])
+    args = parser.parse_args()
+
+    summary = {'Điểm số': "70.0%", 'Mã đề (seed)': 1}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            session, answers = make_session(n)
+            print(f"{n:,} câu")
+            for extension in args.formats:
+                path = os.path.join(tmp, f"ket_qua{extension}")
+                start = time.perf_counter()
+                try:
+                    export_result_rows(path, iter_result_rows(session, answers), summary, n)
+                except RuntimeError as e:
+                    print(f"  {extension:9} bỏ qua: {e}")
+                    continue
+                elapsed = time.perf_counter() - start
+                # Đo bộ nhớ ở lần chạy thứ hai: tracemalloc làm chậm đáng kể nên không tính vào thời gian
+                tracemalloc.start()
+                export_result_rows(path, iter_result_rows(session, answers), summary, n)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                size = os.path.getsize(path) / 2**20
+                print(f"  {extension:9} {elapsed:7.2f} s  đỉnh {peak / 2**20:7.2f} MB  file {size:7.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
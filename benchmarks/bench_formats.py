@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+So sánh thời gian đọc cùng một kho câu hỏi ở các định dạng Excel (.xlsx), CSV, JSONL và Parquet
+qua cùng đường đọc theo khối + kiểm tra (read_question_file), và kiểm tra các kho đọc được giống hệt nhau.
+Chạy: python benchmarks/bench_formats.py [--sizes 10000 100000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from main import read_question_file  # noqa: E402
+from suite import COLUMNS, synthetic_rows, synthetic_workbook  # noqa: E402
+
+
+def write_formats(n, directory):
+    df = pd.DataFrame(list(synthetic_rows(n)), columns=COLUMNS)
+    paths = {'.xlsx': synthetic_workbook(n)}
+    for extension in ('.csv', '.jsonl', '.parquet'):
+        path = os.path.join(directory, f"cau_hoi_{n}{extension}")
+        if extension == '.csv':
+            df.to_csv(path, index=False, encoding='utf-8-sig')
+        elif extension == '.jsonl':
+            df.to_json(path, orient='records', lines=True, force_ascii=False)
+        else:
+            df.to_parquet(path, index=False)
+        paths[extension] = path
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            print(f"{n:,} câu")
+            reference = None
+            for extension, path in write_formats(n, tmp).items():
+                start = time.perf_counter()
+                bank, issues = read_question_file(path)
+                elapsed = time.perf_counter() - start
+                assert bank is not None, issues
+                if reference is None:
+                    reference = bank.fingerprint(), [bank.record(i)['tra_loi_d'] for i in range(len(bank))]
+                same = (bank.fingerprint(), [bank.record(i)['tra_loi_d'] for i in range(len(bank))]) == reference
+                print(f"  {extension:9} {elapsed:7.2f} s  {os.path.getsize(path) / 2**20:7.1f} MB"
+                      f"  {'giống .xlsx' if same else 'KHÁC .xlsx'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Đo tốc độ chấm hàng loạt (lệnh `python main.py grade`): đọc phiếu, chấm bằng NumPy, ghi kết quả
+Chạy: python benchmarks/bench_grading.py [--examinees 10000] [--questions 200]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from main import (ANSWER_SHEET_ID_COLUMN, answer_column, grade_answer_matrix,  # noqa: E402
+                  read_answer_sheets, write_grading_results)
+
+
+def make_answer_sheet(path, n_examinees, n_questions, answer_key, seed=0):
+    rng = np.random.default_rng(seed)
+    # Mỗi thí sinh đúng khoảng 70%, bỏ trống khoảng 5%
+    codes = np.where(rng.random((n_examinees, n_questions)) < 0.7, answer_key, rng.integers(0, 4, (n_examinees, n_questions)))
+    letters = np.array(list('ABCD'))[codes].astype(object)
+    letters[rng.random((n_examinees, n_questions)) < 0.05] = ''
+    df = pd.DataFrame(letters, columns=[answer_column(q + 1) for q in range(n_questions)])
+    df.insert(0, ANSWER_SHEET_ID_COLUMN, [f"TS{i:06d}" for i in range(n_examinees)])
+    df.to_csv(path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--examinees', type=int, default=10_000)
+    parser.add_argument('--questions', type=int, default=200)
+    args = parser.parse_args()
+
+    answer_key = np.random.default_rng(1).integers(0, 4, args.questions).astype(np.int8)
+    with tempfile.TemporaryDirectory() as tmp:
+        sheet_path = os.path.join(tmp, 'phieu.csv')
+        make_answer_sheet(sheet_path, args.examinees, args.questions, answer_key)
+
+        t0 = time.perf_counter()
+        ids, codes = read_answer_sheets([sheet_path], args.questions)
+        t1 = time.perf_counter()
+        correct, correct_counts, answered_counts = grade_answer_matrix(codes, answer_key)
+        t2 = time.perf_counter()
+        write_grading_results(os.path.join(tmp, 'out_summary'), ids, codes, correct, correct_counts,
+                              answered_counts, answer_key, per_examinee=False)
+        t3 = time.perf_counter()
+        write_grading_results(os.path.join(tmp, 'out'), ids, codes, correct, correct_counts,
+                              answered_counts, answer_key)
+        t4 = time.perf_counter()
+
+    cells = args.examinees * args.questions
+    print(f"{args.examinees} thí sinh x {args.questions} câu ({cells:,} ô trả lời)")
+    print(f"  đọc phiếu CSV           {t1 - t0:8.3f} s")
+    print(f"  chấm (NumPy)            {t2 - t1:8.3f} s  ({cells / max(t2 - t1, 1e-9) / 1e6:,.0f} triệu ô/s)")
+    print(f"  ghi file tổng hợp       {t3 - t2:8.3f} s")
+    print(f"  ghi file từng thí sinh  {t4 - t3:8.3f} s")
+    print(f"  tổng                    {t1 - t0 + t2 - t1 + t4 - t3:8.3f} s "
+          f"({args.examinees / (t1 - t0 + t2 - t1 + t4 - t3):,.0f} thí sinh/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+So sánh bộ nhớ: danh sách dict (định dạng cũ của self.questions) và QuestionBank
+Chạy: python benchmarks/bench_memory.py [--sizes 10000 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from main import QuestionBank  # noqa: E402
+
+COMMON_OPTIONS = ['Tất cả đều đúng', 'Tất cả đều sai', 'Cả A và B đều đúng', 'Không có đáp án nào đúng']
+
+
+def make_records(n_rows, seed=0):
+    rng = random.Random(seed)
+    records = []
+    for i in range(n_rows):
+        # Chuỗi được tạo mới cho từng dòng như khi pandas đọc từ Excel
+        record = {
+            'cau_hoi': f"Câu hỏi số {i}: nhiệm vụ của đơn vị trong tình huống {rng.randint(1, 500)} là gì?",
+            'tra_loi_a': f"Phương án thứ nhất của câu {i}",
+            'tra_loi_b': f"Phương án thứ hai của câu {i}",
+            'tra_loi_c': f"Phương án thứ ba của câu {i}",
+            'tra_loi_d': ''.join(rng.choice(COMMON_OPTIONS)) if rng.random() < 0.7 else None,
+            'dap_an_dung': rng.choice('ABCD'),
+            'giai_thich': ''.join(f"Theo điều lệnh số {rng.randint(1, 50)}") if rng.random() < 0.5 else '',
+        }
+        records.append(record)
+    return records
+
+
+def measure(build):
+    tracemalloc.start()
+    obj = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, obj
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'Số câu':>10} {'list[dict] (MB)':>16} {'QuestionBank (MB)':>18} {'tỉ lệ':>8}")
+    for n_rows in args.sizes:
+        legacy_bytes, records = measure(lambda: make_records(n_rows))
+
+        def build_bank():
+            bank = QuestionBank.from_records(make_records(n_rows))
+            bank.compact()
+            return bank
+
+        bank_bytes, bank = measure(build_bank)
+        assert len(bank) == len(records)
+        print(f"{n_rows:>10} {legacy_bytes / 2**20:>16.1f} {bank_bytes / 2**20:>18.1f} "
+              f"{bank_bytes / legacy_bytes:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+So sánh thời gian tạo đề: xáo trộn toàn bộ kho (ExamSession) và rút N chỉ số (ExamSession.draw).
+Chạy: python benchmarks/bench_sampling.py [--sizes 100000 1000000] [--questions 50]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from main import ExamSession  # noqa: E402
+
+
+class SizedBank:
+    """Chỉ cần len() để tạo đề; không tốn bộ nhớ cho nội dung câu hỏi"""
+
+    def __init__(self, size):
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+
+def timed(function, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--questions', type=int, default=50)
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        bank = SizedBank(n)
+        half = n // 2
+        groups = {'phan_1': range(half), 'phan_2': range(half, n)}
+        quotas = {'phan_1': args.questions // 5, 'phan_2': args.questions // 5}
+        excluded = set(range(0, n, 10))  # 10% câu bị loại (vd. gộp câu gần trùng)
+
+        full = timed(lambda: ExamSession(bank, seed=1, shuffle_questions=True, shuffle_options=True))
+        draw = timed(lambda: ExamSession.draw(bank, args.questions, seed=1, shuffle_options=True))
+        stratified = timed(lambda: ExamSession.draw(bank, args.questions, seed=1, shuffle_options=True,
+                                                    exclude=excluded, groups=groups, quotas=quotas))
+        print(f"{n:,} câu, đề {args.questions} câu")
+        print(f"  xáo trộn cả kho        {full:9.2f} ms")
+        print(f"  rút chỉ số             {draw:9.2f} ms")
+        print(f"  rút theo hạn mức + loại {stratified:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Đo thời gian lập chỉ mục tìm kiếm (SearchIndex) và thời gian trả lời truy vấn trên kho tổng hợp.
+Mục tiêu: mỗi truy vấn dưới 10 ms với 100k câu hỏi.
+Chạy: python benchmarks/bench_search.py [--sizes 10000 100000] [--repeat 50]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from main import SearchIndex  # noqa: E402
+from bench_near_duplicates import make_bank  # noqa: E402
+
+QUERIES = [
+    "quân",                    # từ rất phổ biến
+    "quan doi nhan",           # nhiều từ, không dấu, từ cuối là tiền tố
+    "Nhiệm vụ bảo vệ tổ q",
+    "c",                       # tiền tố một ký tự: hợp nhiều danh sách
+    "muc 1",                   # tiền tố của mọi số thứ tự: hàng chục nghìn từ
+    "chien dau s",
+    "muc 123",                 # rất ít kết quả
+    "khong co tu nay",         # không có kết quả
+]
+
+
+def measure(n, repeat):
+    bank, _ = make_bank(n)
+    start = time.perf_counter()
+    index = SearchIndex.build(bank)
+    built = time.perf_counter() - start
+    allowed = np.ones(len(bank), dtype=bool)
+
+    print(f"{len(bank):,} câu: lập chỉ mục {built:.2f} s, {len(index.vocabulary):,} từ")
+    worst = 0.0
+    for query in QUERIES:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            _, total = index.search(query, allowed=allowed)
+        elapsed = (time.perf_counter() - start) / repeat * 1000
+        worst = max(worst, elapsed)
+        print(f"  {query!r:28} {total:8,} kết quả  {elapsed:7.2f} ms")
+    print(f"  chậm nhất {worst:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    for n in args.sizes:
+        measure(n, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+So sánh thời gian cập nhật dòng trạng thái và nộp bài + tính điểm: thống kê phiên tăng dần (SessionStats)
+và cách đếm lại toàn bộ cũ. Tính đúng đắn được kiểm tra trong tests/test_session_stats.py.
+Chạy: python benchmarks/bench_session_stats.py [--sizes 1000 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests'))
+from conftest import full_unanswered, full_wrong, question_records  # noqa: E402
+from main import ExamSession, QuestionBank, SessionStats  # noqa: E402
+
+
+def random_answers(n, seed=0):
+    """Phiên trên kho n câu với khoảng 90% câu đã trả lời và một phần đã kiểm tra"""
+    rng = random.Random(seed)
+    session = ExamSession(QuestionBank.from_records(question_records(n)), seed=seed, shuffle_questions=True, shuffle_options=True)
+    user_answers = {i: rng.choice("ABCD") for i in range(n) if rng.random() < 0.9}
+    checked = {i: True for i in user_answers if rng.random() < 0.3}
+    return session, SessionStats.from_answers(session, user_answers, checked), user_answers
+
+
+def timed(function, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000])
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        session, stats, user_answers = random_answers(n)
+        print(f"{len(session):,} câu")
+        old_status = timed(lambda: len([a for a in user_answers.values() if a]))
+        new_status = timed(lambda: stats.answered_count)
+        old_submit = timed(lambda: (full_unanswered(session, user_answers), full_wrong(session, user_answers)), 3)
+        new_submit = timed(lambda: (stats.unanswered(limit=10), stats.unanswered_count, stats.wrong()), 3)
+        print(f"  dòng trạng thái  đếm lại {old_status:9.3f} ms   tăng dần {new_status:9.4f} ms")
+        print(f"  nộp bài + điểm   đếm lại {old_submit:9.3f} ms   tăng dần {new_submit:9.4f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+So sánh tốc độ kiểm tra + dựng câu hỏi: cách cũ (2 lần df.iterrows()) và cách theo cột
+Chạy: python benchmarks/bench_validation.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from main import REQUIRED_COLUMNS, clean_question_frame, validate_question_frame, build_question_records  # noqa: E402
+
+
+def make_frame(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    ids = np.arange(n_rows).astype(str)
+    df = pd.DataFrame({
+        'cau_hoi': np.char.add('Câu hỏi số ', ids),
+        'tra_loi_a': np.char.add('Phương án A ', ids),
+        'tra_loi_b': np.char.add('Phương án B ', ids),
+        'tra_loi_c': np.char.add('Phương án C ', ids),
+        'tra_loi_d': np.where(rng.random(n_rows) < 0.7, 'Tất cả đều đúng', None),
+        'dap_an_dung': rng.choice(['A', 'B', 'C', 'D'], n_rows),
+        'giai_thich': np.where(rng.random(n_rows) < 0.5, 'Giải thích', None),
+    })
+    return df
+
+
+def legacy(df):
+    """Cách cũ trong load_excel_data: duyệt df.iterrows() hai lần"""
+    validation_errors = []
+    for idx, row in df.iterrows():
+        for col in REQUIRED_COLUMNS:
+            if pd.isna(row[col]) or str(row[col]).strip() == '':
+                validation_errors.append(f"Dòng {idx+2}, cột '{col}': Không được để trống")
+        if row['dap_an_dung'] not in ['A', 'B', 'C', 'D']:
+            validation_errors.append(f"Dòng {idx+2}: Đáp án đúng phải là A, B, C, hoặc D")
+    if validation_errors:
+        return None
+    questions = []
+    for _, row in df.iterrows():
+        question_data = {
+            'cau_hoi': str(row['cau_hoi']).strip(),
+            'tra_loi_a': str(row['tra_loi_a']).strip(),
+            'tra_loi_b': str(row['tra_loi_b']).strip(),
+            'tra_loi_c': str(row['tra_loi_c']).strip(),
+            'dap_an_dung': str(row['dap_an_dung']).strip(),
+            'giai_thich': str(row.get('giai_thich', '')).strip()
+        }
+        tra_loi_d = row.get('tra_loi_d', '')
+        if pd.notna(tra_loi_d) and str(tra_loi_d).strip():
+            question_data['tra_loi_d'] = str(tra_loi_d).strip()
+        else:
+            question_data['tra_loi_d'] = None
+        questions.append(question_data)
+    return questions
+
+
+def columnar(df):
+    cleaned = clean_question_frame(df)
+    if validate_question_frame(df, cleaned):
+        return None
+    return build_question_records(cleaned)
+
+
+def timed(func, df):
+    start = time.perf_counter()
+    result = func(df)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'Số dòng':>10} {'iterrows (s)':>14} {'theo cột (s)':>14} {'tăng tốc':>10}")
+    for n_rows in args.sizes:
+        df = make_frame(n_rows)
+        t_legacy, r_legacy = timed(legacy, df)
+        t_new, r_new = timed(columnar, df)
+        assert len(r_legacy) == len(r_new) == n_rows
+        print(f"{n_rows:>10} {t_legacy:>14.3f} {t_new:>14.3f} {t_legacy / t_new:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
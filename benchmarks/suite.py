@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bộ đo hiệu năng trên kho câu hỏi tổng hợp (1k đến 1M dòng Excel, tiếng Việt, tra_loi_d / giai_thich có thể trống).
+Đo load_excel_data, chuyển câu (update_question_display), show_results/show_results_window và export_results
+của QuizApplication thật, chạy không cần màn hình: customtkinter/tkinter được thay bằng widget giả.
+Kết quả so với file mốc JSON; lệnh thoát với mã 1 nếu một kịch bản chậm hơn mốc quá ngưỡng.
+Chạy:
+  python benchmarks/suite.py                       # so với benchmarks/baselines.json
+  python benchmarks/suite.py --save                # ghi lại mốc
+  python benchmarks/suite.py --sizes 1000 1000000 --threshold 0.5
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import types
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'tests'))
+import main  # noqa: E402
+from conftest import headless_app, install_stub_ui  # noqa: E402  (giao diện giả dùng chung với tests/)
+
+DATA_DIR = os.path.join(BENCH_DIR, '.data')
+BASELINE_FILE = os.path.join(BENCH_DIR, 'baselines.json')
+
+WORDS = ("quân đội nhân dân việt nam nhiệm vụ bảo vệ tổ quốc chiến đấu sẵn sàng xây dựng lực lượng vũ trang "
+         "chính trị tư tưởng kỷ luật điều lệnh đơn vị chỉ huy chiến sĩ huấn luyện hậu cần kỹ thuật phòng thủ "
+         "dân quân tự vệ biên giới hải đảo đường lối quốc phòng toàn dân an ninh trật tự pháp luật nghĩa vụ").split()
+OPENERS = ["Đồng chí hãy cho biết", "Theo quy định hiện hành,", "Nội dung nào sau đây đúng về", "Hãy xác định"]
+COLUMNS = ['cau_hoi', 'tra_loi_a', 'tra_loi_b', 'tra_loi_c', 'tra_loi_d', 'dap_an_dung', 'giai_thich']
+
+
+# ================== DỮ LIỆU TỔNG HỢP ==================
+def synthetic_rows(n, seed=0):
+    rng = random.Random(seed)
+
+    def phrase(low, high):
+        return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+    for i in range(n):
+        has_d = rng.random() < 0.7
+        yield [
+            f"{rng.choice(OPENERS)} {phrase(8, 22)} (câu {i + 1})?",
+            phrase(3, 10).capitalize(),
+            phrase(3, 10).capitalize(),
+            phrase(3, 10).capitalize(),
+            phrase(3, 10).capitalize() if has_d else None,
+            rng.choice('ABCD' if has_d else 'ABC'),
+            f"Theo {phrase(4, 12)}." if rng.random() < 0.5 else None,
+        ]
+
+
+def synthetic_workbook(n, seed=0):
+    """File Excel n câu (tạo một lần, giữ lại trong benchmarks/.data)"""
+    from openpyxl import Workbook
+    os.makedirs(DATA_DIR, exist_ok=True)
+    path = os.path.join(DATA_DIR, f"cau_hoi_{n}_{seed}.xlsx")
+    if os.path.exists(path):
+        return path
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Câu hỏi")
+    sheet.append(COLUMNS)
+    for row in synthetic_rows(n, seed):
+        sheet.append(row)
+    workbook.save(path + ".tmp")
+    os.replace(path + ".tmp", path)
+    return path
+
+
+# ================== KỊCH BẢN ==================
+def best_of(repeat, function):
+    """Thời gian nhỏ nhất (giây) của repeat lần chạy; setup chạy ngoài phần đo"""
+    best = float('inf')
+    for _ in range(repeat):
+        best = min(best, function())
+    return best
+
+
+def scenario_load(app, path):
+    start = time.perf_counter()
+    assert app.load_excel_data(path), f"không đọc được {path}"
+    return time.perf_counter() - start
+
+
+def scenario_navigate(app, steps=200):
+    """Thời gian trung bình mỗi lần chuyển câu, có chọn đáp án"""
+    app.current_question_index = 0
+    app.update_question_display()
+    start = time.perf_counter()
+    for step in range(steps):
+        app.select_option("ABC"[step % 3])
+        app.next_question()
+    return (time.perf_counter() - start) / steps
+
+
+def scenario_navigate_idle(app, steps=200):
+    """Như scenario_navigate nhưng để Tk rảnh giữa hai lần bấm (không tính giờ) cho RenderPrefetcher dựng trước"""
+    app.current_question_index = 0
+    app.update_question_display()
+    elapsed = 0.0
+    for step in range(steps):
+        app.root.pump(lambda: app.prefetcher._after_id is None)
+        app.select_option("ABC"[step % 3])
+        start = time.perf_counter()
+        app.next_question()
+        elapsed += time.perf_counter() - start
+    return elapsed / steps
+
+
+def scenario_key_burst(app, events=1000, interval=0.001):
+    """Bắn events phím (mũi tên, A–D, 1–4) mỗi interval giây như khi giữ phím; trả về thời gian xử lý trung bình
+    mỗi sự kiện (kể cả phần vẽ). Số lần vẽ được kiểm tra với đồng hồ giả trong tests/test_render_coalescer.py"""
+    rng = random.Random(0)
+    keys = ['Right'] * 6 + ['Left', 'a', 'B', '3', 'KP_4']
+    app.current_question_index = 0
+    app.update_question_display()
+    app.root.pump(lambda: not app.render_coalescer.pending)
+    coalescer = app.render_coalescer
+    renders_before, redraws_before = coalescer.renders, app.render.redraws
+    busy = 0.0
+    start = time.monotonic()
+    for k in range(events):
+        event = types.SimpleNamespace(keysym=rng.choice(keys), widget=app.root)
+        began = time.perf_counter()
+        app._on_key(event)
+        app.root.run_due()
+        busy += time.perf_counter() - began
+        time.sleep(max(0.0, start + (k + 1) * interval - time.monotonic()))
+    app.root.pump(lambda: not coalescer.pending)
+    renders = coalescer.renders - renders_before
+    # Mỗi lần vẽ chạm tối đa: tiến độ, câu hỏi, prev, next, khung/nhãn phản hồi và mỗi nút đáp án hai lần
+    widgets_per_render = 7 + 2 * len(app.option_buttons)
+    redraws = app.render.redraws - redraws_before
+    assert redraws <= renders * widgets_per_render, f"{redraws} lần vẽ lại widget cho {renders} lần vẽ"
+    index = app.current_question_index
+    shown = app.render._applied[app.question_progress_label]['text']
+    assert shown == f"Câu {index + 1}/{len(app.session)}", shown
+    assert app.selected_answer.get() == app.user_answers.get(index, "")
+    return busy / events
+
+
+def answer_all(app, seed=0):
+    rng = random.Random(seed)
+    app.user_answers = {position: rng.choice('ABCD') for position in range(len(app.session))
+                        if rng.random() < 0.9}
+    app.question_feedback = {}
+    app.stats = main.SessionStats.from_answers(app.session, app.user_answers)
+
+
+def scenario_results(app):
+    start = time.perf_counter()
+    app.show_results()
+    return time.perf_counter() - start
+
+
+def scenario_export(app):
+    done = []
+    summary = {'Điểm số': "70.0%", 'Mã đề (seed)': app.session.seed}
+    start = time.perf_counter()
+    assert app.export_results(app.session, app.user_answers, summary, on_finish=lambda: done.append(True))
+    app.root.pump(lambda: done)
+    return time.perf_counter() - start
+
+
+def run_size(n, repeat, workdir):
+    path = synthetic_workbook(n)
+    install_stub_ui(os.path.join(workdir, f"ket_qua_{n}.csv"))
+    app = headless_app()
+    results = {'load_excel_data': best_of(repeat, lambda: scenario_load(app, path))}
+    # Chỉ mục tìm kiếm lập trên luồng nền sau khi nạp: chờ xong để không tranh GIL với các phép đo sau
+    app.root.pump(lambda: app.search_index is not None)
+    results['update_question_display'] = best_of(repeat, lambda: scenario_navigate(app))
+    results['update_question_display_prefetched'] = best_of(repeat, lambda: scenario_navigate_idle(app))
+    results['key_burst'] = best_of(repeat, lambda: scenario_key_burst(app))
+    answer_all(app)
+    results['show_results'] = best_of(repeat, lambda: scenario_results(app))
+    results['export_results'] = best_of(repeat, lambda: scenario_export(app))
+    return {f"{name}@{n}": seconds for name, seconds in results.items()}
+
+
+# ================== MỐC SO SÁNH ==================
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('scenarios', {})
+
+
+def save_baseline(path, scenarios):
+    merged = load_baseline(path)
+    merged.update({name: round(seconds, 6) for name, seconds in scenarios.items()})
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'processor': platform.processor() or platform.machine()},
+            'saved': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'scenarios': dict(sorted(merged.items())),
+        }, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def compare(scenarios, baseline, threshold, min_delta=0.001):
+    """In bảng so sánh; trả về danh sách kịch bản chậm hơn mốc quá ngưỡng (bỏ qua chênh lệch dưới min_delta giây)"""
+    regressions = []
+    print(f"{'kịch bản':44}{'hiện tại':>12}{'mốc':>12}{'thay đổi':>10}")
+    for name, seconds in scenarios.items():
+        reference = baseline.get(name)
+        if reference is None:
+            print(f"{name:44}{seconds * 1000:10.2f}ms{'—':>12}{'mới':>10}")
+            continue
+        change = seconds / reference - 1 if reference else 0.0
+        regressed = change > threshold and seconds - reference > min_delta
+        if regressed:
+            regressions.append(name)
+        print(f"{name:44}{seconds * 1000:10.2f}ms{reference * 1000:10.2f}ms{change:+10.1%}"
+              + ("  CHẬM HƠN" if regressed else ""))
+    return regressions
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=3, help="Lấy thời gian tốt nhất của N lần chạy")
+    parser.add_argument('--threshold', type=float, default=0.25, help="Ngưỡng chậm hơn mốc (0.25 = 25%%)")
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--save', action='store_true', help="Ghi kết quả làm mốc mới")
+    args = parser.parse_args(argv)
+
+    scenarios = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)  # không đọc .env / không ghi nhật ký vào thư mục hiện tại
+        try:
+            for n in args.sizes:
+                print(f"Đang đo {n:,} câu...", flush=True)
+                scenarios.update(run_size(n, args.repeat, workdir))
+        finally:
+            os.chdir(cwd)
+
+    regressions = compare(scenarios, load_baseline(args.baseline), args.threshold)
+    if args.save:
+        save_baseline(args.baseline, scenarios)
+        print(f"Đã ghi mốc: {args.baseline}")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} kịch bản chậm hơn mốc quá {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_cli())
@@ -4,32 +4,1845 @@
 Ứng dụng Trắc nghiệm với CustomTkinter - Phiên bản cải tiến
 File: main.py
 """
-import customtkinter as ctk
+import time
+
+_PROCESS_START = time.perf_counter()  # mốc đo thời gian khởi động, đặt trước mọi import khác
+
+import importlib
 import tkinter as tk
-from tkinter import messagebox, filedialog
-import pandas as pd
 import random
-import time
 import os
+import json
 import csv
 from datetime import datetime, timedelta
 from pathlib import Path
 import threading
+import queue
 import glob
-
-# Cấu hình CustomTkinter
-ctk.set_appearance_mode("dark")
-ctk.set_default_color_theme("blue")
+import bisect
+import hashlib
+import itertools
+import math
+import mmap
+import multiprocessing
+import pickle
+import base64
+import sys
+import unicodedata
+import zipfile
+import xml.etree.ElementTree as ElementTree
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from collections import OrderedDict, namedtuple, deque
 
 import textwrap
 
-def _wrap(self, s: str, width: int = 70) -> str:
-    # Tự chèn \n để CTkButton hiển thị xuống dòng
-    return textwrap.fill(str(s), width=width)
+
+class _LazyModule:
+    """Module chỉ được import khi truy cập thuộc tính đầu tiên, sau đó thay thế chính nó trong globals()"""
+
+    def __init__(self, module_name, alias, on_import=None):
+        self._module_name = module_name
+        self._alias = alias
+        self._on_import = on_import
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            module = importlib.import_module(self._module_name)
+            if self._on_import:
+                self._on_import(module)
+            self._module = module
+            globals()[self._alias] = module
+        return getattr(self._module, attr)
+
+
+def _configure_ctk(module):
+    # Cấu hình CustomTkinter
+    module.set_appearance_mode("dark")
+    module.set_default_color_theme("blue")
+
+
+# Các thư viện nặng chỉ được nạp khi thực sự cần (pandas: khi phải đọc file Excel)
+ctk = _LazyModule('customtkinter', 'ctk', _configure_ctk)
+pd = _LazyModule('pandas', 'pd')
+np = _LazyModule('numpy', 'np')
+messagebox = _LazyModule('tkinter.messagebox', 'messagebox')
+filedialog = _LazyModule('tkinter.filedialog', 'filedialog')
+
+# ================== KIỂM TRA DỮ LIỆU ==================
+REQUIRED_COLUMNS = ['cau_hoi', 'tra_loi_a', 'tra_loi_b', 'tra_loi_c', 'dap_an_dung']
+QUESTION_FIELDS = ['cau_hoi', 'tra_loi_a', 'tra_loi_b', 'tra_loi_c', 'tra_loi_d', 'dap_an_dung', 'giai_thich']
+VALID_ANSWERS = ['A', 'B', 'C', 'D']
+
+# Một lỗi dữ liệu: dòng Excel (tính cả dòng tiêu đề), cột, mã luật vi phạm
+ValidationIssue = namedtuple('ValidationIssue', ['row', 'column', 'rule'])
+
+VALIDATION_RULE_MESSAGES = {
+    'thieu_cot': "Thiếu cột bắt buộc",
+    'trong': "Không được để trống",
+    'dap_an': "Đáp án đúng phải là A, B, C, hoặc D",
+    'exam_pack': "File exam pack hỏng hoặc khác phiên bản",
+}
+
+
+def format_validation_issue(issue):
+    message = VALIDATION_RULE_MESSAGES.get(issue.rule, issue.rule)
+    if issue.column is None:
+        return message
+    if issue.row is None:
+        return f"Cột '{issue.column}': {message}"
+    return f"Dòng {issue.row}, cột '{issue.column}': {message}"
+
+
+def clean_question_frame(df):
+    """Chuẩn hóa các cột câu hỏi thành chuỗi đã strip (ô trống -> ''), xử lý theo cả cột"""
+    cleaned = {}
+    for col in QUESTION_FIELDS:
+        if col not in df.columns:
+            cleaned[col] = pd.Series('', index=df.index, dtype=object)
+            continue
+        series = df[col]
+        cleaned[col] = series.astype(str).str.strip().mask(series.isna(), '')
+    return cleaned
+
+
+def validate_question_frame(df, cleaned=None, row_offset=0):
+    """Kiểm tra toàn bộ DataFrame bằng mặt nạ theo cột, trả về danh sách ValidationIssue (đủ mọi dòng lỗi)"""
+    missing_columns = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing_columns:
+        return [ValidationIssue(None, c, 'thieu_cot') for c in missing_columns]
+    if cleaned is None:
+        cleaned = clean_question_frame(df)
+
+    excel_rows = np.arange(len(df)) + row_offset + 2
+    issue_rows, issue_cols, issue_rules = [], [], []
+    for col in REQUIRED_COLUMNS:
+        blank = (cleaned[col] == '').to_numpy()
+        if blank.any():
+            rows = excel_rows[blank]
+            issue_rows.append(rows)
+            issue_cols.append(np.full(len(rows), col, dtype=object))
+            issue_rules.append(np.full(len(rows), 'trong', dtype=object))
+
+    answers = cleaned['dap_an_dung']
+    bad_answer = (~answers.isin(VALID_ANSWERS) & (answers != '')).to_numpy()
+    if bad_answer.any():
+        rows = excel_rows[bad_answer]
+        issue_rows.append(rows)
+        issue_cols.append(np.full(len(rows), 'dap_an_dung', dtype=object))
+        issue_rules.append(np.full(len(rows), 'dap_an', dtype=object))
+
+    if not issue_rows:
+        return []
+    rows = np.concatenate(issue_rows)
+    cols = np.concatenate(issue_cols)
+    rules = np.concatenate(issue_rules)
+    order = np.argsort(rows, kind='stable')
+    return [ValidationIssue(int(r), c, rule) for r, c, rule in zip(rows[order], cols[order], rules[order])]
+
+
+def build_question_records(cleaned):
+    """Dựng danh sách câu hỏi theo cột từ dữ liệu đã chuẩn hóa"""
+    columns = [cleaned[col].tolist() for col in QUESTION_FIELDS]
+    d_index = QUESTION_FIELDS.index('tra_loi_d')
+    columns[d_index] = [value or None for value in columns[d_index]]
+    return [dict(zip(QUESTION_FIELDS, values)) for values in zip(*columns)]
+
+
+def normalize_question_text(text):
+    """Chuẩn hóa để so trùng: Unicode NFC, không phân biệt hoa thường, gộp khoảng trắng"""
+    return ' '.join(unicodedata.normalize('NFC', text).casefold().split())
+
+
+class QuestionBank:
+    """Kho câu hỏi lưu theo cột: chuỗi được khử trùng lặp, đáp án đúng mã hóa 1 byte (0-3).
+    Thay cho danh sách dict; truy cập qua question()/options()/answer()/explanation()"""
+    __slots__ = ('_cau_hoi', '_tra_loi', '_giai_thich', '_answers', '_sources', '_source_ids', '_strings')
+
+    OPTION_FIELDS = ('tra_loi_a', 'tra_loi_b', 'tra_loi_c', 'tra_loi_d')
+
+    def __init__(self, source=None):
+        self._cau_hoi = []
+        self._tra_loi = ([], [], [], [])  # tra_loi_d là None nếu câu hỏi chỉ có 3 đáp án
+        self._giai_thich = []
+        self._answers = array('b')
+        self._sources = [source or '']  # file gốc; _source_ids[i] là chỉ số trong danh sách này
+        self._source_ids = array('H')
+        self._strings = {}
+
+    @classmethod
+    def from_records(cls, records, source=None):
+        bank = cls(source)
+        for record in records:
+            bank.append(record)
+        return bank
+
+    @classmethod
+    def merge(cls, banks):
+        """Gộp nhiều kho theo thứ tự, bỏ câu trùng hoàn toàn (câu hỏi + các đáp án giống nhau sau chuẩn hóa).
+        Trả về (kho đã gộp, số câu trùng đã bỏ); nguồn gốc từng câu được giữ lại"""
+        merged = cls()
+        merged._sources = []
+        seen = set()
+        duplicates = 0
+        for bank in banks:
+            source_offset = len(merged._sources)
+            merged._sources.extend(bank._sources)
+            for i in range(len(bank)):
+                key = bank.content_key(i)
+                if key in seen:
+                    duplicates += 1
+                    continue
+                seen.add(key)
+                merged._cau_hoi.append(merged._intern(bank._cau_hoi[i]))
+                for target, column in zip(merged._tra_loi, bank._tra_loi):
+                    target.append(merged._intern(column[i]))
+                merged._giai_thich.append(merged._intern(bank._giai_thich[i]))
+                merged._answers.append(bank._answers[i])
+                merged._source_ids.append(source_offset + bank._source_ids[i])
+        merged.compact()
+        return merged, duplicates
+
+    def _intern(self, text):
+        if text is None:
+            return None
+        return self._strings.setdefault(text, text)
+
+    def append(self, record):
+        """Thêm một câu hỏi dạng dict (các khóa như QUESTION_FIELDS)"""
+        self._cau_hoi.append(self._intern(record['cau_hoi']))
+        for column, field in zip(self._tra_loi, self.OPTION_FIELDS):
+            column.append(self._intern(record.get(field) or None))
+        self._giai_thich.append(self._intern(record.get('giai_thich') or ''))
+        self._answers.append(VALID_ANSWERS.index(record['dap_an_dung']))
+        self._source_ids.append(0)
+
+    def extend_columns(self, cleaned):
+        """Thêm nhiều câu hỏi từ các cột đã chuẩn hóa (kết quả clean_question_frame) đã kiểm tra hợp lệ"""
+        intern = self._intern
+        self._cau_hoi.extend(map(intern, cleaned['cau_hoi'].tolist()))
+        for column, field in zip(self._tra_loi, self.OPTION_FIELDS):
+            column.extend(intern(value) if value else None for value in cleaned[field].tolist())
+        self._giai_thich.extend(map(intern, cleaned['giai_thich'].tolist()))
+        codes = {letter: i for i, letter in enumerate(VALID_ANSWERS)}
+        answers = cleaned['dap_an_dung'].tolist()
+        self._answers.extend(codes[letter] for letter in answers)
+        self._source_ids.extend(array('H', [0]) * len(answers))
+
+    def compact(self):
+        """Bỏ bảng khử trùng lặp sau khi nạp xong (chuỗi vẫn được chia sẻ giữa các câu hỏi)"""
+        self._strings = {}
+
+    def slice(self, start, stop):
+        """Bản sao một đoạn câu hỏi liên tiếp"""
+        part = QuestionBank()
+        part._cau_hoi = self._cau_hoi[start:stop]
+        part._tra_loi = tuple(column[start:stop] for column in self._tra_loi)
+        part._giai_thich = self._giai_thich[start:stop]
+        part._answers = self._answers[start:stop]
+        part._sources = list(self._sources)
+        part._source_ids = self._source_ids[start:stop]
+        return part
+
+    def __len__(self):
+        return len(self._answers)
+
+    def __getitem__(self, index):
+        return self.record(index)
+
+    def __iter__(self):
+        return (self.record(i) for i in range(len(self)))
+
+    def question(self, index):
+        return self._cau_hoi[index]
+
+    def options(self, index):
+        """Danh sách (chữ cái, nội dung) của các đáp án có mặt"""
+        return [(VALID_ANSWERS[i], column[index]) for i, column in enumerate(self._tra_loi) if column[index] is not None]
+
+    def answer(self, index):
+        return VALID_ANSWERS[self._answers[index]]
+
+    def source(self, index):
+        """File gốc của câu hỏi"""
+        return self._sources[self._source_ids[index]]
+
+    @property
+    def sources(self):
+        return list(self._sources)
+
+    def source_groups(self):
+        """Chỉ số các câu theo file nguồn: {file: array('I')} (dùng để rút đề theo tỷ lệ từng file)"""
+        groups = [array('I') for _ in self._sources]
+        for index, source_id in enumerate(self._source_ids):
+            groups[source_id].append(index)
+        return {source: group for source, group in zip(self._sources, groups) if group}
+
+    def fingerprint(self):
+        """Hash toàn bộ câu hỏi và đáp án đúng, để nhận ra đúng kho khi khôi phục phiên làm bài"""
+        digest = hashlib.blake2b(digest_size=16)
+        for question in self._cau_hoi:
+            digest.update(question.encode('utf-8'))
+            digest.update(b'\x1f')
+        digest.update(self._answers.tobytes())
+        return digest.hexdigest()
+
+    def content_key(self, index):
+        """Hash nội dung đã chuẩn hóa của câu hỏi và các đáp án (dùng để bỏ câu trùng)"""
+        texts = [self._cau_hoi[index]] + [column[index] or '' for column in self._tra_loi]
+        joined = "\x1f".join(normalize_question_text(text) for text in texts)
+        return hashlib.blake2b(joined.encode('utf-8'), digest_size=16).digest()
+
+    def answer_index(self, index):
+        return self._answers[index]
+
+    @property
+    def answer_key(self):
+        """Mảng đáp án đúng (0=A ... 3=D) của toàn bộ kho"""
+        return self._answers
+
+    def explanation(self, index):
+        return self._giai_thich[index]
+
+    def record(self, index):
+        """Câu hỏi dưới dạng dict như định dạng cũ"""
+        record = {'cau_hoi': self._cau_hoi[index]}
+        for column, field in zip(self._tra_loi, self.OPTION_FIELDS):
+            record[field] = column[index]
+        record['dap_an_dung'] = self.answer(index)
+        record['giai_thich'] = self._giai_thich[index]
+        record['nguon'] = os.path.basename(self.source(index))
+        return record
+
+    def memory_footprint(self):
+        """Ước lượng số byte bộ nhớ của kho (danh sách, mảng đáp án và các chuỗi không trùng lặp)"""
+        columns = [self._cau_hoi, self._giai_thich, *self._tra_loi]
+        total = sum(sys.getsizeof(column) for column in columns)
+        total += sys.getsizeof(self._answers) + sys.getsizeof(self._source_ids)
+        seen = set()
+        for column in columns:
+            for text in column:
+                if text is not None and id(text) not in seen:
+                    seen.add(id(text))
+                    total += sys.getsizeof(text)
+        return total
+
+    def __getstate__(self):
+        return (self._cau_hoi, self._tra_loi, self._giai_thich, self._answers, self._sources, self._source_ids)
+
+    def __setstate__(self, state):
+        self._cau_hoi, self._tra_loi, self._giai_thich, self._answers, self._sources, self._source_ids = state
+        self._strings = {}
+
+
+class _PackedColumn:
+    """Một cột chuỗi của ExamPack: chỉ giải mã UTF-8 từ vùng nhớ ánh xạ khi được truy cập"""
+    __slots__ = ('_blob', '_offsets', '_field', '_count', '_optional')
+
+    def __init__(self, blob, offsets, field, count, optional=False):
+        self._blob = blob
+        self._offsets = offsets
+        self._field = field
+        self._count = count
+        self._optional = optional  # chuỗi rỗng đọc thành None (tra_loi_d không có)
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        k = index * ExamPack.FIELDS + self._field
+        start, stop = self._offsets[k], self._offsets[k + 1]
+        if start == stop and self._optional:
+            return None
+        return str(self._blob[start:stop], 'utf-8')
+
+    def __iter__(self):
+        return (self[i] for i in range(self._count))
+
+
+class ExamPack(QuestionBank):
+    """Kho câu hỏi biên dịch sẵn (.qpack) mở bằng mmap: khối chuỗi UTF-8, bảng offset, mảng đáp án 1 byte.
+    Mở file chỉ đọc phần mô tả ở cuối (O(1)); câu hỏi được giải mã khi hiển thị / chấm điểm nên bộ nhớ
+    tăng theo số câu đã dùng, không theo kích thước kho. Chỉ đọc, tạo bằng lệnh `pack` hoặc ExamPack.write()"""
+    __slots__ = ('path', '_mmap', '_fingerprint')
+
+    EXTENSION = '.qpack'
+    MAGIC = b'QPACK\x00\x01\x00'
+    VERSION = 1
+    FIELDS = 6  # cau_hoi, tra_loi_a..d, giai_thich
+    _TRAILER = 24  # vị trí phần mô tả (8 byte) + độ dài (8 byte) + MAGIC
+
+    @classmethod
+    def is_pack(cls, file_path):
+        return str(file_path).lower().endswith(cls.EXTENSION)
+
+    @classmethod
+    def write(cls, bank, file_path):
+        """Ghi kho câu hỏi ra file exam pack (ghi file tạm rồi thay thế)"""
+        columns = (bank._cau_hoi, *bank._tra_loi, bank._giai_thich)
+        offsets = array('Q', [0])
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(cls.MAGIC)
+            size = 0
+            for i in range(len(bank)):
+                for column in columns:
+                    text = column[i]
+                    if text:
+                        data = text.encode('utf-8')
+                        f.write(data)
+                        size += len(data)
+                    offsets.append(size)
+            sections = {'blob': (len(cls.MAGIC), size)}
+            for name, data in (('offsets', offsets), ('answers', bank.answer_key), ('source_ids', bank._source_ids)):
+                f.write(b'\0' * (-f.tell() % 8))  # canh 8 byte cho memoryview.cast
+                data = memoryview(data)
+                sections[name] = (f.tell(), data.nbytes)
+                f.write(data)
+            header = json.dumps({
+                'version': cls.VERSION,
+                'count': len(bank),
+                'sources': bank.sources,
+                'fingerprint': bank.fingerprint(),
+                'sections': sections,
+            }, ensure_ascii=False).encode('utf-8')
+            header_offset = f.tell()
+            f.write(header)
+            f.write(header_offset.to_bytes(8, 'little') + len(header).to_bytes(8, 'little') + cls.MAGIC)
+        os.replace(tmp_path, file_path)
+
+    @classmethod
+    def open(cls, file_path):
+        """Mở file exam pack; ValueError nếu file hỏng hoặc khác phiên bản"""
+        with open(file_path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        views = []  # mọi memoryview trên mm; phải giải phóng hết trước khi đóng mm nếu mở lỗi
+
+        def section(name, typecode=None):
+            offset, length = header['sections'][name]
+            if offset < 0 or length < 0 or offset + length > header_offset:
+                raise ValueError(f"phần '{name}' nằm ngoài file")
+            part = views[0][offset:offset + length]
+            views.append(part)
+            if typecode:
+                try:
+                    part = part.cast(typecode)
+                except TypeError as e:
+                    raise ValueError(f"độ dài phần '{name}' không hợp lệ") from e
+                views.append(part)
+            return part
+
+        try:
+            if len(mm) < len(cls.MAGIC) + cls._TRAILER or mm[:8] != cls.MAGIC or mm[-8:] != cls.MAGIC:
+                raise ValueError("không phải file exam pack")
+            header_offset = int.from_bytes(mm[-24:-16], 'little')
+            header_length = int.from_bytes(mm[-16:-8], 'little')
+            if header_offset + header_length > len(mm) - cls._TRAILER:
+                raise ValueError("phần đầu exam pack nằm ngoài file")
+            header = json.loads(mm[header_offset:header_offset + header_length])
+            if header.get('version') != cls.VERSION:
+                raise ValueError(f"phiên bản exam pack {header.get('version')} không được hỗ trợ")
+
+            views.append(memoryview(mm))
+            count = header['count']
+            blob, offsets = section('blob'), section('offsets', 'Q')
+            answers, source_ids = section('answers', 'b'), section('source_ids', 'H')
+            if len(offsets) != count * cls.FIELDS + 1:
+                raise ValueError("bảng offset không khớp số câu hỏi")
+            if len(answers) != count or len(source_ids) != count:
+                raise ValueError("bảng đáp án / nguồn không khớp số câu hỏi")
+            pack = cls.__new__(cls)
+            pack._cau_hoi = _PackedColumn(blob, offsets, 0, count)
+            pack._tra_loi = tuple(_PackedColumn(blob, offsets, 1 + k, count, optional=True) for k in range(4))
+            pack._giai_thich = _PackedColumn(blob, offsets, 5, count)
+            pack._answers = answers
+            pack._source_ids = source_ids
+            pack._sources = list(header['sources'])
+            pack._strings = {}
+            pack.path = str(file_path)
+            pack._mmap = mm
+            pack._fingerprint = header['fingerprint']
+        except Exception as e:
+            for part in reversed(views):
+                part.release()
+            mm.close()
+            if isinstance(e, (KeyError, TypeError, AttributeError)):
+                raise ValueError(f"phần đầu exam pack không hợp lệ: {e!r}") from e  # JSON thiếu khóa / sai kiểu
+            raise
+        return pack
+
+    def fingerprint(self):
+        return self._fingerprint  # tính lúc tạo file, trùng với kho gốc
+
+    def memory_footprint(self):
+        """Chỉ phần nằm trong bộ nhớ Python; nội dung câu hỏi nằm trong vùng ánh xạ, hệ điều hành nạp theo trang"""
+        return sum(sys.getsizeof(part) for part in (self._cau_hoi, *self._tra_loi, self._giai_thich,
+                                                     self._answers, self._source_ids, self._sources))
+
+    def __reduce__(self):
+        # Gửi qua tiến trình khác / cache: chỉ cần đường dẫn, bên nhận tự ánh xạ lại file
+        return ExamPack.open, (self.path,)
+
+
+class ExamSession:
+    """Thứ tự câu hỏi và hoán vị đáp án của một phiên làm bài, sinh một lần từ seed.
+    order[vị trí] là chỉ số câu hỏi trong kho, option_perms[vị trí] là mã hoán vị đáp án (1 byte).
+    Câu trả lời luôn lưu theo chữ cái gốc trong kho; chữ cái hiển thị chỉ dùng trên giao diện"""
+
+    PERMUTATIONS = {n: list(itertools.permutations(range(n))) for n in (3, 4)}
+    _PERM_CODES = 24  # 4! chia hết cho 3! nên mã % 3! vẫn phân bố đều
+
+    def __init__(self, bank, seed=None, shuffle_questions=False, shuffle_options=False, exclude=()):
+        self.bank = bank
+        self.seed = random.randrange(1, 2**31) if seed is None else seed
+        self.shuffle_questions = shuffle_questions
+        self.exclude = frozenset(exclude)  # chỉ số các câu không đưa vào đề (vd. câu gần trùng đã gộp)
+        self._bank_size = len(bank)
+        self._positions = None
+        self.sampled = False  # đề rút một phần kho (draw): không thêm câu khi kho được nạp thêm
+        self.order = array('I', (i for i in range(len(bank)) if i not in self.exclude))
+        if shuffle_questions:
+            random.Random(self.seed).shuffle(self.order)
+        self.option_perms = bytearray(len(self.order))
+        self.set_option_shuffle(shuffle_options)
+
+    @classmethod
+    def draw(cls, bank, count, seed=None, shuffle_questions=True, shuffle_options=False, exclude=(),
+             groups=None, quotas=None):
+        """Đề gồm count câu rút ngẫu nhiên từ kho mà không sao chép hay đổi thứ tự kho: chỉ giữ mảng chỉ số.
+        groups {nhóm: dãy chỉ số câu} và quotas {nhóm: số câu}: rút theo hạn mức từng nhóm trước,
+        phần còn lại của count rút từ cả kho. Chi phí O(count), không phụ thuộc kích thước kho"""
+        session = cls(QuestionBank(), seed=seed)
+        rng = random.Random(f"{session.seed}:draw")
+        excluded = set(exclude)
+        chosen = []
+        for group, quota in (quotas or {}).items():
+            population = (groups or {}).get(group, ())
+            picked = cls._sample_indices(rng, population, min(quota, count - len(chosen)), excluded)
+            excluded.update(picked)
+            chosen.extend(picked)
+        chosen.extend(cls._sample_indices(rng, range(len(bank)), count - len(chosen), excluded))
+        if shuffle_questions:
+            rng.shuffle(chosen)
+        else:
+            chosen.sort()
+
+        session.bank = bank
+        session._bank_size = len(bank)
+        session.shuffle_questions = shuffle_questions
+        session.exclude = frozenset(exclude)
+        session.sampled = True
+        session.order = array('I', chosen)
+        session.set_option_shuffle(shuffle_options)
+        return session
+
+    @staticmethod
+    def _sample_indices(rng, population, k, excluded):
+        """Rút k phần tử khác nhau của population không nằm trong excluded (ít hơn nếu không đủ)"""
+        if k <= 0 or not population:
+            return []
+        if not excluded:
+            return rng.sample(population, min(k, len(population)))
+        picked = []
+        seen = set()
+        # Rút dư rồi lọc; chỉ duyệt cả population khi phần bị loại chiếm gần hết
+        for _ in range(4):
+            for index in rng.sample(population, min(len(population), 2 * k + 16)):
+                if index not in excluded and index not in seen:
+                    seen.add(index)
+                    picked.append(index)
+                    if len(picked) == k:
+                        return picked
+        remaining = [index for index in population if index not in excluded and index not in seen]
+        return picked + rng.sample(remaining, min(k - len(picked), len(remaining)))
+
+    def _option_codes(self, bank_indices):
+        """Mã hoán vị đáp án của từng câu, băm từ (seed, chỉ số câu trong kho): không phụ thuộc vị trí trong đề
+        hay việc kho được nạp một lần hoặc theo từng phần (splitmix64 trên numpy)"""
+        if not self.shuffle_options:
+            return bytearray(len(bank_indices))
+        digest = hashlib.blake2b(f"{self.seed}:options".encode(), digest_size=8).digest()
+        z = np.asarray(bank_indices, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+        z += np.uint64(int.from_bytes(digest, 'little'))
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        z ^= z >> np.uint64(31)
+        return bytearray((z % np.uint64(self._PERM_CODES)).astype(np.uint8).tobytes())
+
+    def set_option_shuffle(self, enabled):
+        """Bật/tắt xáo trộn đáp án (câu trả lời đã lưu theo chữ gốc nên không bị ảnh hưởng)"""
+        self.shuffle_options = enabled
+        self.option_perms = self._option_codes(self.order)
+
+    def extend(self, bank, exclude=None):
+        """Kho được nạp thêm phía sau (cùng phần đầu): giữ nguyên các vị trí cũ, thêm câu mới vào cuối.
+        exclude (nếu có) thay danh sách câu bị loại, chỉ áp dụng cho các câu mới.
+        Thứ tự câu khi đó khác với phiên tạo một lần trên cả kho; chỉ dùng khi đã có câu trả lời cần giữ"""
+        start = len(self.order)
+        if exclude is not None:
+            self.exclude = frozenset(exclude)
+        if self.sampled:
+            self.bank = bank
+            self._bank_size = len(bank)
+            return
+        added = array('I', (i for i in range(self._bank_size, len(bank)) if i not in self.exclude))
+        self.bank = bank
+        self._bank_size = len(bank)
+        self._positions = None
+        if self.shuffle_questions:
+            random.Random(f"{self.seed}:{start}").shuffle(added)
+        self.order.extend(added)
+        self.option_perms.extend(self._option_codes(added))
+
+    def __len__(self):
+        return len(self.order)
+
+    def bank_index(self, position):
+        return self.order[position]
+
+    def state(self):
+        """Trạng thái đủ để dựng lại đúng phiên này (dùng cho nhật ký phiên làm bài)"""
+        return {
+            'seed': self.seed,
+            'shuffle_questions': self.shuffle_questions,
+            'shuffle_options': self.shuffle_options,
+            'order': base64.b64encode(self.order.tobytes()).decode('ascii'),
+            'option_perms': base64.b64encode(self.option_perms).decode('ascii'),
+            'sampled': self.sampled,
+        }
+
+    @classmethod
+    def from_state(cls, bank, state):
+        session = cls(QuestionBank(), seed=state['seed'])
+        session.bank = bank
+        session._bank_size = len(bank)
+        session.shuffle_questions = state['shuffle_questions']
+        session.shuffle_options = state['shuffle_options']
+        session.sampled = state.get('sampled', False)
+        session.order = array('I')
+        session.order.frombytes(base64.b64decode(state['order']))
+        session.option_perms = bytearray(base64.b64decode(state['option_perms']))
+        return session
+
+    def positions(self):
+        """Vị trí trong đề theo chỉ số câu trong kho (-1 nếu câu không có trong đề); tạo lần đầu khi cần"""
+        if self._positions is None:
+            positions = array('i', [-1]) * self._bank_size
+            for position, bank_index in enumerate(self.order):
+                positions[bank_index] = position
+            self._positions = positions
+        return self._positions
+
+    def options(self, position):
+        """Đáp án theo thứ tự hiển thị: [(chữ hiển thị, chữ gốc, nội dung)]"""
+        original = self.bank.options(self.order[position])
+        table = self.PERMUTATIONS[len(original)]
+        perm = table[self.option_perms[position] % len(table)]
+        return [(VALID_ANSWERS[i], original[p][0], original[p][1]) for i, p in enumerate(perm)]
+
+    def display_letter(self, position, original_letter):
+        for shown, original, _ in self.options(position):
+            if original == original_letter:
+                return shown
+        return original_letter
+
+    def original_letter(self, position, display_letter):
+        for shown, original, _ in self.options(position):
+            if shown == display_letter:
+                return original
+        return display_letter
+
+
+class SessionStats:
+    """Trạng thái làm bài cập nhật theo từng sự kiện: mỗi câu một byte cờ (đã trả lời / đã kiểm tra / đúng)
+    kèm bộ đếm, nên dòng trạng thái, danh sách câu chưa trả lời và điểm có ngay, không phải duyệt lại cả đề"""
+
+    def __init__(self, session):
+        self.session = session
+        size = len(session)
+        self.answered = bytearray(size)
+        self.checked = bytearray(size)
+        self.correct = bytearray(size)
+        self.answered_count = 0
+        self.checked_count = 0
+        self.correct_count = 0
+
+    @classmethod
+    def from_answers(cls, session, user_answers, checked=()):
+        stats = cls(session)
+        for position, letter in user_answers.items():
+            stats.set_answer(position, letter)
+        for position in checked:
+            stats.mark_checked(position)
+        return stats
+
+    def __len__(self):
+        return len(self.answered)
+
+    def extend(self):
+        """Phiên được nối thêm câu (kho nạp dần): các câu mới chưa trả lời"""
+        added = len(self.session) - len(self.answered)
+        if added > 0:
+            for flags in (self.answered, self.checked, self.correct):
+                flags.extend(bytes(added))
+
+    def set_answer(self, position, letter):
+        answered = 1 if letter else 0
+        correct = 1 if letter and letter == self.session.bank.answer(self.session.bank_index(position)) else 0
+        self.answered_count += answered - self.answered[position]
+        self.correct_count += correct - self.correct[position]
+        self.answered[position] = answered
+        self.correct[position] = correct
+
+    def mark_checked(self, position):
+        if not self.checked[position]:
+            self.checked[position] = 1
+            self.checked_count += 1
+
+    @property
+    def unanswered_count(self):
+        return len(self.answered) - self.answered_count
+
+    @staticmethod
+    def _positions(flags, limit=None):
+        """Các vị trí có cờ bằng 0, tăng dần (bytearray.find tìm ở tốc độ C)"""
+        result = array('I')
+        position = flags.find(0)
+        while position != -1 and (limit is None or len(result) < limit):
+            result.append(position)
+            position = flags.find(0, position + 1)
+        return result
+
+    def unanswered(self, limit=None):
+        return self._positions(self.answered, limit)
+
+    def wrong(self):
+        """Vị trí các câu sai hoặc chưa trả lời"""
+        positions = np.flatnonzero(np.frombuffer(self.correct, dtype=np.uint8) == 0).astype(np.uint32)
+        return array('I', positions.tobytes())
+
+    def counts(self):
+        return self.answered_count, self.checked_count, self.correct_count
+
+    @staticmethod
+    def recount(session, user_answers, checked):
+        """Đếm lại từ đầu (đã trả lời, đã kiểm tra, đúng) để đối chiếu với bộ đếm tăng dần"""
+        answered = len([letter for letter in user_answers.values() if letter])
+        correct = sum(1 for i in range(len(session))
+                      if user_answers.get(i, "") == session.bank.answer(session.bank_index(i)))
+        return answered, len(checked), correct
+
+
+# ================== CÂU HỎI GẦN TRÙNG ==================
+# Sau khi tách dấu (NFD) chữ tiếng Việt chỉ còn ký tự ASCII: giữ chữ/số (viết thường), còn lại thành khoảng trắng
+_FOLD_TABLE = bytes(c if c == 0x1f else ord(chr(c).lower()) if c < 128 and chr(c).isalnum() else 0x20 for c in range(256))
+
+
+def _fold_ascii(text):
+    decomposed = unicodedata.normalize('NFD', text.replace('đ', 'd').replace('Đ', 'D'))
+    return decomposed.encode('ascii', 'ignore').translate(_FOLD_TABLE).decode('ascii')
+
+
+def fold_vietnamese(text):
+    """Bỏ dấu tiếng Việt (đ → d), không phân biệt hoa thường, chỉ giữ chữ/số Latin cách nhau một khoảng trắng"""
+    return ' '.join(_fold_ascii(text).split())
+
+
+def near_duplicate_text(bank, index):
+    """Văn bản dùng để so gần trùng: câu hỏi + các đáp án (sắp xếp, vì bản sao thường đảo thứ tự đáp án)"""
+    # Bỏ dấu cả câu một lần rồi mới tách, nhanh hơn gọi fold_vietnamese cho từng phần
+    question, *options = _fold_ascii('\x1f'.join([bank.question(index)] + [text for _, text in bank.options(index)])).split('\x1f')
+    return ' '.join(' '.join([question] + sorted(' '.join(option.split()) for option in options)).split())
+
+
+class NearDuplicateIndex:
+    """Tìm các câu gần trùng bằng MinHash/LSH trong thời gian gần tuyến tính thay vì so từng cặp.
+    Chữ ký gồm bands x rows giá trị MinHash trên các shingle 4 byte của văn bản đã bỏ dấu;
+    chỉ các câu chung bucket ở ít nhất một băng mới được so chữ ký với ngưỡng threshold (Jaccard ước lượng)"""
+
+    SHINGLE = 4
+
+    def __init__(self, threshold=0.8, bands=16, rows=4, seed=1):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        rng = np.random.default_rng(seed)
+        # Họ hàm băm multiply-shift: h(x) = (a*x + b) >> 32 trên số nguyên 64 bit (tràn số là chủ ý)
+        self._a = rng.integers(1, 2**63, size=bands * rows, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=bands * rows, dtype=np.uint64)
+
+    def signatures(self, texts, block=4096):
+        """Ma trận chữ ký (số câu x bands*rows) kiểu uint32"""
+        result = np.empty((len(texts), len(self._a)), dtype=np.uint32)
+        for start in range(0, len(texts), block):
+            encoded = [text.encode('utf-8').ljust(self.SHINGLE) for text in texts[start:start + block]]
+            # Các văn bản nối bằng byte 0; shingle nào chứa byte 0 là shingle vắt qua hai câu
+            buffer = np.frombuffer(b'\x00'.join(encoded), dtype=np.uint8).astype(np.uint64)
+            windows = buffer[:-3] | buffer[1:-2] << 8 | buffer[2:-1] << 16 | buffer[3:] << 24
+            valid = (buffer[:-3] != 0) & (buffer[1:-2] != 0) & (buffer[2:-1] != 0) & (buffer[3:] != 0)
+            shingles = windows[valid]
+            counts = np.fromiter((len(item) - self.SHINGLE + 1 for item in encoded), dtype=np.int64, count=len(encoded))
+            offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            for j, (a, b) in enumerate(zip(self._a, self._b)):
+                hashed = (shingles * a + b) >> np.uint64(32)
+                result[start:start + len(encoded), j] = np.minimum.reduceat(hashed, offsets)
+        return result
+
+    def candidate_pairs(self, signatures):
+        """Các cặp (i < j) chung bucket ở ít nhất một băng. Trong mỗi bucket chỉ nối mỗi phần tử
+        với phần tử đầu và phần tử liền trước, nên số cặp tuyến tính theo kích thước bucket"""
+        pairs = []
+        mix = np.uint64(0x9E3779B97F4A7C15)
+        for band in range(self.bands):
+            columns = signatures[:, band * self.rows:(band + 1) * self.rows].astype(np.uint64)
+            keys = np.zeros(len(signatures), dtype=np.uint64)
+            for column in columns.T:
+                keys = (keys ^ column) * mix
+            order = np.argsort(keys, kind='stable')
+            sorted_keys = keys[order]
+            same = sorted_keys[1:] == sorted_keys[:-1]
+            if not same.any():
+                continue
+            run_start = np.maximum.accumulate(np.where(np.concatenate(([False], same)), 0, np.arange(len(order))))
+            members = np.flatnonzero(same) + 1
+            pairs.append(np.stack((order[run_start[members]], order[members])))
+            pairs.append(np.stack((order[members - 1], order[members])))
+        if not pairs:
+            return np.empty((0, 2), dtype=np.int64)
+        pairs = np.concatenate(pairs, axis=1)
+        low, high = np.minimum(pairs[0], pairs[1]), np.maximum(pairs[0], pairs[1])
+        keys = np.unique((low.astype(np.uint64) << np.uint64(32) | high.astype(np.uint64))[low != high])
+        return np.stack(((keys >> np.uint64(32)).astype(np.int64), (keys & np.uint64(0xFFFFFFFF)).astype(np.int64)), axis=1)
+
+    def clusters(self, texts):
+        """Các nhóm câu gần trùng (mỗi nhóm >= 2 chỉ số, tăng dần; nhóm xếp theo chỉ số đầu)"""
+        if len(texts) < 2:
+            return []
+        signatures = self.signatures(texts)
+        pairs = self.candidate_pairs(signatures)
+        parent = list(range(len(texts)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for start in range(0, len(pairs), 65536):
+            chunk = pairs[start:start + 65536]
+            similarity = (signatures[chunk[:, 0]] == signatures[chunk[:, 1]]).mean(axis=1)
+            for i, j in chunk[similarity >= self.threshold].tolist():
+                root_i, root_j = find(i), find(j)
+                if root_i != root_j:
+                    parent[max(root_i, root_j)] = min(root_i, root_j)
+
+        groups = {}
+        for i in range(len(texts)):
+            root = find(i)
+            if root != i:
+                groups.setdefault(root, [root]).append(i)
+        return sorted(groups.values(), key=lambda group: group[0])
+
+
+def find_near_duplicates(bank, threshold=0.8):
+    """Các nhóm câu gần trùng trong kho; phần tử đầu mỗi nhóm là câu xuất hiện sớm nhất (câu được giữ lại)"""
+    texts = [near_duplicate_text(bank, i) for i in range(len(bank))]
+    return NearDuplicateIndex(threshold).clusters(texts)
+
+
+def collapsed_indices(clusters):
+    """Chỉ số các câu bị ẩn khi gộp câu gần trùng (mọi câu trừ câu đầu mỗi nhóm)"""
+    return {index for group in clusters for index in group[1:]}
+
+
+# ================== TÌM KIẾM ==================
+class SearchIndex:
+    """Chỉ mục ngược trên câu hỏi, các đáp án và giải thích: từ (đã bỏ dấu) → mảng chỉ số câu tăng dần.
+    Truy vấn không phân biệt dấu; từ cuối được hiểu là tiền tố (mọi từ có tiền tố đó) để có kết quả ngay khi đang gõ"""
+
+    PREFIX_BATCH = 1024  # số danh sách ghép lại mỗi lần khi hợp theo tiền tố
+
+    def __init__(self):
+        self.postings = {}
+        self.vocabulary = []  # các từ đã sắp xếp, để tìm theo tiền tố
+        self.size = 0
+
+    @classmethod
+    def build(cls, bank, chunk_rows=2000, cancelled=None):
+        """Lập chỉ mục cả kho theo từng khối; trả về None nếu cancelled() báo dừng giữa chừng"""
+        index = cls()
+        for start in range(0, len(bank), chunk_rows):
+            if cancelled is not None and cancelled():
+                return None
+            index.add_range(bank, start, min(start + chunk_rows, len(bank)))
+        index.finish()
+        return index
+
+    def add_range(self, bank, start, stop):
+        """Thêm các câu [start, stop) (theo thứ tự tăng dần); gọi finish() sau khi thêm xong"""
+        postings = self.postings
+        for index in range(start, stop):
+            texts = [bank.question(index), bank.explanation(index) or ''] + [text for _, text in bank.options(index)]
+            for term in set(_fold_ascii(' '.join(texts)).split()):
+                posting = postings.get(term)
+                if posting is None:
+                    posting = postings[term] = array('I')
+                posting.append(index)
+        self.size = stop
+
+    def finish(self):
+        self.vocabulary = sorted(self.postings)
+
+    def _prefix_postings(self, prefix):
+        """Danh sách (array 'I') của mọi từ bắt đầu bằng prefix"""
+        first = bisect.bisect_left(self.vocabulary, prefix)
+        last = bisect.bisect_left(self.vocabulary, prefix[:-1] + chr(ord(prefix[-1]) + 1), first)
+        return [self.postings[term] for term in self.vocabulary[first:last]]
+
+    @staticmethod
+    def _contains(posting, values):
+        positions = np.minimum(np.searchsorted(posting, values), len(posting) - 1)
+        return posting[positions] == values
+
+    def search(self, query, limit=200, allowed=None):
+        """Các câu chứa mọi từ của truy vấn: (tối đa limit chỉ số tăng dần, tổng số câu khớp).
+        allowed: mảng bool theo chỉ số câu, bỏ các câu không nằm trong đề"""
+        terms = fold_vietnamese(query).split()
+        if not terms:
+            return [], 0
+        *exact_terms, last_term = terms
+        exact = []
+        for term in exact_terms:
+            posting = self.postings.get(term)
+            if posting is None:
+                return [], 0
+            exact.append(np.frombuffer(posting, dtype=np.uint32))
+        prefix = self._prefix_postings(last_term)
+        if not prefix:
+            return [], 0
+
+        if len(prefix) == 1:
+            matched = np.frombuffer(prefix[0], dtype=np.uint32)
+        else:
+            # Hợp các danh sách của từ có cùng tiền tố bằng bitmap: tuyến tính, không cần sắp xếp.
+            # Tiền tố ngắn có thể khớp hàng chục nghìn từ: nối byte của từng nhóm danh sách rồi đánh dấu một lần
+            bitmap = np.zeros(self.size, dtype=bool)
+            for start in range(0, len(prefix), self.PREFIX_BATCH):
+                bitmap[np.frombuffer(b''.join(prefix[start:start + self.PREFIX_BATCH]), dtype=np.uint32)] = True
+            matched = None
+        if exact:
+            exact.sort(key=len)
+            candidates = exact[0]
+            for posting in exact[1:]:
+                candidates = candidates[self._contains(posting, candidates)]
+            candidates = candidates[self._contains(matched, candidates) if matched is not None else bitmap[candidates]]
+        else:
+            candidates = matched if matched is not None else np.flatnonzero(bitmap).astype(np.uint32)
+
+        if allowed is not None:
+            candidates = candidates[allowed[candidates]]
+        return candidates[:limit].tolist(), len(candidates)
+
+
+def parse_exam_quotas(text):
+    """Hạn mức số câu theo file nguồn, dạng "file_a.xlsx:20, file_b.xlsx:10" → {'file_a.xlsx': 20, ...}"""
+    quotas = {}
+    for item in text.split(','):
+        if item.strip():
+            name, count = item.rsplit(':', 1)
+            quotas[name.strip()] = int(count)
+    return quotas
+
+
+def read_env_config(config, env_path='.env'):
+    """Đọc cấu hình từ file .env vào dict config (chỉ ghi đè các khóa có trong file); dùng chung cho giao diện và CLI"""
+    env_path = Path(env_path)
+    if env_path.exists():
+        try:
+            with open(env_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if '=' in line and not line.strip().startswith('#'):
+                        key, value = line.strip().split('=', 1)
+                        if key == 'EXAM_TIME_MIN':
+                            config['exam_time_min'] = int(value)
+                        elif key == 'EXAM_QUESTIONS':
+                            config['exam_questions'] = int(value) if value.strip() else 0
+                        elif key == 'EXAM_QUOTAS':
+                            config['exam_quotas'] = parse_exam_quotas(value)
+                        elif key == 'EXAM_SEED':
+                            config['exam_seed'] = int(value) if value.strip() else None
+                        elif key == 'CACHE_MAX_ENTRIES':
+                            config['cache_max_entries'] = int(value)
+                        elif key == 'TOPIC_CACHE_SIZE':
+                            config['topic_cache_size'] = int(value)
+                        elif key == 'RENDER_PREFETCH':
+                            config['render_prefetch'] = int(value)
+                        elif key == 'JOURNAL_SYNC_MS':
+                            config['journal_sync_ms'] = int(value)
+                        elif key == 'NEAR_DUPLICATE_THRESHOLD':
+                            config['near_duplicate_threshold'] = float(value)
+                        elif key in ['RANDOMIZE_QUESTIONS', 'RANDOMIZE_OPTIONS', 'CACHE_ENABLED', 'REBUILD_CACHE', 'FAST_START', 'NAV_STATS', 'COLLAPSE_NEAR_DUPLICATES', 'JOURNAL_ENABLED', 'TOPIC_PREFETCH']:
+                            config[key.lower()] = value.lower() == 'true'
+                        elif key in ['THEME', 'FONT_FAMILY', 'STARTUP_LOG', 'JOURNAL_FILE', 'TRACE_FILE']:
+                            config[key.lower()] = value
+        except Exception as e:
+            print(f"Lỗi đọc file .env: {e}")
+
+
+# Các định dạng kho câu hỏi, xếp theo tốc độ đọc: khi cùng một kho có nhiều định dạng, lấy định dạng đầu tiên
+QUESTION_FILE_EXTENSIONS = ('.qpack', '.parquet', '.csv', '.jsonl', '.xlsx', '.xls')
+EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+
+
+def question_file_format(file_path):
+    return os.path.splitext(str(file_path))[1].lower()
+
+
+def read_question_columns(file_path):
+    """Tên cột của file CSV/JSONL/Parquet, chỉ đọc phần đầu file ([] nếu không đọc được)"""
+    file_format = question_file_format(file_path)
+    try:
+        if file_format == '.csv':
+            # Module csv thay cho pandas: dò file lúc khởi động không phải nạp pandas
+            with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+                return [c.strip() for c in next(csv.reader(f), [])]
+        if file_format == '.jsonl':
+            with open(file_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        return list(record) if isinstance(record, dict) else []
+            return []
+        if file_format == '.parquet':
+            import pyarrow.parquet as pq
+            return list(pq.read_schema(file_path).names)
+    except Exception:
+        return []
+    return []
+
+
+def list_workbook_sheets(file_path):
+    """Tên các sheet theo thứ tự trong file Excel. Với .xlsx chỉ đọc mục lục xl/workbook.xml trong file zip
+    (openpyxl đọc cả bảng chuỗi dùng chung của mọi sheet ngay khi mở)"""
+    if not str(file_path).lower().endswith('.xlsx'):
+        return list(pd.ExcelFile(file_path).sheet_names)
+    with zipfile.ZipFile(file_path) as archive, archive.open('xl/workbook.xml') as f:
+        return [element.get('name') for element in ElementTree.parse(f).iter()
+                if element.tag.rsplit('}', 1)[-1] == 'sheet']
+
+
+def iter_excel_frames(file_path, chunk_rows=2000, sheet=None):
+    """Đọc một sheet của file Excel (mặc định sheet đầu) theo từng khối dòng, trả về (DataFrame, tổng số dòng ước tính)"""
+    if not str(file_path).lower().endswith('.xlsx'):
+        # .xls không hỗ trợ chế độ read-only của openpyxl: đọc một lần rồi chia khối
+        df = pd.read_excel(file_path, sheet_name=0 if sheet is None else sheet)
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start:start + chunk_rows].reset_index(drop=True), len(df)
+        if len(df) == 0:
+            yield df, 0
+        return
+
+    import openpyxl
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook.worksheets[0] if sheet is None else workbook[sheet]
+        total = max((worksheet.max_row or 1) - 1, 0)
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c).strip() if c is not None else f"Unnamed: {i}" for i, c in enumerate(header)]
+
+        chunk, blank_run = [], []
+        for row in rows:
+            # Dòng trống ở cuối sheet bị bỏ qua giống pd.read_excel, dòng trống ở giữa vẫn được giữ
+            values = [int(v) if isinstance(v, float) and v.is_integer() else v for v in row]
+            if all(v is None or v == '' for v in values):
+                blank_run.append(values)
+                continue
+            chunk.extend(blank_run)
+            blank_run = []
+            chunk.append(values)
+            if len(chunk) >= chunk_rows:
+                yield pd.DataFrame(chunk, columns=columns), total
+                chunk = []
+        yield pd.DataFrame(chunk, columns=columns), total
+    finally:
+        workbook.close()
+
+
+def _estimated_rows(rows, handle, file_size):
+    """Ước lượng tổng số dòng từ số dòng đã đọc và số byte đã đọc (CSV/JSONL không biết trước số dòng);
+    bằng đúng số dòng khi đã đọc hết file"""
+    position = handle.tell()
+    if position >= file_size:
+        return rows
+    return max(rows + 1, round(rows * file_size / max(position, 1)))
+
+
+def iter_csv_frames(file_path, chunk_rows=2000):
+    """Đọc file CSV (UTF-8, có thể có BOM) theo khối dòng; mọi ô là chuỗi, ô trống là ''"""
+    with open(file_path, 'rb') as f:
+        file_size = os.fstat(f.fileno()).st_size
+        try:
+            reader = pd.read_csv(f, dtype=str, keep_default_na=False, encoding='utf-8-sig', chunksize=chunk_rows)
+        except pd.errors.EmptyDataError:
+            return  # file rỗng: read_question_file báo thiếu cột
+        rows = 0
+        with reader:
+            for df in reader:
+                df.columns = [str(c).strip() for c in df.columns]
+                rows += len(df)
+                yield df, _estimated_rows(rows, f, file_size)
+
+
+def iter_jsonl_frames(file_path, chunk_rows=2000):
+    """Đọc file JSONL (mỗi dòng một câu hỏi dạng object) theo khối dòng"""
+    with open(file_path, 'rb') as f:
+        file_size = os.fstat(f.fileno()).st_size
+        rows = 0
+        with pd.read_json(f, lines=True, dtype=False, chunksize=chunk_rows, encoding='utf-8') as reader:
+            for df in reader:
+                rows += len(df)
+                yield df, _estimated_rows(rows, f, file_size)
+
+
+def iter_parquet_frames(file_path, chunk_rows=2000):
+    """Đọc file Parquet theo từng lô dòng, chỉ các cột câu hỏi"""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Cần cài thư viện pyarrow để đọc file Parquet (pip install pyarrow)")
+    parquet = pq.ParquetFile(file_path)
+    columns = [name for name in parquet.schema_arrow.names if name in QUESTION_FIELDS]
+    total = parquet.metadata.num_rows
+    for batch in parquet.iter_batches(batch_size=chunk_rows, columns=columns):
+        yield batch.to_pandas(), total
+
+
+QUESTION_FRAME_READERS = {
+    '.csv': iter_csv_frames,
+    '.jsonl': iter_jsonl_frames,
+    '.parquet': iter_parquet_frames,
+}
+
+
+def iter_question_frames(file_path, chunk_rows=2000, sheet=None):
+    """Đọc file câu hỏi theo khối theo phần mở rộng: CSV, JSONL, Parquet hoặc Excel (sheet chỉ dùng cho Excel)"""
+    reader = QUESTION_FRAME_READERS.get(question_file_format(file_path))
+    if reader is None:
+        return iter_excel_frames(file_path, chunk_rows, sheet)
+    return reader(file_path, chunk_rows)
+
+
+def read_question_file(file_path, chunk_rows=2000, progress=None, on_chunk=None, sheet=None):
+    """Đọc file câu hỏi theo khối, kiểm tra và nạp vào QuestionBank; trả về (kho câu hỏi hoặc None, lỗi)"""
+    bank, issues = QuestionBank(source=file_path), []
+    row_offset = 0
+    # Số dòng báo lỗi tính như Excel (dòng 1 là tiêu đề); JSONL/Parquet không có dòng tiêu đề
+    row_base = -1 if question_file_format(file_path) in ('.jsonl', '.parquet') else 0
+    frames_read = 0
+    for df, total in iter_question_frames(file_path, chunk_rows, sheet):
+        frames_read += 1
+        cleaned = clean_question_frame(df)
+        chunk_issues = validate_question_frame(df, cleaned, row_offset + row_base)
+        if chunk_issues and chunk_issues[0].rule == 'thieu_cot':
+            return None, chunk_issues
+        issues.extend(chunk_issues)
+        if not issues:
+            bank.extend_columns(cleaned)
+            if on_chunk:
+                on_chunk(bank)
+        row_offset += len(df)
+        if progress:
+            progress(row_offset, max(total, row_offset))
+    if not frames_read:
+        return None, validate_question_frame(pd.DataFrame())  # file rỗng: báo thiếu cột
+    if issues:
+        return None, issues
+    bank.compact()
+    return bank, issues
+
+
+def load_question_bank(file_path, cache=None, force_rebuild=False, progress=None, on_chunk=None, sheet=None):
+    """Nạp kho câu hỏi từ file (dùng cache nếu file không đổi), trả về (QuestionBank hoặc None, lỗi).
+    File .qpack được ánh xạ thẳng (ExamPack), không qua cache"""
+    if ExamPack.is_pack(file_path):
+        try:
+            return ExamPack.open(file_path), []
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Lỗi mở exam pack {file_path}: {e}")
+            return None, [ValidationIssue(None, None, 'exam_pack')]
+    if cache is not None and not force_rebuild:
+        bank = cache.load(file_path, sheet)
+        if bank is not None:
+            print(f"Dùng cache cho {file_path}" + (f" (sheet {sheet})" if sheet is not None else ""))
+            return bank, []
+    bank, issues = read_question_file(file_path, progress=progress, on_chunk=on_chunk, sheet=sheet)
+    if bank is not None and cache is not None:
+        cache.store(file_path, bank, sheet)
+    return bank, issues
+
+
+def _load_bank_worker(file_path, cache, force_rebuild):
+    # Chạy trong tiến trình con của load_question_banks
+    return load_question_bank(file_path, cache, force_rebuild)
+
+
+def load_question_banks(file_paths, cache=None, force_rebuild=False, on_file_done=None):
+    """Nạp nhiều file song song (mỗi file một tiến trình), gộp theo thứ tự file và bỏ câu trùng.
+    on_file_done(vị trí file, kho hoặc None, số file đã xong, tổng số file) được gọi khi từng file xong.
+    Trả về (kho đã gộp hoặc None, {file: lỗi}, số câu trùng đã bỏ)"""
+    results = [(None, [])] * len(file_paths)
+    # spawn thay vì fork mặc định trên Linux: tiến trình đang có luồng nền (Tk, loader, prefill...) nên fork
+    # có thể sao chép một lock đang bị giữ và treo tiến trình con
+    pool = ProcessPoolExecutor(max_workers=min(len(file_paths), os.cpu_count() or 1),
+                               mp_context=multiprocessing.get_context('spawn'))
+    try:
+        futures = {
+            pool.submit(_load_bank_worker, path, cache, force_rebuild): i
+            for i, path in enumerate(file_paths)
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                print(f"Lỗi đọc file {file_paths[i]}: {e}")
+            if on_file_done:
+                on_file_done(i, results[i][0], done, len(file_paths))
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    errors = {path: issues for path, (bank, issues) in zip(file_paths, results) if bank is None}
+    banks = [bank for bank, _ in results if bank is not None]
+    if not banks:
+        return None, errors, 0
+    merged, duplicates = QuestionBank.merge(banks)
+    return merged, errors, duplicates
+
+
+def format_validation_report(errors, limit=10):
+    """Tóm tắt lỗi dữ liệu của các file ({file: [ValidationIssue]}) thành văn bản"""
+    lines = []
+    for file_path, issues in errors.items():
+        if not issues:
+            lines.append(f"{os.path.basename(file_path)}: không đọc được file")
+            continue
+        lines.append(f"{os.path.basename(file_path)}: {len(issues)} lỗi")
+        lines.extend(f"  - {format_validation_issue(issue)}" for issue in issues[:limit])
+        if len(issues) > limit:
+            lines.append(f"  ... và {len(issues) - limit} lỗi khác")
+    return "\n".join(lines)
+
+
+def report_validation_issues(file_path, issues, limit=20):
+    if not issues:
+        return
+    print(f"Phát hiện {len(issues)} lỗi dữ liệu trong {file_path}:")
+    for issue in issues[:limit]:
+        print("  -", format_validation_issue(issue))
+    if len(issues) > limit:
+        print(f"  ... và {len(issues) - limit} lỗi khác")
+
+
+class BackgroundQuestionLoader:
+    """Đọc các file câu hỏi trên luồng nền; tiến độ và kết quả gửi về luồng Tk qua hàng đợi.
+    Một file: đọc theo khối, tiến độ tính theo câu. Nhiều file: mỗi file một tiến trình, tiến độ tính theo file"""
+
+    class Cancelled(Exception):
+        pass
+
+    def __init__(self, file_paths, cache=None, force_rebuild=False, first_page_size=50, near_duplicate_threshold=None,
+                 sheet=None, tracer=None):
+        self.file_paths = list(file_paths)
+        self.tracer = tracer  # Tracer (TRACE_FILE): ghi thời gian các bước đọc, trên luồng của loader
+        self.sheet = sheet  # chỉ dùng khi nạp một file: sheet cần đọc (mặc định sheet đầu)
+        self.cache = cache
+        self.force_rebuild = force_rebuild
+        self.first_page_size = first_page_size
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.events = queue.Queue()
+        self._cancel = threading.Event()
+        self._first_page_sent = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    def poll(self):
+        """Lấy các sự kiện đang chờ mà không chặn: ('progress', đã xong, tổng, đơn vị) / ('first_page', kho)
+        / ('near_duplicates', các nhóm câu gần trùng) / ('done', kho hoặc None, {file: lỗi}, số câu trùng đã bỏ)
+        / ('error', thông báo)"""
+        while True:
+            try:
+                yield self.events.get_nowait()
+            except queue.Empty:
+                return
+
+    def _send_first_page(self, bank):
+        if not self._first_page_sent and self.first_page_size and len(bank) >= self.first_page_size:
+            self._first_page_sent = True
+            self.events.put(('first_page', bank.slice(0, self.first_page_size)))
+
+    def _check_cancel(self):
+        if self._cancel.is_set():
+            raise self.Cancelled()
+
+    def _traced(self, name, function, *args, **kwargs):
+        """Gọi function; nếu bật tracer thì ghi thời gian dưới tên name"""
+        if self.tracer is None:
+            return function(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self.tracer.record(name, start, time.perf_counter(), category="loader")
+
+    def _send_done(self, bank, errors, duplicates):
+        if bank is not None and self.near_duplicate_threshold is not None:
+            self._check_cancel()
+            near_duplicates = self._traced('find_near_duplicates', find_near_duplicates, bank, self.near_duplicate_threshold)
+            self.events.put(('near_duplicates', near_duplicates))
+        self.events.put(('done', bank, errors, duplicates))
+
+    def _run(self):
+        try:
+            if len(self.file_paths) == 1:
+                self._load_single(self.file_paths[0])
+            else:
+                self._load_many()
+        except self.Cancelled:
+            pass
+        except Exception as e:
+            self.events.put(('error', str(e)))
+
+    def _load_single(self, file_path):
+        def progress(done, total):
+            self._check_cancel()
+            self.events.put(('progress', done, total, 'câu'))
+
+        bank, issues = self._traced(
+            'load_question_bank', load_question_bank,
+            file_path, self.cache, self.force_rebuild, progress=progress, on_chunk=self._send_first_page, sheet=self.sheet
+        )
+        self._send_done(bank, {} if bank is not None else {file_path: issues}, 0)
+
+    def _load_many(self):
+        def on_file_done(i, bank, done, total):
+            self._check_cancel()
+            self.events.put(('progress', done, total, 'file'))
+            if i == 0 and bank is not None:
+                # Kho gộp luôn bắt đầu bằng các câu của file đầu tiên nên có thể hiển thị trước
+                self._send_first_page(QuestionBank.merge([bank])[0])
+
+        bank, errors, duplicates = self._traced(
+            'load_question_banks', load_question_banks,
+            self.file_paths, self.cache, self.force_rebuild, on_file_done=on_file_done
+        )
+        self._send_done(bank, errors, duplicates)
+
+
+class Topic(namedtuple('Topic', ['file_path', 'sheet'])):
+    """Một chủ đề: một sheet của file câu hỏi (sheet None: sheet đầu / exam pack), hoặc các file chỉ có một sheet
+    được gộp lại như khi không chia chủ đề (file_path là tuple các file, sheet None)"""
+    __slots__ = ()
+
+    @property
+    def file_paths(self):
+        return list(self.file_path) if isinstance(self.file_path, tuple) else [self.file_path]
+
+
+class TopicLibrary:
+    """Các chủ đề của những file Excel nhiều sheet (mỗi sheet một chủ đề; các file một sheet mở cùng lúc vẫn gộp
+    thành một chủ đề). Lúc mở chỉ đọc mục lục sheet;
+    câu hỏi của một sheet được đọc khi chọn lần đầu và giữ trong cache LRU tối đa max_loaded sheet.
+    prefetch() đọc trước các sheet kế tiếp trên luồng nền để chuyển chủ đề không phải chờ.
+    Các nhóm câu gần trùng (khi bật gộp) được tính cùng lúc đọc và giữ kèm kho để đổi chủ đề không phải tính lại"""
+
+    def __init__(self, topics, max_loaded=4, cache=None, force_rebuild=False, near_duplicate_threshold=None):
+        self.topics = list(topics)
+        self.max_loaded = max(max_loaded, 1)
+        self.cache = cache
+        self.force_rebuild = force_rebuild
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self._loaded = OrderedDict()  # Topic → (QuestionBank, nhóm câu gần trùng), cũ nhất ở đầu
+        self._inflight = {}  # Topic → threading.Event, đặt khi luồng đọc trước đọc xong chủ đề đó
+        self._lock = threading.Lock()
+        self._prefetch_cancel = threading.Event()
+
+    @classmethod
+    def discover(cls, file_paths, **kwargs):
+        """TopicLibrary nếu có file nhiều sheet, ngược lại None (các file được nạp và gộp như trước).
+        Chỉ file nhiều sheet mới tách thành từng chủ đề; các file một sheet vẫn gộp chung một chủ đề,
+        đặt ở vị trí của file một sheet đầu tiên"""
+        topics, single_sheet, multi_sheet = [], [], False
+        for file_path in file_paths:
+            is_excel = question_file_format(file_path) in EXCEL_EXTENSIONS
+            sheets = list_workbook_sheets(file_path) if is_excel else [None]
+            if len(sheets) > 1:
+                multi_sheet = True
+                topics.extend(Topic(file_path, sheet) for sheet in sheets)
+                continue
+            if not single_sheet:
+                topics.append(None)  # chỗ của chủ đề gộp
+            single_sheet.append(Topic(file_path, sheets[0] if sheets else None))
+        if not multi_sheet:
+            return None
+        if single_sheet:
+            merged = single_sheet[0] if len(single_sheet) == 1 else Topic(tuple(t.file_path for t in single_sheet), None)
+            topics[topics.index(None)] = merged
+        return cls(topics, **kwargs)
+
+    def label(self, topic):
+        """Tên hiển thị: tên sheet, kèm tên file nếu có nhiều file"""
+        if isinstance(topic.file_path, tuple):
+            return f"Gộp {len(topic.file_path)} file: " + ", ".join(os.path.basename(path) for path in topic.file_path)
+        name = topic.sheet or os.path.splitext(os.path.basename(topic.file_path))[0]
+        if len({t.file_path for t in self.topics}) > 1:
+            name = f"{name} ({os.path.basename(topic.file_path)})"
+        return name
+
+    def get(self, topic):
+        """(kho câu hỏi, nhóm câu gần trùng) của chủ đề nếu đã đọc (đánh dấu vừa dùng), ngược lại (None, None)"""
+        with self._lock:
+            entry = self._loaded.get(topic)
+            if entry is None:
+                return None, None
+            self._loaded.move_to_end(topic)
+            return entry
+
+    def store(self, topic, bank, near_duplicates):
+        with self._lock:
+            self._loaded[topic] = (bank, near_duplicates)
+            self._loaded.move_to_end(topic)
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+
+    def loading(self, topic):
+        """Chủ đề đang được đọc trên luồng đọc trước"""
+        with self._lock:
+            return topic in self._inflight
+
+    def load(self, topic):
+        """Đọc câu hỏi của chủ đề (dùng bản đã đọc nếu có, chờ nếu luồng khác đang đọc), trả về (kho hoặc None, lỗi)"""
+        with self._lock:
+            entry = self._loaded.get(topic)
+            done = self._inflight.get(topic)
+            if entry is None and done is None:
+                self._inflight[topic] = threading.Event()
+        if entry is not None:
+            return entry[0], []
+        if done is not None:
+            done.wait()
+            bank, _ = self.get(topic)
+            return (bank, []) if bank is not None else self.load(topic)
+        try:
+            if isinstance(topic.file_path, tuple):
+                bank, errors, _ = load_question_banks(topic.file_paths, self.cache, self.force_rebuild)
+                issues = [issue for file_issues in errors.values() for issue in file_issues]
+            else:
+                bank, issues = load_question_bank(topic.file_path, self.cache, self.force_rebuild, sheet=topic.sheet)
+            if bank is not None:
+                threshold = self.near_duplicate_threshold
+                self.store(topic, bank, find_near_duplicates(bank, threshold) if threshold is not None else [])
+            return bank, issues
+        finally:
+            with self._lock:
+                self._inflight.pop(topic).set()
+
+    def prefetch(self, current):
+        """Đọc trước (trên luồng nền) các chủ đề sau current chưa có trong cache, không đẩy current ra khỏi cache"""
+        self._prefetch_cancel.set()
+        cancel = self._prefetch_cancel = threading.Event()
+        start = self.topics.index(current) + 1 if current in self.topics else 0
+        candidates = [topic for topic in self.topics[start:] + self.topics[:start] if topic != current]
+        candidates = candidates[:self.max_loaded - 1]
+
+        def run():
+            for topic in candidates:
+                if cancel.is_set():
+                    return
+                if self.get(topic)[0] is None:
+                    try:
+                        self.load(topic)
+                    except Exception as e:
+                        print(f"Lỗi đọc trước chủ đề {self.label(topic)}: {e}")
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def cancel_prefetch(self):
+        self._prefetch_cancel.set()
+
+
+class SessionJournal:
+    """Nhật ký ghi trước (append-only, JSON Lines) của phiên làm bài, để khôi phục sau khi treo máy / mất điện.
+    Dòng đầu là ảnh chụp trạng thái ('start'), mỗi dòng sau là một sự kiện ghi đè trạng thái nên phát lại
+    nhiều lần vẫn cho cùng kết quả. Sự kiện chỉ được ghi vào bộ đệm; sync() gọi định kỳ mới fsync theo lô"""
+
+    COMPACT_EVERY = 1000  # số sự kiện sau ảnh chụp thì nén lại thành ảnh chụp mới
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.records_since_snapshot = 0
+        self._file = None
+        self._dirty = False
+
+    @property
+    def active(self):
+        return self._file is not None
+
+    @property
+    def needs_compaction(self):
+        return self.records_since_snapshot >= self.COMPACT_EVERY
+
+    def begin(self, snapshot):
+        """Bắt đầu nhật ký mới từ ảnh chụp trạng thái; thay file cũ một cách nguyên tử (ghi file tạm rồi đổi tên).
+        Dùng cả khi bắt đầu phiên mới lẫn khi nén nhật ký"""
+        self.close()
+        temp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(dict(snapshot, t='start'), ensure_ascii=False, separators=(',', ':')) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self.records_since_snapshot = 0
+
+    def append(self, kind, **fields):
+        """Thêm một sự kiện: 'a' chọn đáp án, 'c' kiểm tra, 'n' chuyển câu (p=vị trí, v=chữ cái gốc), 'e' giây đã làm"""
+        if self._file is None:
+            return
+        fields['t'] = kind
+        self._file.write(json.dumps(fields, separators=(',', ':')) + "\n")
+        self.records_since_snapshot += 1
+        self._dirty = True
+
+    def sync(self):
+        if self._file is not None and self._dirty:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._dirty = False
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def finish(self):
+        """Phiên đã kết thúc (nộp bài): bỏ nhật ký"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def load(self):
+        """Dựng lại trạng thái phiên dang dở (ảnh chụp + phát lại sự kiện), None nếu không có.
+        Dòng cuối bị ghi dở do mất điện được bỏ qua"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return None
+
+        state = None
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            kind = record.pop('t', None)
+            if kind == 'start':
+                state = record
+                state['checked'] = set(state['checked'])
+            elif state is None:
+                continue
+            elif kind in ('a', 'c'):
+                state['answers'][str(record['p'])] = record['v']
+                if kind == 'c':
+                    state['checked'].add(record['p'])
+            elif kind == 'n':
+                state['index'] = record['p']
+            elif kind == 'e':
+                state['elapsed'] = record['s']
+        if state is None:
+            return None
+        state['answers'] = {int(position): letter for position, letter in state['answers'].items()}
+        state['checked'] = sorted(state['checked'])
+        return state
+
+
+class QuestionCache:
+    """Cache nhị phân các câu hỏi đã kiểm tra hợp lệ (khóa: đường dẫn, kích thước, mtime, hash nội dung)"""
+    VERSION = 4
+
+    def __init__(self, cache_dir='.quiz_cache', max_entries=20, max_age_days=30):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+
+    @staticmethod
+    def file_hash(file_path, chunk_size=1 << 20):
+        """Hash nội dung file (blake2b), đọc theo từng khối"""
+        digest = hashlib.blake2b(digest_size=20)
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _entry_path(self, file_path, sheet=None):
+        key = os.path.abspath(file_path) if sheet is None else f"{os.path.abspath(file_path)}\0{sheet}"
+        return self.cache_dir / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.pkl"
+
+    def load(self, file_path, sheet=None):
+        """Trả về dữ liệu đã cache (của sheet nếu có) hoặc None nếu chưa có / đã cũ"""
+        entry_path = self._entry_path(file_path, sheet)
+        if not entry_path.exists():
+            return None
+        try:
+            st = os.stat(file_path)
+            with open(entry_path, 'rb') as f:
+                header = pickle.load(f)
+                if (header.get('version') != self.VERSION or header.get('path') != os.path.abspath(file_path)
+                        or header.get('sheet') != sheet):
+                    raise ValueError("cache không khớp")
+                if header['size'] != st.st_size:
+                    raise ValueError("file đã thay đổi")
+                if header['mtime_ns'] != st.st_mtime_ns:
+                    # mtime đổi nhưng nội dung có thể vẫn như cũ (copy, touch...)
+                    if header['content_hash'] != self.file_hash(file_path):
+                        raise ValueError("file đã thay đổi")
+                    header = None
+                data = pickle.load(f)
+        except Exception:
+            self._remove(entry_path)
+            return None
+
+        if header is None:
+            self.store(file_path, data, sheet)
+        else:
+            os.utime(entry_path)  # đánh dấu lần dùng gần nhất cho chính sách loại bỏ
+        return data
+
+    def store(self, file_path, data, sheet=None):
+        """Ghi dữ liệu vào cache (ghi file tạm rồi thay thế để tránh hỏng cache)"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            st = os.stat(file_path)
+            header = {
+                'version': self.VERSION,
+                'path': os.path.abspath(file_path),
+                'sheet': sheet,
+                'size': st.st_size,
+                'mtime_ns': st.st_mtime_ns,
+                'content_hash': self.file_hash(file_path),
+            }
+            entry_path = self._entry_path(file_path, sheet)
+            tmp_path = entry_path.with_suffix('.tmp')
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, entry_path)
+            self.evict()
+        except Exception as e:
+            print(f"Lỗi ghi cache: {e}")
+
+    def invalidate(self, file_path, sheet=None):
+        self._remove(self._entry_path(file_path, sheet))
+
+    def evict(self):
+        """Xóa mục cache của file không còn tồn tại, mục quá hạn và mục ít dùng nhất khi vượt giới hạn"""
+        if not self.cache_dir.exists():
+            return
+        now = time.time()
+        entries = []
+        for entry_path in self.cache_dir.glob('*.pkl'):
+            try:
+                last_used = entry_path.stat().st_mtime
+                if now - last_used > self.max_age_days * 86400:
+                    self._remove(entry_path)
+                    continue
+                with open(entry_path, 'rb') as f:
+                    header = pickle.load(f)
+                if not os.path.exists(header.get('path', '')):
+                    self._remove(entry_path)
+                    continue
+                entries.append((last_used, entry_path))
+            except Exception:
+                self._remove(entry_path)
+        entries.sort(reverse=True)
+        for _, entry_path in entries[self.max_entries:]:
+            self._remove(entry_path)
+
+    def clear(self):
+        for entry_path in self.cache_dir.glob('*.pkl'):
+            self._remove(entry_path)
+
+    @staticmethod
+    def _remove(entry_path):
+        try:
+            os.remove(entry_path)
+        except OSError:
+            pass
+
+# ================== XUẤT KẾT QUẢ ==================
+RESULT_COLUMNS = ('stt', 'cau_hoi', 'lua_chon', 'dap_an_dung', 'ket_qua', 'giai_thich')
+RESULT_HEADERS = ('STT', 'Câu hỏi', 'Lựa chọn', 'Đáp án đúng', 'Kết quả', 'Giải thích')
+EXPORT_FILETYPES = [("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("Parquet", "*.parquet"),
+                    ("Excel", "*.xlsx"), ("All files", "*.*")]
+
+
+def result_row(session, user_answers, position):
+    """Kết quả một câu của phiên làm bài, theo chữ cái thí sinh đã thấy trên màn hình"""
+    bank_index = session.bank_index(position)
+    user_answer = user_answers.get(position, "")
+    correct_answer = session.bank.answer(bank_index)
+    return {
+        'stt': position + 1,
+        'cau_hoi': session.bank.question(bank_index),
+        'lua_chon': session.display_letter(position, user_answer) if user_answer else "Không trả lời",
+        'dap_an_dung': session.display_letter(position, correct_answer),
+        'ket_qua': "Đúng" if user_answer == correct_answer else "Sai",
+        'giai_thich': session.bank.explanation(bank_index)
+    }
+
+
+def iter_result_rows(session, user_answers):
+    """Sinh lần lượt kết quả từng câu, không giữ cả danh sách trong bộ nhớ"""
+    for position in range(len(session)):
+        yield result_row(session, user_answers, position)
+
+
+def _iter_batches(rows, size):
+    rows = iter(rows)
+    return iter(lambda: list(itertools.islice(rows, size)), [])
+
+
+def _write_results_csv(file_path, rows, summary):
+    with open(file_path, 'w', newline='', encoding='utf-8') as csvfile:
+        csvfile.write("# KẾT QUẢ BÀI THI\n")
+        for key, value in summary.items():
+            csvfile.write(f"# {key}: {value}\n")
+        csvfile.write("#\n")
+        writer = csv.writer(csvfile)
+        writer.writerow(RESULT_HEADERS)
+        for row in rows:
+            writer.writerow([row[column] for column in RESULT_COLUMNS])
+
+
+def _write_results_jsonl(file_path, rows, summary):
+    # Dòng đầu là thông tin bài thi, mỗi dòng sau là một câu
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'ket_qua_bai_thi': summary}, ensure_ascii=False) + "\n")
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+def _write_results_parquet(file_path, rows, summary, batch_rows=5000):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Cần cài thư viện pyarrow để xuất file Parquet (pip install pyarrow)")
+    # Thông tin bài thi lưu trong metadata của schema
+    schema = pa.schema(
+        [('stt', pa.int32())] + [(column, pa.string()) for column in RESULT_COLUMNS[1:]],
+        metadata={key.encode('utf-8'): str(value).encode('utf-8') for key, value in summary.items()}
+    )
+    with pq.ParquetWriter(file_path, schema) as writer:
+        for batch in _iter_batches(rows, batch_rows):
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+
+
+def _write_results_xlsx(file_path, rows, summary):
+    import openpyxl
+    # Chế độ write-only ghi dần ra file tạm nên bộ nhớ không tăng theo số dòng
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("Kết quả")
+    sheet.append(["KẾT QUẢ BÀI THI"])
+    for key, value in summary.items():
+        sheet.append([key, value])
+    sheet.append([])
+    sheet.append(list(RESULT_HEADERS))
+    for row in rows:
+        sheet.append([row[column] for column in RESULT_COLUMNS])
+    workbook.save(file_path)
+
+
+RESULT_WRITERS = {
+    '.csv': _write_results_csv,
+    '.jsonl': _write_results_jsonl,
+    '.parquet': _write_results_parquet,
+    '.xlsx': _write_results_xlsx,
+}
+
+
+def export_result_rows(file_path, rows, summary, total=None, progress=None, progress_every=1000):
+    """Ghi kết quả ra file theo phần mở rộng (.csv/.jsonl/.parquet/.xlsx). rows là iterator được ghi dần;
+    progress(số dòng đã ghi, total) được gọi sau mỗi progress_every dòng và khi xong"""
+    extension = Path(file_path).suffix.lower()
+    writer = RESULT_WRITERS.get(extension)
+    if writer is None:
+        raise ValueError(f"Không hỗ trợ xuất định dạng '{extension}' (chọn .csv, .jsonl, .parquet hoặc .xlsx)")
+
+    def counted(rows):
+        done = 0
+        for done, row in enumerate(rows, 1):
+            yield row
+            if progress is not None and done % progress_every == 0:
+                progress(done, total)
+        if progress is not None:
+            progress(done, total)
+
+    writer(file_path, counted(rows), summary)
+
+
+class BackgroundTask:
+    """Chạy target(progress) trên luồng nền; tiến độ và kết quả gửi về luồng Tk qua hàng đợi"""
+
+    def __init__(self, target):
+        self.target = target
+        self.events = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def poll(self):
+        """Lấy các sự kiện đang chờ mà không chặn: ('progress', đã xong, tổng) / ('done', kết quả) / ('error', thông báo)"""
+        while True:
+            try:
+                yield self.events.get_nowait()
+            except queue.Empty:
+                return
+
+    def _run(self):
+        try:
+            result = self.target(lambda done, total: self.events.put(('progress', done, total)))
+            self.events.put(('done', result))
+        except Exception as e:
+            self.events.put(('error', str(e)))
+
 
 class SplashScreen:
     """Màn hình khởi động (dùng chung root, không tạo root mới)"""
-    def __init__(self, root: ctk.CTk):
+    def __init__(self, root: "ctk.CTk"):
         self.root = root
         self.top = ctk.CTkToplevel(self.root)
         self.top.title("Khởi động ứng dụng")
@@ -74,13 +1887,513 @@ class SplashScreen:
     def close(self):
         self.top.destroy()
 
+
+class TickScheduler:
+    """Một vòng after() chung cho mọi công việc định kỳ (đồng hồ thi, nhật ký, thanh trạng thái, theo dõi luồng nền).
+    Thời điểm tính bằng time.monotonic() nên không trôi khi máy bận và không nhảy khi đổi giờ hệ thống;
+    công việc có chu kỳ từ 1 giây trở lên được canh theo ranh giới giây để cùng chạy trong một lần thức dậy"""
+
+    EARLY_TOLERANCE = 0.002  # after() có thể gọi sớm vài phần nghìn giây
+
+    def __init__(self, root):
+        self.root = root
+        self.jobs = {}  # tên → [callback, chu kỳ (giây), thời điểm chạy kế tiếp]
+        self.ticks = 0
+        self._after_id = None
+        self._wake_at = None
+
+    def register(self, name, callback, interval=1.0, first_delay=None):
+        """Gọi callback() mỗi interval giây (thay công việc cùng tên nếu có). Nếu callback trả về một số,
+        lần chạy sau cách đó đúng số giây ấy (vd. đồng hồ đếm ngược chạy lại đúng lúc số giây đổi)"""
+        now = time.monotonic()
+        if first_delay is not None:
+            due = now + first_delay
+        elif interval >= 1:
+            due = math.floor(now) + interval
+        else:
+            due = now + interval
+        self.jobs[name] = [callback, interval, due]
+        self._arm(now)
+
+    def unregister(self, name):
+        self.jobs.pop(name, None)
+
+    def __contains__(self, name):
+        return name in self.jobs
+
+    def _arm(self, now):
+        if not self.jobs:
+            return
+        wake_at = min(job[2] for job in self.jobs.values())
+        if self._after_id is not None:
+            if self._wake_at <= wake_at:
+                return
+            self.root.after_cancel(self._after_id)
+        self._wake_at = wake_at
+        self._after_id = self.root.after(max(math.ceil((wake_at - now) * 1000), 1), self._tick)
+
+    def _tick(self):
+        self._after_id = None
+        self.ticks += 1
+        now = time.monotonic()
+        try:
+            for name, job in list(self.jobs.items()):
+                if job[2] > now + self.EARLY_TOLERANCE or self.jobs.get(name) is not job:
+                    continue
+                callback, interval, due = job
+                try:
+                    delay = callback()
+                except Exception as e:
+                    # Một công việc lỗi không được làm dừng các công việc khác (đồng hồ thi, nhật ký...)
+                    print(f"Lỗi công việc định kỳ '{name}': {type(e).__name__}: {e}")
+                    delay = None
+                if self.jobs.get(name) is not job:
+                    continue  # công việc tự hủy hoặc được đăng ký lại trong callback
+                if delay is not None:
+                    job[2] = time.monotonic() + delay
+                else:
+                    # Giữ nguyên pha; nếu bị trễ nhiều chu kỳ thì bỏ qua các lần đã lỡ thay vì chạy dồn
+                    job[2] = due + interval * (math.floor((now - due) / interval) + 1)
+        finally:
+            self._arm(time.monotonic())
+
+
+class RenderState:
+    """Ghi nhớ thuộc tính đã áp dụng cho từng widget, chỉ gọi configure() với các thuộc tính thay đổi
+    (mỗi lần configure CustomTkinter đều vẽ lại widget)"""
+    _MISSING = object()
+
+    def __init__(self):
+        self._applied = {}
+        self.redraws = 0
+
+    def configure(self, widget, **props):
+        applied = self._applied.setdefault(widget, {})
+        changed = {k: v for k, v in props.items() if applied.get(k, self._MISSING) != v}
+        if changed:
+            widget.configure(**changed)
+            applied.update(changed)
+            self.redraws += 1
+
+    def set_visible(self, widget, visible):
+        """grid() / grid_remove() nếu trạng thái hiển thị thay đổi"""
+        applied = self._applied.setdefault(widget, {})
+        if applied.get('__visible__', self._MISSING) != visible:
+            if visible:
+                widget.grid()
+            else:
+                widget.grid_remove()
+            applied['__visible__'] = visible
+            self.redraws += 1
+
+    def forget(self, widget=None):
+        """Quên trạng thái đã lưu (khi widget bị thay đổi ngoài RenderState)"""
+        if widget is None:
+            self._applied.clear()
+        else:
+            self._applied.pop(widget, None)
+
+
+class NavigationStats:
+    """Đo độ trễ mỗi lần hiển thị câu hỏi và số lần vẽ lại widget tương ứng"""
+
+    def __init__(self, max_samples=500):
+        self.samples = deque(maxlen=max_samples)
+
+    def record(self, seconds, redraws):
+        self.samples.append((seconds, redraws))
+
+    def summary(self):
+        if not self.samples:
+            return "Chưa có lần chuyển câu nào"
+        latencies = sorted(s for s, _ in self.samples)
+        redraws = [r for _, r in self.samples]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        return (f"{len(latencies)} lần chuyển câu | trung bình {sum(latencies) / len(latencies) * 1000:.1f} ms"
+                f" | p95 {p95 * 1000:.1f} ms | {sum(redraws) / len(redraws):.1f} lần vẽ lại/lần")
+
+
+class Tracer:
+    """Đo thời gian các hàm chính và độ trễ từ sự kiện Tk tới lúc vẽ xong (bật bằng TRACE_FILE trong .env).
+    Hàm được bọc lúc chạy chỉ khi bật nên khi tắt không tốn gì; khi thoát ghi file Chrome trace
+    (mở bằng chrome://tracing hoặc ui.perfetto.dev) và in bảng phân vị"""
+
+    EVENTS = ('<ButtonRelease-1>', '<KeyPress>', '<MouseWheel>')
+
+    def __init__(self, path, max_events=200_000, max_samples=10_000):
+        self.path = path
+        self.events = deque(maxlen=max_events)
+        self.durations = {}  # {tên: deque thời gian (giây)}
+        self.max_samples = max_samples
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._pending_event = None  # (tên sự kiện, thời điểm) chờ vẽ xong
+
+    def record(self, name, start, end, category="call"):
+        self.events.append({
+            'name': name, 'cat': category, 'ph': 'X', 'pid': self._pid, 'tid': threading.get_ident(),
+            'ts': round((start - self._origin) * 1e6, 1), 'dur': round((end - start) * 1e6, 1),
+        })
+        samples = self.durations.get(name)
+        if samples is None:
+            samples = self.durations[name] = deque(maxlen=self.max_samples)
+        samples.append(end - start)
+
+    def wrap(self, owner, names):
+        """Thay các phương thức names của owner bằng bản có đo thời gian (chỉ trên đối tượng này)"""
+        for name in names:
+            setattr(owner, name, self._timed(name, getattr(owner, name)))
+
+    def _timed(self, name, function):
+        record = self.record
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, start, time.perf_counter())
+
+        timed.__wrapped__ = function
+        return timed
+
+    def watch_events(self, root):
+        """Đo từ lúc Tk nhận sự kiện tới khi các thay đổi giao diện do nó gây ra đã được vẽ"""
+        for sequence in self.EVENTS:
+            root.bind_all(sequence, lambda event: self._on_event(root, event), add='+')
+
+    def _on_event(self, root, event):
+        if self._pending_event is None:
+            self._pending_event = (f"{getattr(event.type, 'name', event.type)} → vẽ", time.perf_counter())
+            root.after_idle(lambda: self._on_rendered(root))
+
+    def _on_rendered(self, root):
+        root.update_idletasks()  # các lệnh vẽ lại do xử lý sự kiện xếp hàng sau lệnh này
+        name, start = self._pending_event
+        self._pending_event = None
+        self.record(name, start, time.perf_counter(), category="tk")
+
+    def summary(self):
+        """{tên: số lần, tổng, p50, p90, p99, lớn nhất} (ms)"""
+        result = {}
+        for name, samples in self.durations.items():
+            ordered = sorted(samples)
+            last = len(ordered) - 1
+            result[name] = {
+                'count': len(ordered),
+                'total_ms': round(sum(ordered) * 1000, 3),
+                **{f"p{p}_ms": round(ordered[min(last, int(len(ordered) * p / 100))] * 1000, 3) for p in (50, 90, 99)},
+                'max_ms': round(ordered[-1] * 1000, 3),
+            }
+        return result
+
+    def format_summary(self, summary=None):
+        summary = self.summary() if summary is None else summary
+        lines = [f"{'':34}{'số lần':>8}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10} (ms)"]
+        for name, row in sorted(summary.items(), key=lambda item: -item[1]['total_ms']):
+            lines.append(f"{name:34}{row['count']:8d}{row['p50_ms']:10.2f}{row['p90_ms']:10.2f}"
+                         f"{row['p99_ms']:10.2f}{row['max_ms']:10.2f}")
+        return "\n".join(lines)
+
+    def write(self):
+        """Ghi file Chrome trace (kèm bảng phân vị trong otherData) và trả về bảng phân vị"""
+        summary = self.summary()
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': list(self.events), 'displayTimeUnit': 'ms',
+                       'otherData': {'summary': summary}}, f, ensure_ascii=False)
+        return summary
+
+
+class TextLayoutCache:
+    """Cache nội dung đáp án đã chèn xuống dòng (CTkButton không tự xuống dòng),
+    khóa (chỉ số câu hỏi, chữ cái đáp án, độ rộng theo ký tự)"""
+
+    def __init__(self):
+        self._wrapped = {}
+        self.generation = 0
+
+    def get(self, question_index, option_letter, text, width, _wrapped=None):
+        wrapped = self._wrapped if _wrapped is None else _wrapped
+        key = (question_index, option_letter, width)
+        value = wrapped.get(key)
+        if value is None:
+            value = textwrap.fill(str(text), width=width)
+            wrapped[key] = value
+        return value
+
+    def clear(self):
+        """Xóa toàn bộ (khi nạp lại kho câu hỏi hoặc đổi độ rộng); luồng điền trước đang chạy sẽ dừng"""
+        self._wrapped = {}
+        self.generation += 1
+
+    def prefill(self, bank, width, start=0, limit=20000):
+        """Điền trước cache trên luồng nền cho tối đa limit câu hỏi bắt đầu từ start"""
+        generation, wrapped = self.generation, self._wrapped
+
+        def run():
+            total = len(bank)
+            for k in range(min(limit, total)):
+                if self.generation != generation:
+                    return
+                index = (start + k) % total
+                for letter, text in bank.options(index):
+                    # Ghi vào dict của thế hệ hiện tại: nếu cache vừa bị xóa, kết quả cũ không lọt vào dict mới
+                    self.get(index, letter, text, width, wrapped)
+
+        threading.Thread(target=run, daemon=True).start()
+
+
+# Mọi thứ cần để vẽ một câu: chữ đã xuống dòng, màu nút, trạng thái nút chuyển câu và phần phản hồi.
+# key gồm các đầu vào (phiên, độ rộng, đáp án đã chọn, kết quả kiểm tra); khác key là mô hình đã cũ
+RenderModel = namedtuple('RenderModel', ['key', 'progress', 'question', 'options', 'button_texts', 'button_colors',
+                                         'answer', 'selected_index', 'prev_state', 'next_state', 'feedback'])
+
+
+class RenderPrefetcher:
+    """Dựng trước RenderModel của các câu lân cận khi Tk rảnh (after_idle, mỗi lần một câu để không chặn sự kiện).
+    Cửa sổ lệch theo hướng đang chuyển câu: ahead câu phía trước, behind câu phía sau; các câu ngoài cửa sổ bị bỏ"""
+
+    def __init__(self, root, build, key, ahead=3, behind=1):
+        self.root = root
+        self._build = build  # build(position, key) -> RenderModel
+        self._key = key      # key(position) -> key hiện tại, None nếu vị trí không còn trong đề
+        self.ahead = ahead
+        self.behind = behind
+        self.models = {}  # vị trí → RenderModel
+        self.hits = 0
+        self.misses = 0
+        self._queue = deque()
+        self._after_id = None
+        self._last = None
+        self._direction = 1
+
+    def take(self, position):
+        """Mô hình của câu position: lấy bản dựng sẵn nếu còn đúng, không thì dựng ngay"""
+        key = self._key(position)
+        model = self.models.get(position)
+        if model is not None and model.key == key:
+            self.hits += 1
+            return model
+        self.misses += 1
+        model = self.models[position] = self._build(position, key)
+        return model
+
+    def schedule(self, position, size):
+        """Xếp hàng dựng trước quanh position (gọi sau mỗi lần hiển thị câu)"""
+        if self._last is not None and position != self._last:
+            self._direction = 1 if position > self._last else -1
+        self._last = position
+        if not self.ahead and not self.behind:
+            return
+        step = self._direction
+        wanted = [position + step * d for d in range(1, self.ahead + 1)]
+        wanted += [position - step * d for d in range(1, self.behind + 1)]
+        wanted = [p for p in wanted if 0 <= p < size]
+        keep = set(wanted)
+        keep.add(position)
+        for p in [p for p in self.models if p not in keep]:
+            del self.models[p]
+        self._queue = deque(wanted)
+        if self._after_id is None and self._queue:
+            self._after_id = self.root.after_idle(self._step)
+
+    def _step(self):
+        self._after_id = None
+        while self._queue:
+            position = self._queue.popleft()
+            key = self._key(position)
+            if key is None:
+                continue
+            model = self.models.get(position)
+            if model is None or model.key != key:
+                self.models[position] = self._build(position, key)
+                break
+        if self._queue:
+            self._after_id = self.root.after_idle(self._step)
+
+    def cancel(self):
+        """Hủy phần dựng trước còn chờ (mô hình đã dựng vẫn giữ, sẽ được kiểm tra key khi dùng)"""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        self._queue.clear()
+
+    def clear(self):
+        """Hủy và bỏ mọi mô hình (khi đổi kho câu hỏi / phiên)"""
+        self.cancel()
+        self.models.clear()
+        self._last = None
+        self._direction = 1
+
+
+class RenderCoalescer:
+    """Gom các yêu cầu vẽ lại liên tiếp (vd. giữ phím mũi tên) thành tối đa một lần vẽ mỗi khung hình.
+    Trạng thái (câu hiện tại, đáp án) đổi ngay khi có sự kiện, chỉ trạng thái cuối cùng được vẽ"""
+
+    def __init__(self, root, render, frame_ms=16, clock=time.monotonic):
+        self.root = root
+        self._render = render
+        self.frame_ms = frame_ms
+        self._clock = clock
+        self.requests = 0
+        self.renders = 0
+        self._after_id = None
+        self._last_render = None  # clock() của lần vẽ gần nhất
+
+    @property
+    def pending(self):
+        return self._after_id is not None
+
+    def request(self):
+        """Hẹn vẽ lại: khi Tk rảnh nếu khung hình trước đã qua, không thì tới đầu khung hình kế tiếp"""
+        self.requests += 1
+        if self._after_id is not None:
+            return
+        wait = 0 if self._last_render is None else self.frame_ms / 1000 - (self._clock() - self._last_render)
+        if wait > 0:
+            self._after_id = self.root.after(math.ceil(round(wait * 1000, 6)), self._run)
+        else:
+            self._after_id = self.root.after_idle(self._run)
+
+    def flush(self):
+        """Vẽ ngay nếu đang có lần vẽ chờ (trước thao tác cần màn hình khớp trạng thái, vd. kiểm tra đáp án)"""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._run()
+
+    def cancel(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _run(self):
+        self._after_id = None
+        self._last_render = self._clock()
+        self.renders += 1
+        self._render()
+
+
+class VirtualListView:
+    """Danh sách ảo với hàng cao cố định: chỉ tạo đủ hàng cho vùng đang nhìn thấy và tái sử dụng khi cuộn.
+    create_row(row) tạo các widget con trong khung hàng, update_row(row, index) đổ dữ liệu của dòng index vào hàng"""
+
+    def __init__(self, master, count, row_height, create_row, update_row, gap=5):
+        self.count = count
+        self.row_height = row_height
+        self.gap = gap
+        self.create_row = create_row
+        self.update_row = update_row
+        self.offset = 0
+        self.rows = []
+        self.bound_indexes = []
+
+        self.frame = ctk.CTkFrame(master)
+        self.viewport = ctk.CTkFrame(self.frame, fg_color="transparent")
+        self.viewport.pack(side="left", fill="both", expand=True)
+        self.scrollbar = ctk.CTkScrollbar(self.frame, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.viewport.bind("<Configure>", self._on_resize)
+        self._bind_wheel(self.viewport)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+
+    def set_count(self, count):
+        """Thay dữ liệu của danh sách: về đầu danh sách và đổ lại mọi hàng"""
+        self.count = count
+        self.offset = 0
+        self.bound_indexes = [None] * len(self.rows)
+        self._on_resize()
+
+    @property
+    def total_height(self):
+        return self.count * self.row_height
+
+    def scroll_to(self, offset):
+        max_offset = max(self.total_height - self._viewport_height(), 0)
+        self.offset = min(max(offset, 0), max_offset)
+        self._render()
+
+    def scroll_to_index(self, index):
+        self.scroll_to(index * self.row_height)
+
+    def _on_scrollbar(self, *args):
+        if args[0] == 'moveto':
+            self.scroll_to(float(args[1]) * self.total_height)
+        elif args[0] == 'scroll':
+            step = self.row_height if args[2] == 'units' else self._viewport_height()
+            self.scroll_to(self.offset + int(args[1]) * step)
+
+    def _on_wheel(self, event):
+        if event.num == 4:
+            direction = -1
+        elif event.num == 5:
+            direction = 1
+        else:
+            direction = -1 if event.delta > 0 else 1
+        self.scroll_to(self.offset + direction * self.row_height)
+        return "break"
+
+    def _bind_wheel(self, widget):
+        # Gắn trực tiếp vào widget Tk bên trong (bỏ qua bind của CustomTkinter) để cuộn ở mọi vị trí
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            tk.Misc.bind(widget, sequence, self._on_wheel, add="+")
+        for child in widget.winfo_children():
+            self._bind_wheel(child)
+
+    def _viewport_height(self):
+        # Tọa độ place() của CustomTkinter tính theo đơn vị chưa nhân hệ số scaling
+        return self.viewport.winfo_height() / ctk.ScalingTracker.get_widget_scaling(self.viewport)
+
+    def _on_resize(self, event=None):
+        needed = int(self._viewport_height() // self.row_height) + 2
+        while len(self.rows) < min(needed, self.count):
+            row = ctk.CTkFrame(self.viewport, height=self.row_height - self.gap)
+            row.pack_propagate(False)
+            row.grid_propagate(False)
+            self.create_row(row)
+            self._bind_wheel(row)
+            self.rows.append(row)
+            self.bound_indexes.append(None)
+        self.scroll_to(self.offset)
+
+    def _render(self):
+        first = int(self.offset // self.row_height)
+        for slot, row in enumerate(self.rows):
+            index = first + slot
+            if index >= self.count:
+                row.place_forget()
+                self.bound_indexes[slot] = None
+                continue
+            if self.bound_indexes[slot] != index:
+                self.update_row(row, index)
+                self.bound_indexes[slot] = index
+            row.place(x=0, y=index * self.row_height - self.offset, relwidth=1.0)
+
+        total = self.total_height
+        if total <= 0:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.offset / total, min((self.offset + self._viewport_height()) / total, 1.0))
+
+
 class QuizApplication:
+    # Các hàm được đo khi bật TRACE_FILE
+    # (phần đọc file trên luồng nền do BackgroundQuestionLoader tự ghi vào tracer)
+    TRACED_METHODS = ('open_question_files', '_finish_background_load', 'setup_ui', 'update_question_display',
+                      'show_feedback', 'show_results_window', 'export_results')
+
     def __init__(self):
         # Chỉ tạo 1 root duy nhất
         self.root = ctk.CTk()
         self.root.title("Ứng dụng Trắc nghiệm v1.1 | Trần Đình Quân")
         self.root.geometry("1400x800")
         self.root.withdraw()  # Ẩn UI chính đến khi nạp xong
+        self.scheduler = TickScheduler(self.root)
 
         # Cấu hình
         self.config = {
@@ -88,161 +2401,463 @@ class QuizApplication:
             'randomize_questions': True,
             'randomize_options': True,
             'theme': 'dark',
-            'font_family': 'Inter'
+            'font_family': 'Inter',
+            'cache_enabled': True,
+            'cache_max_entries': 20,
+            'rebuild_cache': False,
+            'fast_start': True,
+            'nav_stats': False,
+            'exam_seed': None,
+            'exam_questions': 0,  # số câu mỗi đề thi, 0 = toàn bộ kho
+            'exam_quotas': {},    # {tên file nguồn: số câu}
+            'collapse_near_duplicates': False,
+            'near_duplicate_threshold': 0.8,
+            'journal_enabled': True,
+            'journal_file': '.quiz_journal.jsonl',
+            'journal_sync_ms': 1000,
+            'trace_file': '',  # rỗng = tắt đo thời gian; vd. trace.json
+            'topic_cache_size': 4,  # số sheet (chủ đề) giữ trong bộ nhớ
+            'topic_prefetch': True,
+            'render_prefetch': 3,  # số câu dựng sẵn theo hướng đang chuyển câu, 0 = tắt
+            'startup_log': 'startup_times.jsonl'
         }
 
         # Load cấu hình từ .env nếu có
         self.load_config()
+        self.question_cache = QuestionCache(max_entries=self.config['cache_max_entries'])
+        self.journal = SessionJournal(self.config['journal_file']) if self.config['journal_enabled'] else None
+        self.tracer = None
+        if self.config['trace_file']:
+            self.tracer = Tracer(self.config['trace_file'])
+            self.tracer.wrap(self, self.TRACED_METHODS)
+            self.tracer.watch_events(self.root)
 
         # Dữ liệu
-        self.questions = []
+        self.questions = QuestionBank()
+        self.session = ExamSession(self.questions)
+        self._displayed_options = []
+        self.validation_errors = {}  # {file: [ValidationIssue]} của lần nạp gần nhất
+        self.loaded_files = []
+        self.duplicates_removed = 0
+        self.near_duplicates = []  # các nhóm câu gần trùng của kho hiện tại (chỉ tính khi bật gộp)
+        self.loader = None
+        self.topics = None          # TopicLibrary khi mở file Excel nhiều sheet (mỗi sheet một chủ đề)
+        self.current_topic = None
+        self._loading_topic = None  # chủ đề mà loader hiện tại đang đọc
+        self._loader_ready_callback = None
+        self._loader_progress_callback = None
+        self.search_index = None  # SearchIndex của kho hiện tại, lập trên luồng nền sau mỗi lần nạp
+        self._search_generation = 0
+        self.search_results = []  # chỉ số câu trong kho khớp với ô tìm kiếm
+        self._startup_done = False
+        self._journal_checked = False  # đã kiểm tra phiên dang dở trong nhật ký chưa
+        self._journal_ready = False    # chỉ ghi nhật ký sau khi đã kiểm tra (tránh ghi đè phiên dang dở)
+        self._journal_index = None     # vị trí câu ghi trong sự kiện chuyển câu gần nhất
+        self._bank_fingerprint = (None, None)
         self.current_mode = "practice"
         self.current_question_index = 0
         self.user_answers = {}
         self.question_feedback = {}
+        self.stats = SessionStats(self.session)  # cập nhật cùng user_answers / question_feedback
         self.exam_start_time = None
-        self.exam_time_limit = None
+        self._exam_started_at = None  # time.monotonic() lúc bắt đầu thi
+        self.exam_time_limit_s = None
         self.timer_running = False
 
         # Biến giao diện
         self.selected_answer = tk.StringVar()
         self.selected_option_index = -1
         self.option_buttons = []
-
-    def _wrap(self, s: str, width: int = 70) -> str:
-        """Tự động xuống dòng cho text trong nút đáp án"""
-        return textwrap.fill(str(s), width=width)
+        self.render = RenderState()
+        self.nav_stats = NavigationStats()
+        self.layout_cache = TextLayoutCache()
+        self.wrap_width = 70  # số ký tự mỗi dòng trong nút đáp án, tính lại theo độ rộng thật của nút
+        self._resize_job = None
+        ahead = max(0, self.config['render_prefetch'])
+        self.prefetcher = RenderPrefetcher(self.root, self._build_render_model, self._render_key,
+                                           ahead=ahead, behind=min(ahead, 1))
+        self.render_coalescer = RenderCoalescer(self.root, self.update_question_display)
 
     def initialize_with_splash(self):
-        """Khởi tạo ứng dụng với màn hình splash (chạy trên main thread bằng after)"""
+        """Khởi tạo ứng dụng với màn hình splash (chạy trên main thread bằng after).
+        Mỗi bước chạy ngay khi bước trước xong; chế độ FAST_START=false giữ nhịp cũ để splash dễ đọc"""
         splash = SplashScreen(self.root)
+        splash_open = True
+        step_delay_ms = 0 if self.config['fast_start'] else 400
+
+        def advance(step):
+            if step_delay_ms:
+                self.root.after(step_delay_ms, step)
+            else:
+                self.root.after_idle(step)  # sau khi Tk vẽ xong trạng thái splash hiện tại
 
         def step1():
             splash.set_progress(0.2, "Đang tải cấu hình...")
-            self.root.after(400, step2)
+            advance(step2)
 
         def step2():
             splash.set_progress(0.4, "Đang tìm file Excel...")
-            excel_found = False
+            self._excel_found = False
+            target_files = []
             try:
-                excel_found = self.auto_load_excel()
+                target_files = self.find_question_files()
             except Exception as e:
                 print("Lỗi tự động tải Excel:", e)
-            self._excel_found = excel_found
-            self.root.after(400, step3)
+            if not target_files:
+                advance(step3)
+                return
+
+            def on_progress(done, total, unit):
+                if splash_open:
+                    splash.set_progress(0.4 + 0.2 * done / max(total, 1), f"Đang đọc câu hỏi: {done}/{total} {unit}")
+                else:
+                    self.file_info_label.configure(text=f"⏳ Đang tải...\n{done}/{total} {unit}", text_color="orange")
+
+            def on_ready(success):
+                # Mở cửa sổ chính ngay khi trang câu hỏi đầu tiên sẵn sàng, phần còn lại nạp tiếp ở nền
+                self._excel_found = success
+                advance(step3)
+
+            self.open_question_files(target_files, on_ready, on_progress, first_page_size=50)
 
         def step3():
             splash.set_progress(0.6, "Đang thiết lập giao diện...")
             self.setup_ui()  # Thiết lập UI chỉ trên main thread
-            self.root.after(400, step4)
+            advance(step4)
 
         def step4():
             splash.set_progress(0.8, "Đang khởi tạo dữ liệu...")
-            if not getattr(self, "_excel_found", False):
+            if getattr(self, "_excel_found", False):
+                self.update_question_display()
+                self.update_status()
+                self.update_file_info()
+            else:
                 self.load_default_data()
-            self.root.after(400, step5)
+            advance(step5)
 
         def step5():
             splash.set_progress(1.0, "Hoàn tất!")
-            self.root.after(300, finish)
+            advance(finish)
 
         def finish():
+            nonlocal splash_open
+            splash_open = False
             splash.close()
             self.root.deiconify()  # Hiển thị cửa sổ chính
-
-        self.root.after(50, step1)
+            self._startup_done = True
+            self.root.after_idle(self.record_startup_time)
+            self.root.after_idle(self.resume_unfinished_session)
+
+        self.root.after_idle(step1)
+
+    def record_startup_time(self):
+        """Ghi thời gian từ lúc chạy chương trình đến khi câu hỏi đầu tiên hiển thị và dùng được"""
+        elapsed = time.perf_counter() - _PROCESS_START
+        print(f"Thời gian khởi động: {elapsed:.3f} s")
+        log_path = self.config['startup_log']
+        if not log_path:
+            return
+        try:
+            with open(log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({
+                    'timestamp': datetime.now().isoformat(timespec='seconds'),
+                    'startup_s': round(elapsed, 4),
+                    'fast_start': self.config['fast_start'],
+                    'files': self.loaded_files,
+                    'questions': len(self.questions),
+                }, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"Lỗi ghi nhật ký khởi động: {e}")
 
     # ================== CONFIG / DATA ==================
     def load_config(self):
         """Load cấu hình từ file .env"""
-        env_path = Path('.env')
-        if env_path.exists():
-            try:
-                with open(env_path, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        if '=' in line and not line.strip().startswith('#'):
-                            key, value = line.strip().split('=', 1)
-                            if key == 'EXAM_TIME_MIN':
-                                self.config['exam_time_min'] = int(value)
-                            elif key in ['RANDOMIZE_QUESTIONS', 'RANDOMIZE_OPTIONS']:
-                                self.config[key.lower()] = value.lower() == 'true'
-                            elif key in ['THEME', 'FONT_FAMILY']:
-                                self.config[key.lower()] = value
-            except Exception as e:
-                print(f"Lỗi đọc file .env: {e}")
+        read_env_config(self.config)
+
+    def find_question_files(self):
+        """Tìm các file câu hỏi trong thư mục hiện tại (file có từ khóa trong tên xếp trước).
+        Một kho có nhiều định dạng (cùng tên, khác phần mở rộng) chỉ lấy định dạng đọc nhanh nhất, nên exam pack
+        (.qpack) thay cho file Excel/CSV cùng tên mà nó được biên dịch từ đó; file CSV/JSONL/Parquet chỉ được nhận
+        khi có đủ cột bắt buộc (bỏ qua file kết quả đã xuất, nhật ký...)"""
+        fastest = {}  # tên file không có phần mở rộng → file
+        for extension in QUESTION_FILE_EXTENSIONS:
+            for file in glob.glob(f"*{extension}"):
+                stem = os.path.splitext(file)[0]
+                if stem in fastest:
+                    continue
+                if (extension not in EXCEL_EXTENSIONS + (ExamPack.EXTENSION,)
+                        and not set(REQUIRED_COLUMNS) <= set(read_question_columns(file))):
+                    continue
+                fastest[stem] = file
+        question_files = sorted(fastest.values())
+
+        priority_keywords = ['cau_hoi', 'tracnghiem', 'quiz', 'question']
+        prioritized_files, other_files = [], []
+        for file in question_files:
+            if any(k in file.lower() for k in priority_keywords):
+                prioritized_files.append(file)
+            else:
+                other_files.append(file)
+        return prioritized_files + other_files
 
     def auto_load_excel(self):
-        """Tự động tìm và tải file Excel trong thư mục hiện tại"""
+        """Tự động tìm và tải (gộp) mọi file câu hỏi (Excel, CSV, JSONL, Parquet, exam pack) trong thư mục hiện tại"""
         try:
-            excel_patterns = ['*.xlsx', '*.xls']
-            excel_files = []
-            for pattern in excel_patterns:
-                excel_files.extend(glob.glob(pattern))
-            if not excel_files:
+            target_files = self.find_question_files()
+            if not target_files:
                 return False
-
-            priority_keywords = ['cau_hoi', 'tracnghiem', 'quiz', 'question']
-            prioritized_files, other_files = [], []
-            for file in excel_files:
-                if any(k in file.lower() for k in priority_keywords):
-                    prioritized_files.append(file)
-                else:
-                    other_files.append(file)
-            target_file = prioritized_files[0] if prioritized_files else other_files[0]
-            return self.load_excel_data(target_file)
+            return self.load_excel_data(target_files)
         except Exception as e:
             print(f"Lỗi tự động tải Excel: {e}")
             return False
 
-    def load_excel_data(self, file_path):
-        """Tải dữ liệu từ file Excel"""
+    def open_question_files(self, file_paths, on_ready, on_progress=None, first_page_size=None):
+        """Mở các file câu hỏi. Nếu có file Excel nhiều sheet: mỗi sheet là một chủ đề, chỉ đọc mục lục sheet
+        và câu hỏi của chủ đề đầu tiên; ngược lại nạp và gộp mọi file như trước"""
+        if self.topics is not None:
+            self.topics.cancel_prefetch()
         try:
-            df = pd.read_excel(file_path)
+            self.topics = TopicLibrary.discover(
+                file_paths,
+                max_loaded=self.config['topic_cache_size'],
+                cache=self.question_cache if self.config['cache_enabled'] else None,
+                force_rebuild=self.config['rebuild_cache'],
+                near_duplicate_threshold=self._near_duplicate_threshold(),
+            )
+        except Exception as e:
+            print(f"Lỗi đọc danh sách sheet: {e}")  # file hỏng: để loader báo lỗi như bình thường
+            self.topics = None
+        self.current_topic = None
+        if self.topics is None:
+            self._show_topics()
+            self.start_background_load(file_paths, on_ready, on_progress, first_page_size)
+        else:
+            self.select_topic(self.topics.topics[0], on_ready, on_progress, first_page_size)
+
+    def select_topic(self, topic, on_ready=None, on_progress=None, first_page_size=None):
+        """Chuyển sang chủ đề topic: dùng ngay nếu sheet đã đọc, ngược lại đọc trên luồng nền.
+        on_ready mặc định cập nhật màn hình câu hỏi"""
+        on_ready = on_ready or self._on_topic_ready
+        self.current_topic = topic
+        self._show_topics()
+        self.scheduler.unregister('topic_wait')
+        bank, near_duplicates = self.topics.get(topic)
+        if bank is None and self.topics.loading(topic):
+            # Luồng đọc trước đang đọc đúng sheet này: chờ nó xong thay vì đọc lần thứ hai
+            self._cancel_loader()
+            self.scheduler.register('topic_wait', lambda: self._wait_for_topic(topic, on_ready, on_progress,
+                                                                               first_page_size), interval=0.05)
+            return
+        if bank is None:
+            self.start_background_load(topic.file_paths, on_ready, on_progress, first_page_size, sheet=topic.sheet)
+            self._loading_topic = topic
+            return
 
-            required_columns = ['cau_hoi', 'tra_loi_a', 'tra_loi_b', 'tra_loi_c', 'dap_an_dung']
-            missing_columns = [c for c in required_columns if c not in df.columns]
-            if missing_columns:
-                print(f"File Excel thiếu các cột: {', '.join(missing_columns)}")
-                return False
+        self._cancel_loader()
+        self.validation_errors = {}
+        self.near_duplicates = near_duplicates
+        self._set_loaded_questions(bank, topic.file_paths)
+        on_ready(True)
+        if self.config['topic_prefetch']:
+            self.topics.prefetch(topic)
+
+    def _wait_for_topic(self, topic, on_ready, on_progress, first_page_size):
+        if self.current_topic != topic or self.topics is None:
+            self.scheduler.unregister('topic_wait')
+        elif not self.topics.loading(topic):
+            self.select_topic(topic, on_ready, on_progress, first_page_size)  # có trong cache, hoặc đọc lại nếu lỗi
+
+    def _cancel_loader(self):
+        if self.loader is not None:
+            self.loader.cancel()
+            self.loader = None
+            self.scheduler.unregister('loader')
+
+    def _on_topic_ready(self, success):
+        if success:
+            self.update_question_display()
+            self.update_status()
+        else:
+            messagebox.showerror("Lỗi dữ liệu", f"Không đọc được chủ đề này:\n\n"
+                                                f"{format_validation_report(self.validation_errors)}")
+        self.update_file_info()
+
+    def _on_topic_menu(self, label):
+        topic = next((t for t in self.topics.topics if self.topics.label(t) == label), None)
+        if topic is not None and topic != self.current_topic:
+            self.select_topic(topic, first_page_size=50)
+
+    def _show_topics(self):
+        """Danh sách chủ đề trong sidebar (ẩn khi không mở theo chủ đề)"""
+        if not hasattr(self, 'topic_menu'):
+            return
+        if self.topics is None:
+            self.topic_menu.grid_remove()
+            return
+        self.topic_menu.configure(values=[self.topics.label(topic) for topic in self.topics.topics])
+        if self.current_topic is not None:
+            self.topic_menu.set(self.topics.label(self.current_topic))
+        self.topic_menu.grid()
+
+    def start_background_load(self, file_paths, on_ready, on_progress=None, first_page_size=None, sheet=None):
+        """Nạp các file câu hỏi trên luồng nền. on_ready(thành_công) được gọi một lần trên luồng Tk:
+        khi đủ first_page_size câu đầu tiên, hoặc khi đọc xong nếu first_page_size là None"""
+        if self.loader is not None:
+            self.loader.cancel()
+        self._loading_topic = None
+        self.validation_errors = {}
+        self.near_duplicates = []
+        self._loader_ready_callback = on_ready
+        self._loader_progress_callback = on_progress
+        self.loader = BackgroundQuestionLoader(
+            file_paths,
+            cache=self.question_cache if self.config['cache_enabled'] else None,
+            force_rebuild=self.config['rebuild_cache'],
+            first_page_size=first_page_size or 0,
+            near_duplicate_threshold=self._near_duplicate_threshold(),
+            sheet=sheet,
+            tracer=self.tracer,
+        ).start()
+        loader = self.loader
+        self.scheduler.register('loader', lambda: self._poll_background_load(loader), interval=0.05)
+
+    def _poll_background_load(self, loader):
+        if loader is not self.loader:
+            return  # đã bị hủy / thay bằng lần nạp khác
+        for event in loader.poll():
+            kind = event[0]
+            if kind == 'progress':
+                if self._loader_progress_callback:
+                    self._loader_progress_callback(*event[1:])
+            elif kind == 'first_page':
+                if self._loader_ready_callback:
+                    self._set_loaded_questions(event[1], loader.file_paths)
+                    self._notify_loader_ready(True)
+            elif kind == 'near_duplicates':
+                self.near_duplicates = event[1]
+                self.report_near_duplicates()
+            elif kind == 'done':
+                self.loader = None
+                self.scheduler.unregister('loader')
+                self._finish_background_load(loader.file_paths, *event[1:])
+                return
+            elif kind == 'error':
+                self.loader = None
+                self.scheduler.unregister('loader')
+                print(f"Lỗi đọc file Excel: {event[1]}")
+                self._finish_background_load(loader.file_paths, None, {path: [] for path in loader.file_paths}, 0)
+                return
 
-            validation_errors = []
-            for idx, row in df.iterrows():
-                for col in required_columns:
-                    if pd.isna(row[col]) or str(row[col]).strip() == '':
-                        validation_errors.append(f"Dòng {idx+2}, cột '{col}': Không được để trống")
-                if row['dap_an_dung'] not in ['A', 'B', 'C', 'D']:
-                    validation_errors.append(f"Dòng {idx+2}: Đáp án đúng phải là A, B, C, hoặc D")
-            if validation_errors:
-                print("Phát hiện lỗi dữ liệu:", validation_errors[:5])
-                return False
+    def _set_loaded_questions(self, questions, file_paths, duplicates_removed=0):
+        self.questions = questions
+        self.loaded_files = [path for path in file_paths if path not in self.validation_errors]
+        self.duplicates_removed = duplicates_removed
+        self.current_question_index = 0
+        self.user_answers = {}
+        self.question_feedback = {}
+        self._questions_changed()
+
+    def _notify_loader_ready(self, success):
+        callback, self._loader_ready_callback = self._loader_ready_callback, None
+        if callback:
+            callback(success)
+
+    def _finish_background_load(self, file_paths, questions, errors, duplicates_removed):
+        self.validation_errors = errors
+        self.report_validation_errors()
+        if questions is None:
+            if self._loader_ready_callback:
+                self._notify_loader_ready(False)
+            else:
+                # Cửa sổ chính đang hiển thị trang đầu tiên nhưng phần sau của file bị lỗi
+                self.load_default_data()
+                messagebox.showerror("Lỗi", f"Không đọc được câu hỏi, đã chuyển về dữ liệu mẫu.\n\n"
+                                            f"{format_validation_report(errors)}")
+            return
 
-            self.questions = []
-            for _, row in df.iterrows():
-                question_data = {
-                    'cau_hoi': str(row['cau_hoi']).strip(),
-                    'tra_loi_a': str(row['tra_loi_a']).strip(),
-                    'tra_loi_b': str(row['tra_loi_b']).strip(),
-                    'tra_loi_c': str(row['tra_loi_c']).strip(),
-                    'dap_an_dung': str(row['dap_an_dung']).strip(),
-                    'giai_thich': str(row.get('giai_thich', '')).strip()
-                }
-                tra_loi_d = row.get('tra_loi_d', '')
-                if pd.notna(tra_loi_d) and str(tra_loi_d).strip():
-                    question_data['tra_loi_d'] = str(tra_loi_d).strip()
-                else:
-                    question_data['tra_loi_d'] = None
-                self.questions.append(question_data)
+        print(f"Đã tải thành công {len(questions)} câu hỏi từ {len(file_paths) - len(errors)} file"
+              + (f" (bỏ {duplicates_removed} câu trùng)" if duplicates_removed else ""))
+        topic, self._loading_topic = self._loading_topic, None
+        if topic is not None:
+            self.topics.store(topic, questions, self.near_duplicates)
+            if self.config['topic_prefetch']:
+                self.topics.prefetch(topic)
+        if self._loader_ready_callback:
+            self._set_loaded_questions(questions, file_paths, duplicates_removed)
+            self._notify_loader_ready(True)
+        else:
+            # Trang đầu tiên đã hiển thị: giữ nguyên vị trí và câu trả lời hiện tại (kể cả đáp án đang chọn)
+            self._store_selected_answer()
+            self.questions = questions
+            self.loaded_files = [path for path in file_paths if path not in errors]
+            self.duplicates_removed = duplicates_removed
+            self._questions_changed(keep_session=True)
+            self.update_question_display()
+            self.update_status()
+            self.update_file_info()
+        self.resume_unfinished_session()
 
-            self.current_question_index = 0
-            self.user_answers = {}
-            self.question_feedback = {}
+    def update_file_info(self):
+        if not hasattr(self, 'file_info_label'):
+            return
+        if not self.loaded_files:
+            self.file_info_label.configure(text=f"📄 Dữ liệu mẫu\n{len(self.questions)} câu hỏi", text_color="yellow")
+            return
+        if len(self.loaded_files) == 1:
+            files_text = os.path.basename(self.loaded_files[0])
+        else:
+            files_text = f"{len(self.loaded_files)} file: {os.path.basename(self.loaded_files[0])}, ..."
+        if self.current_topic is not None:
+            files_text += f"\nChủ đề: {self.topics.label(self.current_topic)}"
+        text = f"📄 {files_text}\n{len(self.questions)} câu hỏi"
+        if self.duplicates_removed:
+            text += f" (bỏ {self.duplicates_removed} câu trùng)"
+        if self.near_duplicates:
+            text += f"\n{len(self.session)} câu trong đề (gộp câu gần trùng)"
+        self.file_info_label.configure(text=text, text_color="lightgreen")
+
+    def load_excel_data(self, file_path, force_rebuild=False, sheet=None):
+        """Tải dữ liệu từ một file Excel hoặc danh sách file (gộp, bỏ câu trùng); dùng cache nếu file không đổi.
+        sheet: sheet cần đọc khi tải một file (mặc định sheet đầu)"""
+        file_paths = [file_path] if isinstance(file_path, (str, os.PathLike)) else list(file_path)
+        cache = self.question_cache if self.config['cache_enabled'] else None
+        force_rebuild = force_rebuild or self.config['rebuild_cache']
+        try:
+            if len(file_paths) == 1:
+                questions, issues = load_question_bank(file_paths[0], cache, force_rebuild, sheet=sheet)
+                errors = {} if questions is not None else {file_paths[0]: issues}
+                duplicates = 0
+            else:
+                questions, errors, duplicates = load_question_banks(file_paths, cache, force_rebuild)
+            self.validation_errors = errors
+            self.report_validation_errors()
+            if questions is None:
+                return False
 
-            print(f"Đã tải thành công {len(self.questions)} câu hỏi từ {file_path}")
+            threshold = self._near_duplicate_threshold()
+            self.near_duplicates = find_near_duplicates(questions, threshold) if threshold is not None else []
+            self.report_near_duplicates()
+            self._set_loaded_questions(questions, file_paths, duplicates)
+            print(f"Đã tải thành công {len(self.questions)} câu hỏi từ {len(self.loaded_files)} file")
             return True
         except Exception as e:
+            self.validation_errors = {}
             print(f"Lỗi đọc file Excel: {e}")
             return False
 
+    def report_validation_errors(self):
+        for file_path, issues in self.validation_errors.items():
+            report_validation_issues(file_path, issues)
+
+    def _near_duplicate_threshold(self):
+        """Ngưỡng tìm câu gần trùng khi nạp kho, None nếu không bật gộp câu gần trùng"""
+        return self.config['near_duplicate_threshold'] if self.config['collapse_near_duplicates'] else None
+
+    def report_near_duplicates(self):
+        if self.near_duplicates:
+            hidden = sum(len(group) - 1 for group in self.near_duplicates)
+            print(f"Phát hiện {len(self.near_duplicates)} nhóm câu gần trùng, ẩn {hidden} câu khi làm bài")
+
     def load_default_data(self):
         """Tải dữ liệu mẫu nếu không có file Excel"""
         sample_data = [
@@ -265,11 +2880,14 @@ class QuizApplication:
                 'giai_thich': 'Trong Python, dùng hàm print().'
             }
         ]
-        self.questions = sample_data
+        self.questions = QuestionBank.from_records(sample_data)
+        self.loaded_files = []
+        self.duplicates_removed = 0
+        self.near_duplicates = []
+        self._questions_changed()
         self.update_question_display()
         self.update_status()
-        if hasattr(self, 'file_info_label'):
-            self.file_info_label.configure(text="📄 Dữ liệu mẫu\n2 câu hỏi", text_color="yellow")
+        self.update_file_info()
 
     # ================== UI ==================
     def setup_ui(self):
@@ -280,6 +2898,8 @@ class QuizApplication:
         self.setup_sidebar()
         self.setup_main_content()
         self.setup_status_bar()
+        self.scheduler.register('status', self.update_status)
+        self.root.bind("<KeyPress>", self._on_key, add="+")
 
     def setup_sidebar(self):
         """Thiết lập sidebar trái"""
@@ -303,11 +2923,22 @@ class QuizApplication:
         )
         self.exam_btn.grid(row=2, column=0, padx=20, pady=10, sticky="ew")
 
+        load_frame = ctk.CTkFrame(self.sidebar, fg_color="transparent")
+        load_frame.grid(row=3, column=0, padx=20, pady=10, sticky="ew")
+        load_frame.grid_columnconfigure(0, weight=1)
+
         load_btn = ctk.CTkButton(
-            self.sidebar, text="📁 Tải file Excel khác", font=ctk.CTkFont(size=14), height=35,
+            load_frame, text="📁 Tải file Excel khác", font=ctk.CTkFont(size=14), height=35,
             command=self.load_excel_file_manual
         )
-        load_btn.grid(row=3, column=0, padx=20, pady=10, sticky="ew")
+        load_btn.grid(row=0, column=0, sticky="ew")
+
+        # Chủ đề (sheet) của file Excel nhiều sheet; chỉ hiện khi mở theo chủ đề
+        self.topic_menu = ctk.CTkOptionMenu(
+            load_frame, values=[""], font=ctk.CTkFont(size=14), dynamic_resizing=False, command=self._on_topic_menu
+        )
+        self.topic_menu.grid(row=1, column=0, pady=(10, 0), sticky="ew")
+        self._show_topics()
 
         ctk.CTkLabel(
             self.sidebar, text="⚙️ Cài đặt", font=ctk.CTkFont(size=18, weight="bold")
@@ -321,7 +2952,8 @@ class QuizApplication:
             self.random_questions_switch.select()
 
         self.random_options_switch = ctk.CTkSwitch(
-            self.sidebar, text="Ngẫu nhiên đáp án (Đang phát triển)", font=ctk.CTkFont(size=14)
+            self.sidebar, text="Ngẫu nhiên đáp án", font=ctk.CTkFont(size=14),
+            command=self.toggle_option_shuffle
         )
         self.random_options_switch.grid(row=6, column=0, padx=20, pady=5, sticky="w")
         if self.config['randomize_options']:
@@ -335,11 +2967,49 @@ class QuizApplication:
         if self.config['theme'] == 'dark':
             self.theme_switch.select()
 
+        self.setup_search_box()
+
         self.file_info_label = ctk.CTkLabel(
             self.sidebar, text="Đang tải dữ liệu...", font=ctk.CTkFont(size=12), text_color="orange"
         )
         self.file_info_label.grid(row=11, column=0, padx=20, pady=20, sticky="ew")
 
+    def setup_search_box(self):
+        """Ô tìm kiếm câu hỏi (không cần gõ dấu) và danh sách kết quả trong sidebar"""
+        search_frame = ctk.CTkFrame(self.sidebar, fg_color="transparent")
+        search_frame.grid(row=8, column=0, padx=20, pady=(20, 0), sticky="ew")
+        search_frame.grid_columnconfigure(0, weight=1)
+
+        self.search_entry = ctk.CTkEntry(
+            search_frame, placeholder_text="🔍 Tìm câu hỏi (không cần dấu)", font=ctk.CTkFont(size=14)
+        )
+        self.search_entry.grid(row=0, column=0, sticky="ew")
+        self.search_entry.bind("<KeyRelease>", lambda event: self.run_search())
+        self.search_entry.bind("<Return>", lambda event: self.open_search_result(0))
+        self.search_entry.bind("<Escape>", lambda event: self.clear_search())
+
+        self.search_status_label = ctk.CTkLabel(search_frame, text="", font=ctk.CTkFont(size=12), text_color="gray")
+        self.search_status_label.grid(row=1, column=0, sticky="w")
+
+        result_font = ctk.CTkFont(size=12)
+
+        def create_row(row):
+            row.button = ctk.CTkButton(row, text="", font=result_font, anchor="w", fg_color="transparent",
+                                       text_color=("gray10", "gray90"), hover_color=("gray70", "gray30"))
+            row.button.pack(fill="both", expand=True)
+
+        def update_row(row, index):
+            bank_index = self.search_results[index]
+            position = self.session.positions()[bank_index]
+            question_text = self.questions.question(bank_index)
+            if len(question_text) > 40:
+                question_text = question_text[:40] + "..."
+            row.button.configure(text=f"Câu {position + 1}: {question_text}",
+                                 command=lambda: self.open_search_result(index))
+
+        self.search_list = VirtualListView(self.sidebar, 0, 36, create_row, update_row, gap=2)
+        self.search_list.grid(row=10, column=0, padx=20, pady=(5, 0), sticky="nsew")
+
     def setup_main_content(self):
         """Thiết lập vùng nội dung chính"""
         self.main_frame = ctk.CTkFrame(self.root)
@@ -388,12 +3058,17 @@ class QuizApplication:
         self.options_frame.grid(row=1, column=0, sticky="ew", padx=20, pady=10)
         self.options_frame.grid_columnconfigure(0, weight=1)
 
+        self.option_font = ctk.CTkFont(size=14)
+        sample = "Phương án trả lời đúng nhất của câu hỏi"
+        self._option_char_px = self.option_font.measure(sample) / len(sample)
+        self.options_frame.bind("<Configure>", self._on_options_resize)
+
         self.option_buttons = []
         for i in range(4):
             option_btn = ctk.CTkButton(
                 self.options_frame,
                 text=f"{chr(65+i)}. Đáp án {chr(65+i)}",
-                font=ctk.CTkFont(size=14),
+                font=self.option_font,
                 height=40,
                 anchor="w",
                 fg_color="gray25",
@@ -461,106 +3136,459 @@ class QuizApplication:
         self.timer_label.grid(row=0, column=2, padx=20, pady=10)
 
     # ================== LOGIC ==================
+    # Phím chọn đáp án: A–D (cả chữ thường) và 1–4 (cả bàn phím số)
+    OPTION_KEYS = {key: letter for i, letter in enumerate(VALID_ANSWERS)
+                   for key in (letter, letter.lower(), str(i + 1), f"KP_{i + 1}")}
+
+    def _on_key(self, event):
+        """Phím tắt: ←/↑ câu trước, →/↓ câu sau, A–D hoặc 1–4 chọn đáp án, Enter kiểm tra (luyện tập) / nộp bài (thi).
+        Trạng thái đổi ngay, phần vẽ được gom lại (RenderCoalescer) nên giữ phím không làm dồn hàng chục lần vẽ"""
+        widget_class = getattr(event.widget, 'winfo_class', lambda: "")()
+        if not self.questions or widget_class in ('Entry', 'Text'):
+            return  # đang gõ trong ô tìm kiếm
+        keysym = event.keysym
+        if keysym in ('Left', 'Up'):
+            self._move_by_key(-1)
+        elif keysym in ('Right', 'Down'):
+            self._move_by_key(1)
+        elif keysym in ('Return', 'KP_Enter'):
+            if self.current_mode == "exam":
+                self.submit_exam()
+            else:
+                self.check_answer()
+        elif keysym in self.OPTION_KEYS:
+            self._select_by_key(self.OPTION_KEYS[keysym])
+
+    def _move_by_key(self, step):
+        index = self.current_question_index + step
+        if 0 <= index < len(self.session):
+            self._store_selected_answer()
+            self.current_question_index = index
+            self.selected_answer.set(self.user_answers.get(index, ""))
+            self.render_coalescer.request()
+
+    def _select_by_key(self, shown_letter):
+        """Chọn đáp án theo chữ hiển thị; lưu ngay vào user_answers để lần vẽ (gom lại) tô đúng màu"""
+        index = self.current_question_index
+        original_letter = next(
+            (original for shown, original, _ in self.session.options(index) if shown == shown_letter), None
+        )
+        if original_letter is None:
+            return  # câu này không có đáp án đó (vd. chỉ có A–C)
+        self.selected_answer.set(original_letter)
+        self._journal('a', p=index, v=original_letter)
+        self._store_selected_answer()
+        self.render_coalescer.request()
+
     def select_option(self, option_letter):
-        """Xử lý khi người dùng chọn đáp án"""
-        self.selected_answer.set(option_letter)
+        """Xử lý khi người dùng chọn đáp án (option_letter là chữ cái hiển thị trên nút)"""
+        self.render_coalescer.flush()  # nút đang thấy phải là của câu hiện tại
+        original_letter = self.session.original_letter(self.current_question_index, option_letter)
+        self.selected_answer.set(original_letter)
+        self._journal('a', p=self.current_question_index, v=original_letter)
         for i, btn in enumerate(self.option_buttons):
-            if chr(65+i) == option_letter:
-                btn.configure(fg_color="blue", hover_color="darkblue")
+            button_letter = self._button_original_letter(i)
+            if button_letter == original_letter:
                 self.selected_option_index = i
-            else:
-                btn.configure(fg_color="gray25", hover_color="gray30")
+            fg_color, hover_color = self._option_colors(button_letter, original_letter)
+            self.render.configure(btn, fg_color=fg_color, hover_color=hover_color)
+
+    def _button_original_letter(self, button_index):
+        """Chữ cái gốc (trong kho) của đáp án đang hiển thị trên nút button_index"""
+        if button_index < len(self._displayed_options):
+            return self._displayed_options[button_index][1]
+        return None
+
+    @staticmethod
+    def _option_colors(option_letter, user_answer, correct_answer=None):
+        """Màu (fg, hover) của nút đáp án theo lựa chọn hiện tại và kết quả kiểm tra (nếu đã kiểm tra)"""
+        if correct_answer is None:
+            return ("blue", "darkblue") if option_letter == user_answer else ("gray25", "gray30")
+        if option_letter == correct_answer:
+            return "green", "darkgreen"
+        if option_letter == user_answer:
+            return "red", "darkred"
+        return "gray40", "gray45"
 
     def load_excel_file_manual(self):
         """Tải file Excel thủ công"""
-        file_path = filedialog.askopenfilename(
-            title="Chọn file Excel",
-            filetypes=[("Excel files", "*.xlsx *.xls")]
+        file_paths = filedialog.askopenfilenames(
+            title="Chọn file câu hỏi (có thể chọn nhiều file để gộp)",
+            filetypes=[("File câu hỏi", " ".join(f"*{extension}" for extension in QUESTION_FILE_EXTENSIONS)),
+                       ("Excel files", "*.xlsx *.xls"), ("CSV / JSONL / Parquet", "*.csv *.jsonl *.parquet"),
+                       ("Exam pack", f"*{ExamPack.EXTENSION}")]
         )
-        if not file_path:
+        if not file_paths:
             return
 
-        if self.load_excel_data(file_path):
-            if self.random_questions_switch.get():
-                random.shuffle(self.questions)
+        def on_progress(done, total, unit):
+            self.file_info_label.configure(text=f"⏳ Đang tải...\n{done}/{total} {unit}", text_color="orange")
+
+        def on_ready(success):
+            if success:
+                self.update_question_display()
+                self.update_status()
+                self.update_file_info()
+                message = f"Đã tải {len(self.questions)} câu hỏi từ {len(self.loaded_files)} file Excel!"
+                if self.duplicates_removed:
+                    message += f"\nĐã bỏ {self.duplicates_removed} câu trùng."
+                if self.validation_errors:
+                    message += f"\n\nCác file bị bỏ qua:\n{format_validation_report(self.validation_errors)}"
+                messagebox.showinfo("Thành công", message)
+            elif any(self.validation_errors.values()):
+                messagebox.showerror("Lỗi dữ liệu", f"File Excel có lỗi:\n\n{format_validation_report(self.validation_errors)}")
+                self.update_file_info()
+            else:
+                messagebox.showerror("Lỗi", "Không thể đọc file Excel. Vui lòng kiểm tra định dạng file.")
+                self.update_file_info()
+
+        self.open_question_files(list(file_paths), on_ready, on_progress)
+
+    def _on_options_resize(self, event=None):
+        # Gom các sự kiện <Configure> liên tiếp khi kéo giãn cửa sổ
+        if self._resize_job:
+            self.root.after_cancel(self._resize_job)
+        self._resize_job = self.root.after(150, self._update_wrap_width)
+
+    def _update_wrap_width(self):
+        """Tính số ký tự mỗi dòng theo độ rộng thật của nút đáp án"""
+        self._resize_job = None
+        scaling = ctk.ScalingTracker.get_widget_scaling(self.options_frame)
+        button_px = self.options_frame.winfo_width() / scaling - 2 * 30 - 40  # padx của nút và lề trong
+        width = max(20, int(button_px / self._option_char_px) - 3)  # trừ tiền tố "A. "
+        if width != self.wrap_width:
+            self.wrap_width = width
+            self._refresh_layout_cache()
+            self._store_selected_answer()  # vẽ lại lấy đáp án từ user_answers: không làm mất lựa chọn đang có
             self.update_question_display()
-            self.update_status()
 
-            file_name = os.path.basename(file_path)
-            self.file_info_label.configure(
-                text=f"📄 {file_name}\n{len(self.questions)} câu hỏi",
-                text_color="lightgreen"
-            )
-            messagebox.showinfo("Thành công", f"Đã tải {len(self.questions)} câu hỏi từ file Excel!")
+    def _refresh_layout_cache(self):
+        self.layout_cache.clear()
+        if isinstance(self.questions, ExamPack):
+            return  # chỉ giải mã câu thật sự hiển thị; câu lân cận đã có RenderPrefetcher dựng trước
+        if self.questions and self.current_question_index < len(self.session):
+            start = self.session.bank_index(self.current_question_index)
+            self.layout_cache.prefill(self.questions, self.wrap_width, start=start)
+
+    def _questions_changed(self, keep_session=False):
+        """Gọi mỗi khi kho câu hỏi được thay thế; keep_session=True khi kho chỉ được nạp thêm phía sau.
+        Nếu chưa có câu trả lời nào thì vẫn tạo lại phiên trên cả kho, để cùng seed cho cùng thứ tự câu
+        dù kho nạp một lần (cache) hay theo từng phần"""
+        if keep_session and not (self.user_answers or self.question_feedback or self.selected_answer.get()):
+            keep_session = False
+        if keep_session:
+            self.session.extend(self.questions, exclude=collapsed_indices(self.near_duplicates))
+            self.stats.extend()
         else:
-            messagebox.showerror("Lỗi", "Không thể đọc file Excel. Vui lòng kiểm tra định dạng file.")
+            self.start_session()
+        self.prefetcher.clear()
+        self._refresh_layout_cache()
+        self.start_search_index()
+
+    def _switch_value(self, switch_name, config_key):
+        # Trước khi giao diện được tạo, dùng giá trị trong cấu hình
+        switch = getattr(self, switch_name, None)
+        return bool(switch.get()) if switch is not None else self.config[config_key]
+
+    def start_session(self):
+        """Sinh thứ tự câu hỏi / hoán vị đáp án cho phiên mới (một lần, theo seed).
+        Chế độ thi với EXAM_QUESTIONS > 0: rút ngẫu nhiên số câu đó (theo hạn mức EXAM_QUOTAS nếu có)"""
+        options = dict(
+            seed=self.config['exam_seed'],
+            shuffle_questions=self._switch_value('random_questions_switch', 'randomize_questions'),
+            shuffle_options=self._switch_value('random_options_switch', 'randomize_options'),
+            exclude=collapsed_indices(self.near_duplicates),
+        )
+        if self.current_mode == "exam" and self.config['exam_questions'] > 0:
+            groups = quotas = None
+            if self.config['exam_quotas']:
+                groups = {os.path.basename(source): indices
+                          for source, indices in self.questions.source_groups().items()}
+                quotas = self.config['exam_quotas']
+            self.session = ExamSession.draw(self.questions, self.config['exam_questions'],
+                                            groups=groups, quotas=quotas, **options)
+        else:
+            self.session = ExamSession(self.questions, **options)
+        self.stats = SessionStats.from_answers(self.session, self.user_answers, self.question_feedback)
+        self.run_search()  # vị trí các kết quả tìm kiếm thay đổi theo thứ tự câu của phiên mới
+        self._journal_begin()
+
+    # ================== NHẬT KÝ PHIÊN LÀM BÀI ==================
+    def _journal(self, kind, **fields):
+        if self._journal_ready:
+            self.journal.append(kind, **fields)
+
+    def _journal_begin(self):
+        """Bắt đầu nhật ký cho phiên hiện tại (chỉ với câu hỏi nạp từ file, không ghi cho dữ liệu mẫu)"""
+        if not self._journal_ready:
+            return
+        if not self.loaded_files:
+            self.journal.finish()
+            return
+        try:
+            self.journal.begin(self._journal_snapshot())
+            self._journal_index = self.current_question_index
+        except OSError as e:
+            print(f"Không ghi được nhật ký phiên làm bài: {e}")
+
+    def _current_bank_fingerprint(self):
+        bank, fingerprint = self._bank_fingerprint
+        if bank is not self.questions:
+            fingerprint = self.questions.fingerprint()
+            self._bank_fingerprint = (self.questions, fingerprint)
+        return fingerprint
+
+    def _exam_elapsed_seconds(self):
+        if self.current_mode != "exam" or not self.timer_running or self._exam_started_at is None:
+            return 0
+        return int(time.monotonic() - self._exam_started_at)
+
+    def _journal_snapshot(self):
+        """Trạng thái đầy đủ của phiên hiện tại (dòng đầu của nhật ký)"""
+        answers = {str(position): letter for position, letter in self.user_answers.items() if letter}
+        if self.selected_answer.get():
+            answers[str(self.current_question_index)] = self.selected_answer.get()
+        time_limit = None
+        if self.current_mode == "exam" and self.timer_running:
+            time_limit = self.exam_time_limit_s
+        return {
+            'bank': self._current_bank_fingerprint(),
+            'files': self.loaded_files,
+            'mode': self.current_mode,
+            'session': self.session.state(),
+            'time_limit': time_limit,
+            'elapsed': self._exam_elapsed_seconds(),
+            'index': self.current_question_index,
+            'answers': answers,
+            'checked': sorted(self.question_feedback),
+        }
 
-    def update_question_display(self):
-        """Cập nhật hiển thị câu hỏi"""
-        if not self.questions:
-            self.question_label.configure(text="Không có câu hỏi nào. Vui lòng tải file Excel.")
+    def _journal_tick(self):
+        """Định kỳ: ghi thời gian đã làm (chế độ thi), fsync theo lô và nén nhật ký khi đủ dài"""
+        if self.journal.active:
+            try:
+                if self.current_mode == "exam" and self.timer_running:
+                    self.journal.append('e', s=self._exam_elapsed_seconds())
+                if self.journal.needs_compaction:
+                    self.journal.begin(self._journal_snapshot())
+                else:
+                    self.journal.sync()
+            except OSError as e:
+                print(f"Không ghi được nhật ký phiên làm bài: {e}")
+
+    def resume_unfinished_session(self):
+        """Sau khi nạp xong câu hỏi lúc khởi động: đề nghị làm tiếp phiên dang dở trong nhật ký (nếu có)"""
+        if (self.journal is None or self._journal_checked or not self._startup_done
+                or self.loader is not None or not self.loaded_files):
             return
+        self._journal_checked = True
+        state = self.journal.load()
+        resumable = (state is not None and state.get('bank') == self._current_bank_fingerprint()
+                     and (state['answers'] or state['mode'] == "exam"))
+        if resumable:
+            details = f"Chế độ: {'Thi' if state['mode'] == 'exam' else 'Luyện tập'}, đã trả lời {len(state['answers'])} câu"
+            if state['time_limit']:
+                remaining = max(state['time_limit'] - state['elapsed'], 0)
+                details += f", còn {remaining // 60:02d}:{remaining % 60:02d}"
+            resumable = messagebox.askyesno("Tiếp tục bài làm", f"Có bài làm chưa hoàn thành.\n{details}\n\nTiếp tục làm bài?")
+
+        if resumable:
+            self.restore_session(state)
+        # Nhật ký cũ chỉ bị thay sau khi đã khôi phục xong (hoặc người dùng từ chối)
+        self._journal_ready = True
+        self._journal_begin()
+        self.scheduler.register('journal', self._journal_tick, interval=self.config['journal_sync_ms'] / 1000)
+
+    def restore_session(self, state):
+        """Dựng lại phiên từ nhật ký: thứ tự câu, hoán vị đáp án, câu trả lời, câu đã kiểm tra, thời gian còn lại"""
+        self.switch_mode(state['mode'])
+        self.session = ExamSession.from_state(self.questions, state['session'])
+        self.user_answers = dict(state['answers'])
+        self.question_feedback = {}
+        for position in state['checked']:
+            bank_index = self.session.bank_index(position)
+            self.question_feedback[position] = {
+                'correct': self.user_answers.get(position) == self.questions.answer(bank_index),
+                'explanation': self.questions.explanation(bank_index)
+            }
+        self.stats = SessionStats.from_answers(self.session, self.user_answers, self.question_feedback)
+        self.prefetcher.clear()
+        self.current_question_index = min(state['index'], len(self.session) - 1)
+        if state['mode'] == "exam" and state['time_limit']:
+            self.exam_start_time = datetime.now() - timedelta(seconds=state['elapsed'])
+            self._exam_started_at = time.monotonic() - state['elapsed']
+            self.exam_time_limit_s = state['time_limit']
+            self._schedule_exam_timer()
+            self.mode_label.configure(text=f"📝 Chế độ: Thi | Mã đề: {self.session.seed}")
+        self.run_search()
+        self.update_question_display()
+        self.update_status()
 
-        if self.current_question_index >= len(self.questions):
-            self.current_question_index = len(self.questions) - 1
+    def start_search_index(self, force=False):
+        """Lập chỉ mục tìm kiếm cho kho hiện tại trên luồng nền; lần lập trước (nếu chưa xong) bị bỏ.
+        Với exam pack chỉ lập khi tìm lần đầu (force) vì phải giải mã toàn bộ kho"""
+        self.search_index = None
+        self._search_generation += 1
+        if isinstance(self.questions, ExamPack) and not force:
+            return
+        generation, bank, result = self._search_generation, self.questions, {}
 
-        question = self.questions[self.current_question_index]
-        self.question_progress_label.configure(
-            text=f"Câu {self.current_question_index + 1}/{len(self.questions)}"
-        )
-        self.question_label.configure(text=question['cau_hoi'])
+        def build():
+            result['index'] = SearchIndex.build(bank, cancelled=lambda: generation != self._search_generation)
 
-        options = [
-            ('A', question['tra_loi_a']),
-            ('B', question['tra_loi_b']),
-            ('C', question['tra_loi_c'])
-        ]
-        if question.get('tra_loi_d'):
-            options.append(('D', question['tra_loi_d']))
+        thread = threading.Thread(target=build, daemon=True)
+        thread.start()
+        self.scheduler.register('search_index', lambda: self._poll_search_index(thread, generation, result),
+                                interval=0.1)
 
-        if self.random_options_switch.get():
-            random.shuffle(options)
+    def _poll_search_index(self, thread, generation, result):
+        if generation != self._search_generation or thread.is_alive():
+            return
+        self.scheduler.unregister('search_index')
+        if 'index' not in result:
+            return  # luồng lập chỉ mục gặp lỗi: lần tìm sau sẽ lập lại
+        self.search_index = result['index']
+        self.run_search()
+
+    def run_search(self):
+        """Tìm theo nội dung ô tìm kiếm và hiển thị kết quả (chỉ các câu có trong đề hiện tại)"""
+        if not hasattr(self, 'search_entry'):
+            return
+        query = self.search_entry.get().strip()
+        if not query:
+            self.search_results = []
+            self.search_status_label.configure(text="")
+        elif self.search_index is None:
+            if 'search_index' not in self.scheduler:
+                self.start_search_index(force=True)
+            self.search_results = []
+            self.search_status_label.configure(text="Đang lập chỉ mục tìm kiếm...")
+        else:
+            start = time.perf_counter()
+            allowed = np.frombuffer(self.session.positions(), dtype=np.int32) >= 0
+            self.search_results, total = self.search_index.search(query, allowed=allowed)
+            elapsed = (time.perf_counter() - start) * 1000
+            shown = f", hiện {len(self.search_results)}" if total > len(self.search_results) else ""
+            self.search_status_label.configure(text=f"{total} kết quả{shown} ({elapsed:.1f} ms)")
+        self.search_list.set_count(len(self.search_results))
+
+    def open_search_result(self, index):
+        """Chuyển thẳng tới câu hỏi thứ index trong danh sách kết quả"""
+        if index >= len(self.search_results):
+            return
+        position = self.session.positions()[self.search_results[index]]
+        if position < 0:
+            return
+        self._store_selected_answer()
+        self.current_question_index = position
+        self.update_question_display()
 
-        for i in range(4):
-            if i < len(options):
-                letter, text = options[i]
-                self.option_buttons[i].configure(
-                    text=f"{letter}. {textwrap.fill(str(text), 70)}",
-
-                    state="normal"
-                )
-                self.option_buttons[i].grid()
-            else:
-                self.option_buttons[i].grid_remove()
+    def clear_search(self):
+        self.search_entry.delete(0, "end")
+        self.run_search()
 
-        current_answer = self.user_answers.get(self.current_question_index, "")
-        self.selected_answer.set(current_answer)
+    def toggle_option_shuffle(self):
+        self._store_selected_answer()  # đáp án lưu theo chữ gốc nên vẫn đúng sau khi đổi hoán vị
+        self.session.set_option_shuffle(bool(self.random_options_switch.get()))
+        self.update_question_display()
 
-        for i, btn in enumerate(self.option_buttons):
-            if i < len(options) and chr(65+i) == current_answer:
-                btn.configure(fg_color="blue", hover_color="darkblue")
-                self.selected_option_index = i
-            else:
-                btn.configure(fg_color="gray25", hover_color="gray30")
+    def update_question_display(self):
+        """Cập nhật hiển thị câu hỏi (chỉ gửi tới widget những thuộc tính thay đổi)"""
+        start = time.perf_counter()
+        redraws_before = self.render.redraws
+        if not self.questions:
+            self.render.configure(self.question_label, text="Không có câu hỏi nào. Vui lòng tải file Excel.")
+            return
 
-        self.prev_btn.configure(state="normal" if self.current_question_index > 0 else "disabled")
-        self.next_btn.configure(state="normal" if self.current_question_index < len(self.questions) - 1 else "disabled")
+        if self.current_question_index >= len(self.session):
+            self.current_question_index = len(self.session) - 1
 
-        if self.current_mode == "practice":
-            if self.current_question_index in self.question_feedback:
-                fb = self.question_feedback[self.current_question_index]
-                self.show_feedback(fb['correct'], fb['explanation'])
-            else:
-                self.hide_feedback()
-        else:
-            self.hide_feedback()
+        index = self.current_question_index
+        if index != self._journal_index:
+            self._journal('n', p=index)
+            self._journal_index = index
+        model = self.prefetcher.take(index)
+        self.render.configure(self.question_progress_label, text=model.progress)
+        self.render.configure(self.question_label, text=model.question)
 
-        if hasattr(self, 'file_info_label') and self.questions:
-            if len(self.questions) > 2:
-                self.file_info_label.configure(
-                    text=f"📄 File đã tải\n{len(self.questions)} câu hỏi",
-                    text_color="lightgreen"
-                )
+        self._displayed_options = model.options
+        for i, btn in enumerate(self.option_buttons):
+            fg_color, hover_color = model.button_colors[i]
+            if i < len(model.button_texts):
+                self.render.configure(btn, text=model.button_texts[i], state="normal",
+                                      fg_color=fg_color, hover_color=hover_color)
+            else:
+                self.render.configure(btn, fg_color=fg_color, hover_color=hover_color)
+            self.render.set_visible(btn, i < len(model.button_texts))
+
+        self.selected_answer.set(model.answer)
+        self.selected_option_index = model.selected_index
+
+        self.render.configure(self.prev_btn, state=model.prev_state)
+        self.render.configure(self.next_btn, state=model.next_state)
+
+        self.render.set_visible(self.feedback_frame, model.feedback is not None)
+        if model.feedback is not None:
+            feedback_text, feedback_color, explanation_text = model.feedback
+            self.render.configure(self.feedback_label, text=feedback_text, text_color=feedback_color)
+            self.render.configure(self.explanation_label, text=explanation_text)
+        self.prefetcher.schedule(index, len(self.session))
+
+        elapsed = time.perf_counter() - start
+        redraws = self.render.redraws - redraws_before
+        self.nav_stats.record(elapsed, redraws)
+        if self.config['nav_stats']:
+            print(f"Hiển thị câu {index + 1}: {elapsed * 1000:.1f} ms, {redraws} lần vẽ lại")
+
+    def _render_key(self, position):
+        """Các đầu vào quyết định cách vẽ câu position (None nếu vị trí không còn trong đề)"""
+        if position >= len(self.session):
+            return None
+        feedback = None
+        if self.current_mode == "practice" and position in self.question_feedback:
+            fb = self.question_feedback[position]
+            feedback = (fb['correct'], fb['explanation'])
+        return (self.session, len(self.session), self.session.shuffle_options, self.wrap_width,
+                self.user_answers.get(position, ""), feedback)
+
+    def _build_render_model(self, position, key):
+        """Tính sẵn mọi thứ update_question_display cần cho câu position (không chạm tới widget)"""
+        feedback = key[-1]
+        answer = key[-2]
+        bank_index = self.session.bank_index(position)
+        options = self.session.options(position)
+        button_texts = tuple(
+            f"{shown_letter}. {self.layout_cache.get(bank_index, original_letter, text, self.wrap_width)}"
+            for shown_letter, original_letter, text in options
+        )
+        correct_answer = self.questions.answer(bank_index) if feedback is not None else None
+        button_colors = tuple(
+            self._option_colors(options[i][1] if i < len(options) else None, answer, correct_answer)
+            for i in range(len(self.option_buttons))
+        )
+        feedback_view = None
+        if feedback is not None:
+            is_correct, explanation = feedback
+            if is_correct:
+                feedback_view = ("✅ Chính xác! Bạn đã chọn đúng.", "lightgreen")
+            else:
+                shown_correct = next((shown for shown, original, _ in options if original == correct_answer),
+                                     correct_answer)
+                feedback_view = (f"❌ Sai rồi! Đáp án đúng là: {shown_correct}", "lightcoral")
+            feedback_view += (f"💡 Giải thích: {explanation}" if explanation else "",)
+        return RenderModel(
+            key=key,
+            progress=f"Câu {position + 1}/{len(self.session)}",
+            question=self.questions.question(bank_index),
+            options=options,
+            button_texts=button_texts,
+            button_colors=button_colors,
+            answer=answer,
+            selected_index=next((i for i, option in enumerate(options) if option[1] == answer), -1),
+            prev_state="normal" if position > 0 else "disabled",
+            next_state="normal" if position < len(self.session) - 1 else "disabled",
+            feedback=feedback_view,
+        )
 
     def switch_mode(self, mode):
         """Chuyển đổi chế độ luyện tập/thi"""
@@ -571,6 +3599,7 @@ class QuizApplication:
         self.user_answers = {}
         self.question_feedback = {}
         self.current_question_index = 0
+        self.start_session()
 
         if mode == "practice":
             self.mode_label.configure(text="📚 Chế độ: Luyện tập")
@@ -580,7 +3609,7 @@ class QuizApplication:
             self.exam_btn.configure(fg_color=("blue", "blue"))
             self.stop_timer()
         elif mode == "exam":
-            self.mode_label.configure(text="📝 Chế độ: Thi")
+            self.mode_label.configure(text=f"📝 Chế độ: Thi | Mã đề: {self.session.seed}")
             self.check_btn.grid_remove()
             self.submit_btn.grid()
             self.exam_btn.configure(fg_color=("gray75", "gray25"))
@@ -592,119 +3621,115 @@ class QuizApplication:
 
     def start_exam_timer(self):
         self.exam_start_time = datetime.now()
-        self.exam_time_limit = self.exam_start_time + timedelta(minutes=self.config['exam_time_min'])
+        self._exam_started_at = time.monotonic()
+        self.exam_time_limit_s = self.config['exam_time_min'] * 60
         self.timer_running = True
-        self.update_timer()
+        self._schedule_exam_timer()
+
+    def _schedule_exam_timer(self):
+        delay = self.update_timer()
+        if self.timer_running:
+            self.scheduler.register('exam_timer', self.update_timer, first_delay=delay)
 
     def update_timer(self):
+        """Cập nhật đồng hồ thi (chỉ chạm tới nhãn khi chữ thay đổi).
+        Trả về số giây tới lúc số giây hiển thị đổi để bộ lập lịch gọi lại đúng lúc đó"""
         if not self.timer_running or self.current_mode != "exam":
-            self.timer_label.configure(text="")
-            return
-
-        now = datetime.now()
-        remaining = self.exam_time_limit - now
-        if remaining.total_seconds() <= 0:
-            self.timer_label.configure(text="⏰ Hết giờ!", text_color="red")
+            self.scheduler.unregister('exam_timer')
+            self.render.configure(self.timer_label, text="")
+            return None
+
+        remaining = self.exam_time_limit_s - (time.monotonic() - self._exam_started_at)
+        if remaining <= 0:
+            self.scheduler.unregister('exam_timer')
+            self.render.configure(self.timer_label, text="⏰ Hết giờ!", text_color="red")
             self.timer_running = False
             messagebox.showwarning("Hết giờ", "Thời gian làm bài đã hết! Tự động nộp bài.")
             self.submit_exam()
-            return
+            return None
 
-        minutes = int(remaining.total_seconds() // 60)
-        seconds = int(remaining.total_seconds() % 60)
+        minutes = int(remaining // 60)
+        seconds = int(remaining % 60)
         color = "red" if minutes < 5 else "orange"
-        self.timer_label.configure(text=f"⏰ Thời gian: {minutes:02d}:{seconds:02d}", text_color=color)
-        self.root.after(1000, self.update_timer)
+        self.render.configure(self.timer_label, text=f"⏰ Thời gian: {minutes:02d}:{seconds:02d}", text_color=color)
+        return remaining - math.floor(remaining) + self.scheduler.EARLY_TOLERANCE
 
     def stop_timer(self):
         self.timer_running = False
-        self.timer_label.configure(text="")
+        self.scheduler.unregister('exam_timer')
+        self.render.configure(self.timer_label, text="")
+
+    def _store_selected_answer(self):
+        """Lưu đáp án đang chọn của câu hiện tại (nếu có) và cập nhật thống kê phiên"""
+        answer = self.selected_answer.get()
+        if answer:
+            self.user_answers[self.current_question_index] = answer
+            self.stats.set_answer(self.current_question_index, answer)
 
     def previous_question(self):
         if self.current_question_index > 0:
-            if self.selected_answer.get():
-                self.user_answers[self.current_question_index] = self.selected_answer.get()
+            self._store_selected_answer()
             self.current_question_index -= 1
             self.update_question_display()
 
     def next_question(self):
-        if self.current_question_index < len(self.questions) - 1:
-            if self.selected_answer.get():
-                self.user_answers[self.current_question_index] = self.selected_answer.get()
+        if self.current_question_index < len(self.session) - 1:
+            self._store_selected_answer()
             self.current_question_index += 1
             self.update_question_display()
 
     def check_answer(self):
+        self.render_coalescer.flush()
         if not self.selected_answer.get():
             messagebox.showwarning("Chưa chọn đáp án", "Vui lòng chọn một đáp án trước khi kiểm tra!")
             return
 
-        self.user_answers[self.current_question_index] = self.selected_answer.get()
-        question = self.questions[self.current_question_index]
-        correct_answer = question['dap_an_dung']
+        self._store_selected_answer()
+        self.stats.mark_checked(self.current_question_index)
+        bank_index = self.session.bank_index(self.current_question_index)
+        correct_answer = self.questions.answer(bank_index)
         user_answer = self.selected_answer.get()
         is_correct = user_answer == correct_answer
-        explanation = question.get('giai_thich', '')
+        explanation = self.questions.explanation(bank_index)
 
         self.question_feedback[self.current_question_index] = {
             'correct': is_correct,
             'explanation': explanation
         }
+        self._journal('c', p=self.current_question_index, v=user_answer)
         self.show_feedback(is_correct, explanation)
         self.update_status()
 
     def show_feedback(self, is_correct, explanation=""):
-        self.feedback_frame.grid()
+        self.render.set_visible(self.feedback_frame, True)
 
-        question = self.questions[self.current_question_index]
-        correct_answer = question['dap_an_dung']
+        index = self.current_question_index
+        correct_answer = self.questions.answer(self.session.bank_index(index))
         user_answer = self.selected_answer.get()
 
         for i, btn in enumerate(self.option_buttons):
-            option_letter = chr(65+i)
-            try:
-                btn.winfo_viewable()
-                if option_letter == correct_answer:
-                    btn.configure(fg_color="green", hover_color="darkgreen")
-                elif option_letter == user_answer and user_answer != correct_answer:
-                    btn.configure(fg_color="red", hover_color="darkred")
-                else:
-                    btn.configure(fg_color="gray40", hover_color="gray45")
-            except:
-                continue
+            fg_color, hover_color = self._option_colors(self._button_original_letter(i), user_answer, correct_answer)
+            self.render.configure(btn, fg_color=fg_color, hover_color=hover_color)
 
         if is_correct:
-            self.feedback_label.configure(text="✅ Chính xác! Bạn đã chọn đúng.", text_color="lightgreen")
+            self.render.configure(self.feedback_label, text="✅ Chính xác! Bạn đã chọn đúng.", text_color="lightgreen")
         else:
-            self.feedback_label.configure(text=f"❌ Sai rồi! Đáp án đúng là: {correct_answer}", text_color="lightcoral")
+            shown_correct = self.session.display_letter(index, correct_answer)
+            self.render.configure(
+                self.feedback_label, text=f"❌ Sai rồi! Đáp án đúng là: {shown_correct}", text_color="lightcoral"
+            )
 
-        if explanation:
-            self.explanation_label.configure(text=f"💡 Giải thích: {explanation}")
-        else:
-            self.explanation_label.configure(text="")
-
-    def hide_feedback(self):
-        self.feedback_frame.grid_remove()
-        current_answer = self.selected_answer.get()
-        for i, btn in enumerate(self.option_buttons):
-            try:
-                btn.winfo_viewable()
-                if chr(65+i) == current_answer:
-                    btn.configure(fg_color="blue", hover_color="darkblue")
-                else:
-                    btn.configure(fg_color="gray25", hover_color="gray30")
-            except:
-                continue
+        self.render.configure(self.explanation_label, text=f"💡 Giải thích: {explanation}" if explanation else "")
 
     def submit_exam(self):
-        if self.selected_answer.get():
-            self.user_answers[self.current_question_index] = self.selected_answer.get()
-
-        unanswered = [i + 1 for i in range(len(self.questions)) if i not in self.user_answers or not self.user_answers[i]]
-        if unanswered:
-            unanswered_str = ", ".join(map(str, unanswered[:10]))
-            if len(unanswered) > 10:
-                unanswered_str += f" và {len(unanswered)-10} câu khác"
+        self.render_coalescer.flush()
+        self._store_selected_answer()
+
+        unanswered_count = self.stats.unanswered_count
+        if unanswered_count:
+            unanswered_str = ", ".join(str(i + 1) for i in self.stats.unanswered(limit=10))
+            if unanswered_count > 10:
+                unanswered_str += f" và {unanswered_count-10} câu khác"
             result = messagebox.askyesno("Xác nhận nộp bài", f"Bạn chưa trả lời câu: {unanswered_str}\n\nBạn có chắc chắn muốn nộp bài không?")
             if not result:
                 return
@@ -714,39 +3739,28 @@ class QuizApplication:
                 return
 
         self.stop_timer()
+        if self._journal_ready:
+            self.journal.finish()
         self.show_results()
 
     def show_results(self):
-        correct_count = 0
-        total_questions = len(self.questions)
-        results_data = []
-
-        for i, question in enumerate(self.questions):
-            user_answer = self.user_answers.get(i, "")
-            correct_answer = question['dap_an_dung']
-            is_correct = user_answer == correct_answer
-            if is_correct:
-                correct_count += 1
-            results_data.append({
-                'stt': i + 1,
-                'cau_hoi': question['cau_hoi'],
-                'lua_chon': user_answer or "Không trả lời",
-                'dap_an_dung': correct_answer,
-                'ket_qua': "Đúng" if is_correct else "Sai",
-                'giai_thich': question.get('giai_thich', '')
-            })
+        total_questions = len(self.session)
+        # Chỉ giữ vị trí các câu sai; nội dung từng dòng kết quả được tạo khi hiển thị / khi xuất file
+        wrong_positions = self.stats.wrong()
+        correct_count = self.stats.correct_count
 
         score_percentage = (correct_count / total_questions) * 100 if total_questions > 0 else 0
         exam_duration = ""
         if self.exam_start_time:
-            duration = datetime.now() - self.exam_start_time
-            minutes = int(duration.total_seconds() // 60)
-            seconds = int(duration.total_seconds() % 60)
+            duration = time.monotonic() - self._exam_started_at
+            minutes = int(duration // 60)
+            seconds = int(duration % 60)
             exam_duration = f"{minutes} phút {seconds} giây"
 
-        self.show_results_window(correct_count, total_questions, score_percentage, exam_duration, results_data)
+        self.show_results_window(correct_count, total_questions, score_percentage, exam_duration, wrong_positions)
 
-    def show_results_window(self, correct_count, total_questions, score_percentage, exam_duration, results_data):
+    def show_results_window(self, correct_count, total_questions, score_percentage, exam_duration, wrong_positions):
+        session, user_answers = self.session, self.user_answers
         results_window = ctk.CTkToplevel(self.root)
         results_window.title("Kết quả bài thi")
         results_window.geometry("1000x700")
@@ -785,147 +3799,217 @@ class QuizApplication:
             list_frame, text="📋 Chi tiết từng câu hỏi:", font=ctk.CTkFont(size=18, weight="bold")
         ).pack(anchor="w", padx=20, pady=(20, 10))
 
-        scrollable_frame = ctk.CTkScrollableFrame(list_frame, height=300)
-        scrollable_frame.pack(fill="both", expand=True, padx=20, pady=(0, 20))
-
-        for result in results_data:
-            result_item = ctk.CTkFrame(scrollable_frame)
-            result_item.pack(fill="x", pady=5)
-
-            status_color = "lightgreen" if result['ket_qua'] == "Đúng" else "lightcoral"
-            status_icon = "✅" if result['ket_qua'] == "Đúng" else "❌"
-
-            ctk.CTkLabel(
-                result_item, text=f"{status_icon} Câu {result['stt']}",
-                font=ctk.CTkFont(size=14, weight="bold"), text_color=status_color
-            ).pack(anchor="w", padx=15, pady=(10, 5))
-
+        title_font = ctk.CTkFont(size=14, weight="bold")
+        text_font = ctk.CTkFont(size=12)
+
+        def create_row(row):
+            row.status_label = ctk.CTkLabel(row, text="", font=title_font)
+            row.status_label.pack(anchor="w", padx=15, pady=(10, 5))
+            row.question_label = ctk.CTkLabel(row, text="", font=text_font, anchor="w")
+            row.question_label.pack(fill="x", padx=15, pady=2)
+            row.answer_label = ctk.CTkLabel(row, text="", font=text_font, text_color="gray")
+            row.answer_label.pack(anchor="w", padx=15, pady=(2, 10))
+
+        def update_row(row, index):
+            result = result_row(session, user_answers, index)
+            is_correct = result['ket_qua'] == "Đúng"
+            row.status_label.configure(
+                text=f"{'✅' if is_correct else '❌'} Câu {result['stt']}",
+                text_color="lightgreen" if is_correct else "lightcoral"
+            )
             question_text = result['cau_hoi']
             if len(question_text) > 100:
                 question_text = question_text[:100] + "..."
-            ctk.CTkLabel(
-                result_item, text=f"❓ {question_text}", font=ctk.CTkFont(size=12),
-                anchor="w", wraplength=900
-            ).pack(fill="x", padx=15, pady=2)
+            row.question_label.configure(text=f"❓ {question_text}")
+            row.answer_label.configure(
+                text=f"👤 Bạn chọn: {result['lua_chon']} | ✓ Đáp án đúng: {result['dap_an_dung']}"
+            )
 
-            ctk.CTkLabel(
-                result_item, text=f"👤 Bạn chọn: {result['lua_chon']} | ✓ Đáp án đúng: {result['dap_an_dung']}",
-                font=ctk.CTkFont(size=12), text_color="gray"
-            ).pack(anchor="w", padx=15, pady=(2, 10))
+        results_list = VirtualListView(list_frame, total_questions, 110, create_row, update_row)
+        results_list.pack(fill="both", expand=True, padx=20, pady=(0, 20))
 
         footer_frame = ctk.CTkFrame(results_window)
         footer_frame.pack(fill="x", padx=20, pady=(0, 20))
         button_frame = ctk.CTkFrame(footer_frame)
         button_frame.pack(pady=15)
 
-        ctk.CTkButton(
-            button_frame, text="📄 Xuất kết quả (CSV)", font=ctk.CTkFont(size=14),
-            command=lambda: self.export_results(results_data, correct_count, total_questions, score_percentage, exam_duration)
-        ).pack(side="left", padx=10)
+        summary = {
+            'Ngày thi': datetime.now().strftime('%d/%m/%Y %H:%M:%S'),
+            'Điểm số': f"{score_percentage:.1f}%",
+            'Số câu đúng': f"{correct_count}/{total_questions}",
+            'Mã đề (seed)': session.seed,
+        }
+        if exam_duration:
+            summary['Thời gian làm bài'] = exam_duration
+
+        export_progress = ctk.CTkProgressBar(footer_frame)
+        export_label = ctk.CTkLabel(footer_frame, text="", font=ctk.CTkFont(size=12), text_color="gray")
+
+        def on_export_progress(done, total):
+            if results_window.winfo_exists():
+                export_progress.set(done / total if total else 1)
+                export_label.configure(text=f"Đang xuất {done}/{total} câu...")
+
+        def on_export_finish():
+            if results_window.winfo_exists():
+                export_progress.pack_forget()
+                export_label.pack_forget()
+                export_btn.configure(state="normal")
+
+        def start_export():
+            if self.export_results(session, user_answers, summary, on_export_progress, on_export_finish):
+                export_btn.configure(state="disabled")
+                export_progress.set(0)
+                export_progress.pack(fill="x", padx=20, pady=(0, 5))
+                export_label.pack(pady=(0, 10))
+
+        export_btn = ctk.CTkButton(
+            button_frame, text="📄 Xuất kết quả", font=ctk.CTkFont(size=14), command=start_export
+        )
+        export_btn.pack(side="left", padx=10)
 
-        wrong_questions = [r for r in results_data if r['ket_qua'] == "Sai"]
-        if wrong_questions:
+        if wrong_positions:
             ctk.CTkButton(
-                button_frame, text=f"🔍 Xem {len(wrong_questions)} câu sai",
+                button_frame, text=f"🔍 Xem {len(wrong_positions)} câu sai",
                 font=ctk.CTkFont(size=14), fg_color="orange", hover_color="darkorange",
-                command=lambda: self.show_wrong_answers(wrong_questions)
+                command=lambda: self.show_wrong_answers(session, user_answers, wrong_positions)
             ).pack(side="left", padx=10)
 
         ctk.CTkButton(button_frame, text="❌ Đóng", font=ctk.CTkFont(size=14), command=results_window.destroy)\
             .pack(side="left", padx=10)
 
-    def export_results(self, results_data, correct_count, total_questions, score_percentage, exam_duration):
-        try:
-            file_path = filedialog.asksaveasfilename(
-                title="Lưu kết quả",
-                defaultextension=".csv",
-                filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
-                initialname=f"ket_qua_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            )
-            if not file_path:
-                return
+    def export_results(self, session, user_answers, summary, on_progress=None, on_finish=None):
+        """Xuất kết quả ra file (CSV/JSONL/Parquet/XLSX theo phần mở rộng) trên luồng nền.
+        Các dòng được sinh dần từ phiên làm bài nên bộ nhớ không tăng theo số câu"""
+        file_path = filedialog.asksaveasfilename(
+            title="Lưu kết quả",
+            defaultextension=".csv",
+            filetypes=EXPORT_FILETYPES,
+            initialfile=f"ket_qua_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        )
+        if not file_path:
+            return False
 
-            with open(file_path, 'w', newline='', encoding='utf-8') as csvfile:
-                csvfile.write(f"# KẾT QUẢ BÀI THI\n")
-                csvfile.write(f"# Ngày thi: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
-                csvfile.write(f"# Điểm số: {score_percentage:.1f}%\n")
-                csvfile.write(f"# Số câu đúng: {correct_count}/{total_questions}\n")
-                if exam_duration:
-                    csvfile.write(f"# Thời gian làm bài: {exam_duration}\n")
-                csvfile.write(f"#\n")
-
-                writer = csv.writer(csvfile)
-                writer.writerow(['STT', 'Câu hỏi', 'Lựa chọn', 'Đáp án đúng', 'Kết quả', 'Giải thích'])
-                for r in results_data:
-                    writer.writerow([r['stt'], r['cau_hoi'], r['lua_chon'], r['dap_an_dung'], r['ket_qua'], r['giai_thich']])
-
-            messagebox.showinfo("Thành công", f"Đã xuất kết quả ra file:\n{file_path}")
-        except Exception as e:
-            messagebox.showerror("Lỗi", f"Không thể xuất file:\n{str(e)}")
+        total = len(session)
+        task = BackgroundTask(lambda progress: export_result_rows(
+            file_path, iter_result_rows(session, user_answers), summary, total, progress
+        )).start()
+        self.scheduler.register(f"export:{id(task)}", lambda: self._poll_export(task, file_path, on_progress, on_finish),
+                                interval=0.05)
+        return True
+
+    def _poll_export(self, task, file_path, on_progress, on_finish):
+        for event in task.poll():
+            if event[0] == 'progress':
+                if on_progress:
+                    on_progress(*event[1:])
+                continue
+            self.scheduler.unregister(f"export:{id(task)}")
+            if on_finish:
+                on_finish()
+            if event[0] == 'done':
+                messagebox.showinfo("Thành công", f"Đã xuất kết quả ra file:\n{file_path}")
+            else:
+                messagebox.showerror("Lỗi", f"Không thể xuất file:\n{event[1]}")
+            return
 
-    def show_wrong_answers(self, wrong_questions):
+    def show_wrong_answers(self, session, user_answers, wrong_positions):
         wrong_window = ctk.CTkToplevel(self.root)
         wrong_window.title("Câu trả lời sai")
         wrong_window.geometry("900x600")
         wrong_window.transient(self.root)
 
         ctk.CTkLabel(
-            wrong_window, text=f"🔍 XEM LẠI {len(wrong_questions)} CÂU TRẢ LỜI SAI",
+            wrong_window, text=f"🔍 XEM LẠI {len(wrong_positions)} CÂU TRẢ LỜI SAI",
             font=ctk.CTkFont(size=20, weight="bold")
         ).pack(pady=20)
 
-        scrollable_frame = ctk.CTkScrollableFrame(wrong_window)
-        scrollable_frame.pack(fill="both", expand=True, padx=20, pady=(0, 20))
-
-        for wrong in wrong_questions:
-            wrong_frame = ctk.CTkFrame(scrollable_frame)
-            wrong_frame.pack(fill="x", pady=10)
-            wrong_frame.grid_columnconfigure(0, weight=1)
-
-            ctk.CTkLabel(
-                wrong_frame, text=f"❌ Câu {wrong['stt']}",
-                font=ctk.CTkFont(size=16, weight="bold"), text_color="lightcoral"
-            ).grid(row=0, column=0, sticky="w", padx=20, pady=(15, 5))
-
-            ctk.CTkLabel(
-                wrong_frame, text=f"❓ {wrong['cau_hoi']}",
-                font=ctk.CTkFont(size=14), wraplength=800, justify="left"
-            ).grid(row=1, column=0, sticky="ew", padx=20, pady=5)
-
-            ctk.CTkLabel(
-                wrong_frame, text=f"👤 Bạn đã chọn: {wrong['lua_chon']}",
-                font=ctk.CTkFont(size=13), text_color="lightcoral"
-            ).grid(row=2, column=0, sticky="w", padx=20, pady=2)
+        title_font = ctk.CTkFont(size=16, weight="bold")
+        question_font = ctk.CTkFont(size=14)
+        answer_font = ctk.CTkFont(size=13)
+        explanation_font = ctk.CTkFont(size=12)
+
+        def create_row(row):
+            row.grid_columnconfigure(0, weight=1)
+            row.title_label = ctk.CTkLabel(row, text="", font=title_font, text_color="lightcoral")
+            row.title_label.grid(row=0, column=0, sticky="w", padx=20, pady=(15, 5))
+            # Hàng cao cố định nên chữ dài bị cắt: nút mở cửa sổ xem đầy đủ câu hỏi và giải thích
+            row.detail_btn = ctk.CTkButton(row, text="📖 Xem đầy đủ", width=120,
+                                           command=lambda: self.show_wrong_answer_detail(wrong_window, row.wrong))
+            row.detail_btn.grid(row=0, column=1, sticky="e", padx=20, pady=(15, 5))
+            row.question_label = ctk.CTkLabel(row, text="", font=question_font, wraplength=800, justify="left")
+            row.question_label.grid(row=1, column=0, sticky="ew", padx=20, pady=5)
+            row.choice_label = ctk.CTkLabel(row, text="", font=answer_font, text_color="lightcoral")
+            row.choice_label.grid(row=2, column=0, sticky="w", padx=20, pady=2)
+            row.correct_label = ctk.CTkLabel(row, text="", font=answer_font, text_color="lightgreen")
+            row.correct_label.grid(row=3, column=0, sticky="w", padx=20, pady=2)
+            row.explanation_label = ctk.CTkLabel(
+                row, text="", font=explanation_font, text_color="gray", wraplength=800, justify="left"
+            )
+            row.explanation_label.grid(row=4, column=0, sticky="ew", padx=20, pady=(5, 15))
 
-            ctk.CTkLabel(
-                wrong_frame, text=f"✅ Đáp án đúng: {wrong['dap_an_dung']}",
-                font=ctk.CTkFont(size=13), text_color="lightgreen"
-            ).grid(row=3, column=0, sticky="w", padx=20, pady=2)
+        def shorten(text, limit):
+            return text if len(text) <= limit else text[:limit] + "..."
 
+        def update_row(row, index):
+            wrong = row.wrong = result_row(session, user_answers, wrong_positions[index])
+            row.title_label.configure(text=f"❌ Câu {wrong['stt']}")
+            if len(wrong['cau_hoi']) > 200 or len(wrong['giai_thich'] or "") > 200:
+                row.detail_btn.grid()
+            else:
+                row.detail_btn.grid_remove()
+            row.question_label.configure(text=f"❓ {shorten(wrong['cau_hoi'], 200)}")
+            row.choice_label.configure(text=f"👤 Bạn đã chọn: {wrong['lua_chon']}")
+            row.correct_label.configure(text=f"✅ Đáp án đúng: {wrong['dap_an_dung']}")
             if wrong['giai_thich']:
-                ctk.CTkLabel(
-                    wrong_frame, text=f"💡 Giải thích: {wrong['giai_thich']}",
-                    font=ctk.CTkFont(size=12), text_color="gray",
-                    wraplength=800, justify="left"
-                ).grid(row=4, column=0, sticky="ew", padx=20, pady=(5, 15))
+                row.explanation_label.configure(text=f"💡 Giải thích: {shorten(wrong['giai_thich'], 200)}")
+                row.explanation_label.grid()
+            else:
+                row.explanation_label.grid_remove()
+
+        wrong_list = VirtualListView(wrong_window, len(wrong_positions), 230, create_row, update_row, gap=10)
+        wrong_list.pack(fill="both", expand=True, padx=20, pady=(0, 20))
 
         ctk.CTkButton(wrong_window, text="Đóng", command=wrong_window.destroy).pack(pady=20)
 
+    def show_wrong_answer_detail(self, master, wrong):
+        """Cửa sổ hiện toàn văn một câu sai (dòng result_row): câu hỏi, lựa chọn, đáp án đúng và giải thích"""
+        detail_window = ctk.CTkToplevel(master)
+        detail_window.title(f"Câu {wrong['stt']}")
+        detail_window.geometry("800x500")
+        detail_window.transient(master)
+
+        content = ctk.CTkScrollableFrame(detail_window)
+        content.pack(fill="both", expand=True, padx=20, pady=(20, 0))
+        ctk.CTkLabel(content, text=f"❓ {wrong['cau_hoi']}", font=ctk.CTkFont(size=14),
+                     wraplength=720, justify="left").pack(anchor="w", pady=5)
+        ctk.CTkLabel(content, text=f"👤 Bạn đã chọn: {wrong['lua_chon']}", font=ctk.CTkFont(size=13),
+                     text_color="lightcoral", wraplength=720, justify="left").pack(anchor="w", pady=2)
+        ctk.CTkLabel(content, text=f"✅ Đáp án đúng: {wrong['dap_an_dung']}", font=ctk.CTkFont(size=13),
+                     text_color="lightgreen", wraplength=720, justify="left").pack(anchor="w", pady=2)
+        if wrong['giai_thich']:
+            ctk.CTkLabel(content, text=f"💡 Giải thích: {wrong['giai_thich']}", font=ctk.CTkFont(size=12),
+                         text_color="gray", wraplength=720, justify="left").pack(anchor="w", pady=5)
+
+        ctk.CTkButton(detail_window, text="Đóng", command=detail_window.destroy).pack(pady=20)
+        return detail_window
+
     def update_status(self):
         if not self.questions:
-            self.stats_label.configure(text="Chưa có dữ liệu")
+            self.render.configure(self.stats_label, text="Chưa có dữ liệu")
             return
 
-        answered_count = len([ans for ans in self.user_answers.values() if ans])
-        total_count = len(self.questions)
+        answered_count = self.stats.answered_count
+        total_count = len(self.session)
 
         if self.current_mode == "practice":
-            checked_count = len(self.question_feedback)
-            self.stats_label.configure(
+            checked_count = self.stats.checked_count
+            self.render.configure(
+                self.stats_label,
                 text=f"Đã kiểm tra: {checked_count}/{total_count} | Trả lời: {answered_count}/{total_count}"
             )
         else:
-            self.stats_label.configure(text=f"Đã trả lời: {answered_count}/{total_count}")
+            self.render.configure(self.stats_label, text=f"Đã trả lời: {answered_count}/{total_count}")
 
     def toggle_theme(self):
         if self.theme_switch.get():
@@ -937,14 +4021,260 @@ class QuizApplication:
 
     def run(self):
         self.root.mainloop()
+        if self.journal is not None:
+            self.journal.close()
+        if self.config['nav_stats']:
+            print("Thống kê chuyển câu:", self.nav_stats.summary())
+        if self.tracer is not None:
+            try:
+                summary = self.tracer.write()
+                print(f"Đã ghi trace: {self.tracer.path}")
+                print(self.tracer.format_summary(summary))
+            except OSError as e:
+                print(f"Lỗi ghi file trace: {e}")
+
+
+# ================== CHẤM BÀI HÀNG LOẠT (không cần giao diện) ==================
+ANSWER_SHEET_ID_COLUMN = 'ma_thi_sinh'
 
 
-def main():
+def answer_column(question_number):
+    """Tên cột trong phiếu trả lời của câu hỏi số question_number (bắt đầu từ 1)"""
+    return f"cau_{question_number}"
+
+
+def list_answer_sheet_files(paths):
+    """Mở rộng danh sách đường dẫn: thư mục -> mọi file .csv/.xlsx/.xls bên trong"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for pattern in ['*.csv', '*.xlsx', '*.xls']:
+                files.extend(sorted(glob.glob(os.path.join(path, pattern))))
+        else:
+            files.append(path)
+    return files
+
+
+def read_answer_sheets(paths, n_questions):
+    """Đọc các phiếu trả lời (mỗi dòng một thí sinh, cột ma_thi_sinh, cau_1..cau_N).
+    Trả về (mã thí sinh, ma trận int8 thí sinh x câu hỏi: 0-3 = A-D, -1 = bỏ trống/không hợp lệ)"""
+    frames = []
+    for path in list_answer_sheet_files(paths):
+        if path.lower().endswith('.csv'):
+            df = pd.read_csv(path, dtype=str, keep_default_na=False)
+        else:
+            df = pd.read_excel(path, dtype=str).fillna('')
+        df.columns = [str(c).strip() for c in df.columns]
+        if ANSWER_SHEET_ID_COLUMN not in df.columns:
+            # Không có cột mã thí sinh: dùng tên file và số thứ tự dòng
+            stem = Path(path).stem
+            df[ANSWER_SHEET_ID_COLUMN] = [f"{stem}_{i + 1}" for i in range(len(df))]
+        frames.append(df)
+    if not frames:
+        return [], np.empty((0, n_questions), dtype=np.int8)
+
+    sheets = pd.concat(frames, ignore_index=True).fillna('')
+    columns = [answer_column(q + 1) for q in range(n_questions)]
+    sheets = sheets.reindex(columns=[ANSWER_SHEET_ID_COLUMN] + columns, fill_value='')
+
+    letters = np.char.upper(np.char.strip(sheets[columns].to_numpy(dtype=str)))
+    codes = np.full(letters.shape, -1, dtype=np.int8)
+    for code, letter in enumerate(VALID_ANSWERS):
+        codes[letters == letter] = code
+    return sheets[ANSWER_SHEET_ID_COLUMN].astype(str).tolist(), codes
+
+
+def grade_answer_matrix(codes, answer_key):
+    """Chấm toàn bộ ma trận trả lời bằng một phép so sánh NumPy với đáp án.
+    Trả về (ma trận đúng/sai, số câu đúng, số câu đã trả lời) cho từng thí sinh"""
+    key = np.asarray(answer_key, dtype=np.int8)
+    correct = codes == key[np.newaxis, :]
+    return correct, correct.sum(axis=1), (codes >= 0).sum(axis=1)
+
+
+def _safe_file_name(name):
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in name) or "thi_sinh"
+
+
+def write_grading_results(out_dir, examinee_ids, codes, correct, correct_counts, answered_counts,
+                          answer_key, per_examinee=True):
+    """Ghi file điểm của từng thí sinh và file tổng hợp tong_hop.csv"""
+    os.makedirs(out_dir, exist_ok=True)
+    n_questions = len(answer_key)
+    scores = correct_counts / n_questions * 100 if n_questions else np.zeros(len(examinee_ids))
+
+    with open(os.path.join(out_dir, 'tong_hop.csv'), 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['Mã thí sinh', 'Số câu đúng', 'Số câu đã trả lời', 'Tổng số câu', 'Điểm số (%)'])
+        writer.writerows(
+            [examinee_id, int(c), int(a), n_questions, f"{score:.1f}"]
+            for examinee_id, c, a, score in zip(examinee_ids, correct_counts, answered_counts, scores)
+        )
+
+    if not per_examinee:
+        return
+    letters = np.array(VALID_ANSWERS + ["Không trả lời"], dtype=object)
+    key_letters = letters[np.asarray(answer_key, dtype=np.int8)]
+    used_names = set()
+    for row, examinee_id in enumerate(examinee_ids):
+        name = _safe_file_name(examinee_id)
+        while name in used_names:
+            name += "_"
+        used_names.add(name)
+        chosen = letters[codes[row]]  # -1 -> "Không trả lời"
+        results = np.where(correct[row], "Đúng", "Sai")
+        with open(os.path.join(out_dir, f"{name}.csv"), 'w', newline='', encoding='utf-8') as csvfile:
+            csvfile.write(f"# KẾT QUẢ BÀI THI - {examinee_id}\n")
+            csvfile.write(f"# Điểm số: {scores[row]:.1f}%\n")
+            csvfile.write(f"# Số câu đúng: {int(correct_counts[row])}/{n_questions}\n")
+            csvfile.write("#\n")
+            writer = csv.writer(csvfile)
+            writer.writerow(['STT', 'Lựa chọn', 'Đáp án đúng', 'Kết quả'])
+            writer.writerows(zip(range(1, n_questions + 1), chosen, key_letters, results))
+
+
+def cli_question_cache(args):
+    """Cache câu hỏi cho các lệnh dòng lệnh: theo CACHE_ENABLED / CACHE_MAX_ENTRIES trong .env như giao diện,
+    None nếu tắt cache hoặc có --no-cache (khi đó không ghi gì vào .quiz_cache/)"""
+    config = {'cache_enabled': True, 'cache_max_entries': 20}
+    read_env_config(config)
+    if args.no_cache or not config['cache_enabled']:
+        return None
+    return QuestionCache(max_entries=config['cache_max_entries'])
+
+
+def run_batch_grading(args):
+    """Lệnh `grade`: chấm hàng loạt phiếu trả lời theo một kho câu hỏi"""
+    bank, issues = load_question_bank(args.bank, cache=cli_question_cache(args), force_rebuild=args.rebuild_cache)
+    if bank is None:
+        report_validation_issues(args.bank, issues)
+        return 1
+
+    start = time.perf_counter()
+    examinee_ids, codes = read_answer_sheets(args.answers, len(bank))
+    answer_key = np.frombuffer(bank.answer_key, dtype=np.int8)
+    correct, correct_counts, answered_counts = grade_answer_matrix(codes, answer_key)
+    graded = time.perf_counter()
+    write_grading_results(args.out, examinee_ids, codes, correct, correct_counts, answered_counts,
+                          answer_key, per_examinee=not args.summary_only)
+
+    print(f"Đã chấm {len(examinee_ids)} thí sinh x {len(bank)} câu hỏi "
+          f"(đọc + chấm {graded - start:.2f} s, ghi file {time.perf_counter() - graded:.2f} s)")
+    if len(examinee_ids):
+        scores = correct_counts / max(len(bank), 1) * 100
+        print(f"Điểm trung bình {scores.mean():.1f}% | thấp nhất {scores.min():.1f}% | cao nhất {scores.max():.1f}%")
+    print(f"Kết quả đã ghi vào {args.out}")
+    return 0
+
+
+def run_near_duplicate_report(args):
+    """Lệnh `dedup`: liệt kê các nhóm câu gần trùng trong một hoặc nhiều file câu hỏi"""
+    cache = cli_question_cache(args)
+    if len(args.banks) == 1:
+        bank, issues = load_question_bank(args.banks[0], cache=cache, force_rebuild=args.rebuild_cache)
+        errors = {} if bank is not None else {args.banks[0]: issues}
+    else:
+        bank, errors, _ = load_question_banks(args.banks, cache=cache, force_rebuild=args.rebuild_cache)
+    for file_path, issues in errors.items():
+        report_validation_issues(file_path, issues)
+    if bank is None:
+        return 1
+
+    start = time.perf_counter()
+    clusters = find_near_duplicates(bank, args.threshold)
+    elapsed = time.perf_counter() - start
+    hidden = sum(len(group) - 1 for group in clusters)
+    print(f"{len(bank)} câu hỏi: {len(clusters)} nhóm câu gần trùng, gộp lại còn {len(bank) - hidden} câu "
+          f"(ngưỡng {args.threshold}, {elapsed:.2f} s)")
+    for number, group in enumerate(clusters[:args.show], 1):
+        print(f"\nNhóm {number}:")
+        for index in group:
+            print(f"  [{bank.source(index) or '-'} #{index + 1}] {bank.question(index)}")
+    if len(clusters) > args.show:
+        print(f"\n... và {len(clusters) - args.show} nhóm khác")
+
+    if args.out:
+        with open(args.out, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['nhom', 'stt', 'nguon', 'giu_lai', 'cau_hoi'])
+            for number, group in enumerate(clusters, 1):
+                for index in group:
+                    writer.writerow([number, index + 1, bank.source(index) or '', int(index == group[0]),
+                                     bank.question(index)])
+        print(f"Danh sách nhóm đã ghi vào {args.out}")
+    return 0
+
+
+def run_exam_pack(args):
+    """Lệnh `pack`: biên dịch một hoặc nhiều file câu hỏi (gộp, bỏ câu trùng) thành file exam pack"""
+    cache = cli_question_cache(args)
+    if len(args.banks) == 1:
+        bank, issues = load_question_bank(args.banks[0], cache=cache, force_rebuild=args.rebuild_cache)
+        errors, duplicates = ({} if bank is not None else {args.banks[0]: issues}), 0
+    else:
+        bank, errors, duplicates = load_question_banks(args.banks, cache=cache, force_rebuild=args.rebuild_cache)
+    for file_path, issues in errors.items():
+        report_validation_issues(file_path, issues)
+    if bank is None or errors:
+        return 1
+
+    out = args.out
+    if not ExamPack.is_pack(out):
+        out += ExamPack.EXTENSION
+    start = time.perf_counter()
+    ExamPack.write(bank, out)
+    size = os.path.getsize(out) / 2**20
+    print(f"Đã ghi {len(bank)} câu hỏi vào {out} ({size:.1f} MB, {time.perf_counter() - start:.2f} s)"
+          + (f", bỏ {duplicates} câu trùng" if duplicates else ""))
+    return 0
+
+
+def build_arg_parser():
+    import argparse
+    parser = argparse.ArgumentParser(description="Ứng dụng Trắc nghiệm Quân sự")
+    subparsers = parser.add_subparsers(dest='command')
+
+    grade = subparsers.add_parser('grade', help="Chấm hàng loạt phiếu trả lời (không mở giao diện)")
+    grade.add_argument('bank', help="File câu hỏi (định dạng như khi tải trong ứng dụng)")
+    grade.add_argument('answers', nargs='+', help="File hoặc thư mục phiếu trả lời (.csv/.xlsx/.xls)")
+    grade.add_argument('--out', default='ket_qua_cham', help="Thư mục ghi kết quả (mặc định: ket_qua_cham)")
+    grade.add_argument('--summary-only', action='store_true', help="Chỉ ghi file tổng hợp")
+    grade.add_argument('--rebuild-cache', action='store_true', help="Đọc lại file câu hỏi, bỏ qua cache")
+    grade.add_argument('--no-cache', action='store_true', help="Không đọc / ghi cache (mặc định theo CACHE_ENABLED trong .env)")
+
+    dedup = subparsers.add_parser('dedup', help="Tìm các nhóm câu hỏi gần trùng (không mở giao diện)")
+    dedup.add_argument('banks', nargs='+', help="Một hoặc nhiều file câu hỏi (được gộp như khi tải trong ứng dụng)")
+    dedup.add_argument('--threshold', type=float, default=0.8, help="Ngưỡng độ giống nhau 0-1 (mặc định: 0.8)")
+    dedup.add_argument('--show', type=int, default=20, help="Số nhóm in ra màn hình (mặc định: 20)")
+    dedup.add_argument('--out', help="Ghi toàn bộ các nhóm ra file CSV")
+    dedup.add_argument('--rebuild-cache', action='store_true', help="Đọc lại file câu hỏi, bỏ qua cache")
+    dedup.add_argument('--no-cache', action='store_true', help="Không đọc / ghi cache (mặc định theo CACHE_ENABLED trong .env)")
+
+    pack = subparsers.add_parser('pack', help="Biên dịch file câu hỏi thành exam pack (.qpack) mở tức thì bằng mmap")
+    pack.add_argument('banks', nargs='+', help="Một hoặc nhiều file câu hỏi (được gộp như khi tải trong ứng dụng)")
+    pack.add_argument('-o', '--out', default=f"cau_hoi{ExamPack.EXTENSION}",
+                      help=f"File exam pack (mặc định: cau_hoi{ExamPack.EXTENSION})")
+    pack.add_argument('--rebuild-cache', action='store_true', help="Đọc lại file câu hỏi, bỏ qua cache")
+    pack.add_argument('--no-cache', action='store_true', help="Không đọc / ghi cache (mặc định theo CACHE_ENABLED trong .env)")
+    return parser
+
+
+def main(argv=None):
     """Hàm main"""
+    args = build_arg_parser().parse_args(argv)
+    if args.command == 'grade':
+        return run_batch_grading(args)
+    if args.command == 'dedup':
+        return run_near_duplicate_report(args)
+    if args.command == 'pack':
+        return run_exam_pack(args)
+
     app = QuizApplication()
     app.initialize_with_splash()
     app.run()
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    multiprocessing.freeze_support()  # cần cho ProcessPoolExecutor khi đóng gói thành .exe
+    sys.exit(main())
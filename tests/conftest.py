@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""Dữ liệu, hàm đối chiếu và giao diện giả dùng chung cho tests/ (bộ benchmark cũng import từ đây)"""
+import os
+import sys
+import time
+import types
+
+import pytest
+
+# main.py nằm ở thư mục gốc của repo (không phải package)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import main  # noqa: E402
+from main import QuestionBank  # noqa: E402
+
+
+# ================== DỮ LIỆU MẪU ==================
+def question_records(n, question="Câu hỏi số {i}?", explanation=None):
+    """n câu hỏi đơn giản: đáp án đúng xoay vòng A/B/C, câu chẵn không có đáp án D"""
+    return [{
+        'cau_hoi': question.format(i=i), 'tra_loi_a': "A", 'tra_loi_b': "B", 'tra_loi_c': "C",
+        'tra_loi_d': "D" if i % 2 else None, 'dap_an_dung': "ABC"[i % 3],
+        'giai_thich': explanation.format(i=i) if explanation else None,
+    } for i in range(n)]
+
+
+@pytest.fixture
+def make_bank():
+    """make_bank(n, question=..., explanation=...) -> QuestionBank từ question_records"""
+    return lambda n, **kwargs: QuestionBank.from_records(question_records(n, **kwargs))
+
+
+# ================== ĐẾM LẠI TOÀN BỘ ==================
+def full_unanswered(session, user_answers):
+    """Các vị trí chưa trả lời, đếm lại từ đầu (mốc so sánh cho SessionStats)"""
+    return [i for i in range(len(session)) if not user_answers.get(i)]
+
+
+def full_wrong(session, user_answers):
+    """Các vị trí trả lời sai hoặc bỏ trống, đếm lại từ đầu"""
+    return [i for i in range(len(session))
+            if user_answers.get(i, "") != session.bank.answer(session.bank_index(i))]
+
+
+# ================== GIAO DIỆN GIẢ ==================
+class StubWidget:
+    """Widget giả: nhận mọi lệnh cấu hình/bố cục, không vẽ gì"""
+
+    def __init__(self, *args, **kwargs):
+        self._options = dict(kwargs)
+
+    def configure(self, **kwargs):
+        self._options.update(kwargs)
+
+    config = configure
+
+    def cget(self, key):
+        return self._options.get(key, "")
+
+    def get(self):
+        return self._options.get('value', "")
+
+    def winfo_width(self):
+        return 1000
+
+    def winfo_height(self):
+        return 700
+
+    def winfo_exists(self):
+        return True
+
+    def winfo_children(self):
+        return []
+
+    def measure(self, text):  # CTkFont.measure: độ rộng chữ (px)
+        return 7 * len(text)
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class StubRoot(StubWidget):
+    """Cửa sổ gốc giả: after() xếp hàng để pump() chạy, giống vòng lặp Tk"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pending = {}
+        self._next_id = 0
+
+    def after(self, ms, callback=None, *args):
+        self._next_id += 1
+        self.pending[self._next_id] = (time.monotonic() + ms / 1000, callback, args)
+        return self._next_id
+
+    def after_idle(self, callback, *args):
+        return self.after(0, callback, *args)
+
+    def after_cancel(self, after_id):
+        self.pending.pop(after_id, None)
+
+    def run_due(self):
+        """Chạy một lượt các lệnh after() đã tới hạn; trả về số lệnh đã chạy"""
+        now = time.monotonic()
+        due = [key for key, (at, _, _) in self.pending.items() if at <= now]
+        for key in sorted(due):
+            entry = self.pending.pop(key, None)
+            if entry is not None:
+                entry[1](*entry[2])
+        return len(due)
+
+    def pump(self, until, timeout=600):
+        """Chạy các lệnh after() tới hạn cho tới khi until() đúng"""
+        deadline = time.monotonic() + timeout
+        while not until():
+            if time.monotonic() > deadline:
+                raise TimeoutError("pump: quá thời gian chờ")
+            if not self.run_due():
+                time.sleep(0.001)
+
+
+class StubStringVar:
+    def __init__(self, *args, value="", **kwargs):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+def install_stub_ui(save_path):
+    """Thay customtkinter, tkinter và hộp thoại trong main bằng bản giả"""
+    ctk = types.SimpleNamespace(
+        CTk=StubRoot, CTkToplevel=StubWidget, CTkFrame=StubWidget, CTkScrollableFrame=StubWidget,
+        CTkLabel=StubWidget, CTkButton=StubWidget, CTkSwitch=StubWidget, CTkEntry=StubWidget,
+        CTkProgressBar=StubWidget, CTkScrollbar=StubWidget, CTkFont=StubWidget, CTkOptionMenu=StubWidget,
+        ScalingTracker=types.SimpleNamespace(get_widget_scaling=lambda widget: 1.0),
+        set_appearance_mode=lambda mode: None, set_default_color_theme=lambda theme: None,
+    )
+    main.ctk = ctk
+    main.tk = types.SimpleNamespace(StringVar=StubStringVar,
+                                    Misc=types.SimpleNamespace(bind=lambda *args, **kwargs: None))
+    main.messagebox = types.SimpleNamespace(
+        askyesno=lambda *args, **kwargs: True, showinfo=lambda *args, **kwargs: None,
+        showwarning=lambda *args, **kwargs: None, showerror=lambda *args, **kwargs: None,
+    )
+    main.filedialog = types.SimpleNamespace(asksaveasfilename=lambda **kwargs: save_path,
+                                            askopenfilenames=lambda **kwargs: ())
+
+
+def headless_app():
+    app = main.QuizApplication()
+    app.config.update(cache_enabled=False, journal_enabled=False, nav_stats=False)
+    app.journal = None
+    app.setup_ui()
+    return app
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch, make_bank):
+    """QuizApplication chạy không màn hình trên kho 2000 câu, chế độ luyện tập"""
+    monkeypatch.chdir(tmp_path)  # không đọc .env của máy chạy test
+    for name in ('ctk', 'tk', 'messagebox', 'filedialog'):
+        monkeypatch.setattr(main, name, getattr(main, name))  # khôi phục sau test
+    install_stub_ui(str(tmp_path / "ket_qua.csv"))
+    application = headless_app()
+    application.questions = make_bank(2000)
+    application._questions_changed()
+    application.search_index = None
+    return application
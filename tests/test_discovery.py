@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""find_question_files: dò thư mục không nạp pandas; exam pack chỉ thay file nguồn cùng tên"""
+import csv
+import os
+import subprocess
+import sys
+
+from conftest import question_records
+from main import ExamPack, QuestionBank, QuizApplication
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def write_csv(path, records):
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.DictWriter(f, fieldnames=list(records[0]))
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def find(directory, monkeypatch):
+    monkeypatch.chdir(directory)
+    return QuizApplication.find_question_files(None)
+
+
+def test_pack_replaces_only_the_source_with_the_same_name(tmp_path, monkeypatch):
+    records = question_records(10)
+    write_csv(tmp_path / "cau_hoi_chuong_1.csv", records)
+    write_csv(tmp_path / "cau_hoi_chuong_2.csv", records)
+    ExamPack.write(QuestionBank.from_records(records), str(tmp_path / "cau_hoi_chuong_1.qpack"))
+    write_csv(tmp_path / "ket_qua.csv", [{'cau': 1, 'dap_an': "A"}])  # thiếu cột bắt buộc
+    assert find(tmp_path, monkeypatch) == ["cau_hoi_chuong_1.qpack", "cau_hoi_chuong_2.csv"]
+
+
+def test_discovery_does_not_import_pandas(tmp_path):
+    write_csv(tmp_path / "cau_hoi.csv", question_records(10))
+    code = ("import sys, main; print(main.QuizApplication.find_question_files(None)); "
+            "print('pandas' in sys.modules)")
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    output = subprocess.run([sys.executable, '-c', code], cwd=tmp_path, env=env, capture_output=True,
+                            text=True, check=True).stdout.split('\n')
+    assert output[:2] == ["['cau_hoi.csv']", "False"]
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""ExamPack.open: file hỏng báo ValueError (load_question_bank trả lỗi 'exam_pack') và không giữ lại vùng ánh xạ"""
+import json
+import os
+
+import pytest
+
+from main import ExamPack, ValidationIssue, load_question_bank
+
+
+@pytest.fixture
+def make_pack(make_bank):
+    def write(path, n=20):
+        bank = make_bank(n, explanation="Giải thích {i}")
+        ExamPack.write(bank, str(path))
+        return bank
+    return write
+
+
+def rewrite_header(path, change):
+    """Sửa phần mô tả JSON ở cuối file (giữ nguyên phần dữ liệu)"""
+    data = bytearray(path.read_bytes())
+    trailer = ExamPack._TRAILER
+    header_offset = int.from_bytes(data[-trailer:-trailer + 8], 'little')
+    header_length = int.from_bytes(data[-trailer + 8:-trailer + 16], 'little')
+    header = json.loads(data[header_offset:header_offset + header_length])
+    change(header)
+    encoded = json.dumps(header).encode('utf-8')
+    path.write_bytes(bytes(data[:header_offset]) + encoded + header_offset.to_bytes(8, 'little')
+                     + len(encoded).to_bytes(8, 'little') + ExamPack.MAGIC)
+
+
+# Chỉ Linux có /proc/self/maps; trên Windows vùng ánh xạ còn mở làm unlink() lỗi nên các test dưới vẫn kiểm được
+needs_proc_maps = pytest.mark.skipif(not os.path.exists('/proc/self/maps'), reason="cần /proc/self/maps (Linux)")
+
+
+def mapped(path):
+    with open('/proc/self/maps') as f:
+        return sum(str(path) in line for line in f)
+
+
+def test_roundtrip(tmp_path, make_pack):
+    path = tmp_path / "kho.qpack"
+    bank = make_pack(path)
+    pack = ExamPack.open(str(path))
+    assert len(pack) == len(bank)
+    assert pack.fingerprint() == bank.fingerprint()
+    assert [pack.record(i) for i in range(len(bank))] == [bank.record(i) for i in range(len(bank))]
+
+
+def _odd_offsets(header):
+    offset, length = header['sections']['offsets']
+    header['sections']['offsets'] = [offset, length - 3]  # không chia hết cho 8: memoryview.cast lỗi
+
+
+def _short_offsets(header):
+    offset, length = header['sections']['offsets']
+    header['sections']['offsets'] = [offset, length - 8]
+
+
+def _wrong_count(header):
+    header['count'] += 1
+
+
+def _missing_section(header):
+    del header['sections']['answers']
+
+
+def _outside_file(header):
+    header['sections']['blob'] = [8, 10**9]
+
+
+def _not_a_dict(header):
+    header['sections'] = ["blob"]
+
+
+CORRUPTIONS = [_odd_offsets, _short_offsets, _wrong_count, _missing_section, _outside_file, _not_a_dict]
+
+
+@pytest.mark.parametrize('change', CORRUPTIONS)
+def test_corrupt_header_raises_value_error(tmp_path, make_pack, change):
+    path = tmp_path / "hong.qpack"
+    make_pack(path)
+    rewrite_header(path, change)
+    with pytest.raises(ValueError):
+        ExamPack.open(str(path))
+    bank, issues = load_question_bank(str(path))
+    assert bank is None and issues == [ValidationIssue(None, None, 'exam_pack')]
+    path.unlink()  # không còn giữ file
+
+
+@needs_proc_maps
+@pytest.mark.parametrize('change', CORRUPTIONS)
+def test_corrupt_header_unmaps(tmp_path, make_pack, change):
+    path = tmp_path / "hong.qpack"
+    make_pack(path)
+    rewrite_header(path, change)
+    with pytest.raises(ValueError):
+        ExamPack.open(str(path))
+    assert mapped(path) == 0
+
+
+def test_truncated_file(tmp_path, make_pack):
+    path = tmp_path / "cut.qpack"
+    make_pack(path)
+    path.write_bytes(path.read_bytes()[:-5])
+    with pytest.raises(ValueError):
+        ExamPack.open(str(path))
+    if os.path.exists('/proc/self/maps'):
+        assert mapped(path) == 0
+    path.unlink()
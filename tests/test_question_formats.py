@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""Đọc CSV / JSONL theo khối: tiến độ chỉ báo xong ở khối cuối, kết quả giống nhau giữa các định dạng"""
+import pandas as pd
+import pytest
+
+from main import read_question_file
+
+COLUMNS = ['cau_hoi', 'tra_loi_a', 'tra_loi_b', 'tra_loi_c', 'tra_loi_d', 'dap_an_dung', 'giai_thich']
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame([[f"Câu hỏi số {i}: nội dung {'dài ' * (i % 7)}?", "Một", "Hai", "Ba",
+                          "Bốn" if i % 2 else "", "ABC"[i % 3], ""] for i in range(5000)], columns=COLUMNS)
+
+
+@pytest.mark.parametrize('extension', ['.csv', '.jsonl'])
+def test_progress_reaches_total_only_at_end(tmp_path, frame, extension):
+    path = tmp_path / f"kho{extension}"
+    if extension == '.csv':
+        frame.to_csv(path, index=False)
+    else:
+        frame.to_json(path, orient='records', lines=True, force_ascii=False)
+    seen = []
+    bank, issues = read_question_file(str(path), chunk_rows=500, progress=lambda done, total: seen.append((done, total)))
+    assert not issues and len(bank) == 5000
+    assert len(seen) == 10
+    assert all(done < total for done, total in seen[:-1])
+    assert seen[-1] == (5000, 5000)
+    # Ước lượng từ số byte đã đọc (bộ đệm của trình đọc có thể đọc trước phần lớn file nhỏ)
+    assert all(total <= 10000 for _, total in seen)
+
+
+def test_csv_and_jsonl_give_the_same_bank(tmp_path, frame):
+    frame.to_csv(tmp_path / "kho.csv", index=False)
+    frame.to_json(tmp_path / "kho.jsonl", orient='records', lines=True, force_ascii=False)
+    csv_bank, _ = read_question_file(str(tmp_path / "kho.csv"))
+    jsonl_bank, _ = read_question_file(str(tmp_path / "kho.jsonl"))
+    assert csv_bank.fingerprint() == jsonl_bank.fingerprint()
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""RenderCoalescer và phím tắt (_on_key): nhiều sự kiện phím liên tiếp chỉ vẽ tối đa một lần mỗi khung hình,
+lần vẽ cuối luôn là trạng thái cuối cùng. Dùng đồng hồ giả nên số lần vẽ là xác định"""
+import types
+
+import main
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRoot:
+    """after() theo đồng hồ giả; run_due() chạy các lệnh đã tới hạn như một lượt của vòng lặp Tk"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.pending = {}
+        self._next_id = 0
+
+    def after(self, ms, callback):
+        self._next_id += 1
+        self.pending[self._next_id] = (self.clock() + ms / 1000, callback)
+        return self._next_id
+
+    def after_idle(self, callback):
+        return self.after(0, callback)
+
+    def after_cancel(self, after_id):
+        self.pending.pop(after_id, None)
+
+    def run_due(self):
+        for after_id in sorted(k for k, (at, _) in self.pending.items() if at <= self.clock() + 1e-9):
+            entry = self.pending.pop(after_id, None)
+            if entry is not None:
+                entry[1]()
+
+    def drain(self):
+        while self.pending:
+            self.clock.now = max(self.clock.now, min(at for at, _ in self.pending.values()))
+            self.run_due()
+
+
+def test_requests_are_limited_to_one_render_per_frame():
+    clock = FakeClock()
+    root = FakeRoot(clock)
+    rendered_at = []
+    coalescer = main.RenderCoalescer(root, lambda: rendered_at.append(clock.now), frame_ms=16, clock=clock)
+    for k in range(1000):
+        clock.now = k / 1000
+        coalescer.request()
+        root.run_due()
+    root.drain()
+    # Lần đầu vẽ ngay khi rảnh (t=0), sau đó mỗi 16 ms một lần: 0, 16, ..., 992 và lần cuối ở 1008 ms
+    assert coalescer.requests == 1000
+    assert coalescer.renders == len(rendered_at) == 64
+    assert all(b - a >= 0.016 - 1e-9 for a, b in zip(rendered_at, rendered_at[1:]))
+    assert not coalescer.pending
+
+
+def test_spaced_requests_render_every_time():
+    clock = FakeClock()
+    root = FakeRoot(clock)
+    coalescer = main.RenderCoalescer(root, lambda: None, frame_ms=16, clock=clock)
+    for k in range(50):
+        clock.now = k * 0.020
+        coalescer.request()
+        root.run_due()
+    assert coalescer.renders == 50
+
+
+def test_flush_renders_pending_state_immediately():
+    clock = FakeClock()
+    root = FakeRoot(clock)
+    calls = []
+    coalescer = main.RenderCoalescer(root, lambda: calls.append(1), clock=clock)
+    coalescer.request()
+    assert coalescer.pending and not calls
+    coalescer.flush()
+    assert calls == [1] and not coalescer.pending and not root.pending
+    coalescer.flush()  # không có gì chờ: không vẽ thêm
+    assert calls == [1]
+
+
+def shown_progress(app):
+    return app.render._applied[app.question_progress_label]['text']
+
+
+def test_thousand_key_events_render_once_per_frame_and_end_on_final_state(app):
+    clock = FakeClock()
+    root = FakeRoot(clock)
+    app.render_coalescer = coalescer = main.RenderCoalescer(root, app.update_question_display, clock=clock)
+    app.current_question_index = 1000
+    app.update_question_display()
+    displays_before = len(app.nav_stats.samples)
+    # Mọi phím đều đổi trạng thái (luôn có đáp án A–C, không chạm đầu/cuối đề) nên mỗi sự kiện đều xin vẽ lại
+    keys = ['Right', 'Right', 'Left', 'Right', 'a', 'B', '3', 'Down', 'Up', 'Right']
+    for k in range(1000):
+        clock.now = k / 1000
+        app._on_key(types.SimpleNamespace(keysym=keys[k % len(keys)], widget=app.root))
+        root.run_due()
+    root.drain()
+
+    assert coalescer.requests == 1000
+    assert coalescer.renders == 64
+    assert len(app.nav_stats.samples) - displays_before == 64
+    index = app.current_question_index
+    assert index == 1000 + 300  # mỗi vòng 10 phím: 5 lần tiến, 2 lần lùi
+    assert shown_progress(app) == f"Câu {index + 1}/{len(app.session)}"
+    assert app.selected_answer.get() == app.user_answers.get(index, "")
+    assert app.stats.answered_count == len([a for a in app.user_answers.values() if a])
+
+
+def test_keys_typed_in_an_entry_are_ignored(app):
+    entry = types.SimpleNamespace(winfo_class=lambda: "Entry")
+    app.current_question_index = 0
+    app._on_key(types.SimpleNamespace(keysym='Right', widget=entry))
+    app._on_key(types.SimpleNamespace(keysym='a', widget=entry))
+    assert app.current_question_index == 0
+    assert not app.user_answers
+    assert not app.render_coalescer.pending
+
+
+def test_enter_checks_current_answer_in_practice_mode(app):
+    app.current_question_index = 5
+    app.update_question_display()
+    app._on_key(types.SimpleNamespace(keysym='Right', widget=app.root))
+    app._on_key(types.SimpleNamespace(keysym='b', widget=app.root))
+    app._on_key(types.SimpleNamespace(keysym='Return', widget=app.root))
+    assert not app.render_coalescer.pending  # kiểm tra vẽ ngay trạng thái đang chờ trước khi hiện phản hồi
+    assert shown_progress(app) == "Câu 7/2000"
+    assert 6 in app.question_feedback
+    assert app.stats.checked_count == 1
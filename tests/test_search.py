@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""SearchIndex: từ cuối là tiền tố của mọi từ khớp (không giới hạn số từ), kết quả khớp với dò toàn bộ"""
+import pytest
+
+from conftest import question_records
+from main import QuestionBank, SearchIndex, _fold_ascii, fold_vietnamese
+
+
+@pytest.fixture(scope='module')
+def bank():
+    return QuestionBank.from_records(question_records(3000, question="Thông tư số {i} về thủ tục thi hành"))
+
+
+def brute_force(bank, query):
+    *exact, last = fold_vietnamese(query).split()
+    found = []
+    for index in range(len(bank)):
+        texts = [bank.question(index), bank.explanation(index) or ''] + [text for _, text in bank.options(index)]
+        words = set(_fold_ascii(' '.join(texts)).split())
+        if all(term in words for term in exact) and any(word.startswith(last) for word in words):
+            found.append(index)
+    return found
+
+
+@pytest.mark.parametrize('query', ["th", "1", "so 2", "thông tư số 29", "thu tuc 7", "khong co"])
+def test_prefix_search_matches_brute_force(bank, query):
+    index = SearchIndex.build(bank, chunk_rows=500)
+    expected = brute_force(bank, query)
+    results, total = index.search(query, limit=len(bank))
+    assert total == len(expected)
+    assert results == expected
+
+
+def test_short_prefix_counts_every_matching_term(bank):
+    index = SearchIndex.build(bank)
+    results, total = index.search("số 1", limit=10)
+    assert total == len(brute_force(bank, "số 1")) == 1111  # 1, 10–19, 100–199, 1000–1999
+    assert results == sorted(results) and len(results) == 10
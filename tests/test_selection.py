@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""Đáp án vừa chọn (chưa chuyển câu / nộp bài) không bị mất khi giao diện vẽ lại câu hiện tại"""
+
+
+def select(app, position, shown_letter):
+    app.current_question_index = position
+    app.update_question_display()
+    app.select_option(shown_letter)
+    return app.selected_answer.get()
+
+
+def test_resize_keeps_selected_answer(app):
+    app.switch_mode("exam")
+    chosen = select(app, 3, 'B')
+    app.wrap_width = 1  # độ rộng mới khác: _update_wrap_width dựng lại bố cục và vẽ lại
+    app._update_wrap_width()
+    assert app.selected_answer.get() == chosen
+    assert app.user_answers[3] == chosen
+
+
+def test_toggling_option_shuffle_keeps_selected_answer(app):
+    chosen = select(app, 7, 'C')
+    for value in (1, 0):
+        app.random_options_switch.configure(value=value)
+        app.toggle_option_shuffle()
+        assert app.selected_answer.get() == chosen
+        assert app.user_answers[7] == chosen
+    assert app.stats.answered_count == 1
+
+
+def test_background_load_keeps_session_and_selected_answer(app, make_bank):
+    app.questions = make_bank(50)  # trang đầu tiên
+    app._questions_changed()
+    order = [app.session.bank_index(i) for i in range(len(app.session))]
+    chosen = select(app, 10, 'A')
+    app._finish_background_load(["kho.csv"], make_bank(2000), {}, 0)
+    assert len(app.session) == 2000
+    assert [app.session.bank_index(i) for i in range(50)] == order  # nạp thêm phía sau, không xáo lại phiên
+    assert app.current_question_index == 10
+    assert app.selected_answer.get() == chosen
+    assert app.user_answers[10] == chosen
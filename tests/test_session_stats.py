@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""SessionStats (cập nhật tăng dần) phải luôn khớp với đếm lại toàn bộ từ user_answers / câu đã kiểm tra"""
+import random
+
+import pytest
+
+from conftest import full_unanswered, full_wrong
+from main import ExamSession, SessionStats
+
+
+def assert_matches_recount(session, stats, user_answers, checked):
+    assert len(stats) == len(session)
+    assert stats.counts() == SessionStats.recount(session, user_answers, checked)
+    assert stats.unanswered_count == len(full_unanswered(session, user_answers))
+    assert list(stats.unanswered()) == full_unanswered(session, user_answers)
+    assert list(stats.unanswered(limit=7)) == full_unanswered(session, user_answers)[:7]
+    assert list(stats.wrong()) == full_wrong(session, user_answers)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_random_events_match_full_recount(seed, make_bank):
+    """Chọn / đổi / xóa đáp án, kiểm tra và nạp thêm câu theo thứ tự ngẫu nhiên"""
+    rng = random.Random(seed)
+    full = make_bank(400)
+    session = ExamSession(full.slice(0, 150), seed=seed, shuffle_questions=True, shuffle_options=True)
+    user_answers, checked = {}, {}
+    stats = SessionStats.from_answers(session, user_answers, checked)
+    extend_at = {500, 1200}
+    for step in range(2000):
+        position = rng.randrange(len(session))
+        action = rng.random()
+        if action < 0.6:
+            letter = rng.choice("ABCD")
+            user_answers[position] = letter
+            stats.set_answer(position, letter)
+        elif action < 0.75:
+            user_answers[position] = ""
+            stats.set_answer(position, "")
+        elif user_answers.get(position):
+            checked[position] = True
+            stats.mark_checked(position)
+        if step in extend_at:
+            session.extend(full.slice(0, 150 + 125 * (1 + sorted(extend_at).index(step))))
+            stats.extend()
+        if step % 100 == 0:
+            assert_matches_recount(session, stats, user_answers, checked)
+    assert len(session) == 400
+    assert_matches_recount(session, stats, user_answers, checked)
+
+
+def test_from_answers_matches_incremental(make_bank):
+    """Dựng lại từ câu trả lời đã lưu (khôi phục nhật ký) cho cùng kết quả với cập nhật tăng dần"""
+    rng = random.Random(1)
+    session = ExamSession(make_bank(300), seed=3, shuffle_questions=True)
+    user_answers, checked = {}, {}
+    stats = SessionStats(session)
+    for _ in range(500):
+        position = rng.randrange(len(session))
+        letter = rng.choice(["A", "B", "C", "D", ""])
+        user_answers[position] = letter
+        stats.set_answer(position, letter)
+        if letter and rng.random() < 0.3:
+            checked[position] = True
+            stats.mark_checked(position)
+    rebuilt = SessionStats.from_answers(session, user_answers, checked)
+    assert rebuilt.counts() == stats.counts()
+    assert list(rebuilt.unanswered()) == list(stats.unanswered())
+    assert list(rebuilt.wrong()) == list(stats.wrong())
+    assert_matches_recount(session, rebuilt, user_answers, checked)
+
+
+def test_repeated_check_and_reanswer_do_not_double_count(make_bank):
+    session = ExamSession(make_bank(10))
+    stats = SessionStats(session)
+    correct = session.bank.answer(session.bank_index(0))
+    wrong = next(letter for letter in "ABC" if letter != correct)
+    for letter in (correct, correct, wrong, correct):
+        stats.set_answer(0, letter)
+    stats.mark_checked(0)
+    stats.mark_checked(0)
+    assert stats.counts() == (1, 1, 1)
+    stats.set_answer(0, "")
+    assert stats.counts() == (0, 1, 0)
+    assert stats.unanswered_count == 10
+
+
+def test_drawn_session_matches_recount(make_bank):
+    """Đề rút một phần kho (draw): vị trí trong đề khác chỉ số trong kho"""
+    session = ExamSession.draw(make_bank(1000), 50, seed=9, shuffle_options=True)
+    rng = random.Random(9)
+    user_answers = {position: rng.choice("ABC") for position in range(len(session)) if rng.random() < 0.8}
+    stats = SessionStats.from_answers(session, user_answers)
+    assert_matches_recount(session, stats, user_answers, {})
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""TopicLibrary: mỗi sheet chỉ đọc một lần kể cả khi đọc trước và chọn chủ đề cùng lúc;
+nhóm câu gần trùng được tính khi đọc và giữ kèm kho"""
+import csv
+import threading
+import time
+
+import main
+from conftest import question_records
+from main import QuestionBank, Topic, TopicLibrary
+
+
+def sheet_bank(sheet, n=30):
+    records = question_records(n, question=sheet + ": nhiệm vụ số {i} của đơn vị là gì?")
+    records.append(dict(records[0], cau_hoi=records[0]['cau_hoi'] + " ?"))  # một câu gần trùng
+    return QuestionBank.from_records(records)
+
+
+def counting_loader(monkeypatch, delay=0.0):
+    calls = []
+
+    def load_question_bank(file_path, cache=None, force_rebuild=False, progress=None, on_chunk=None, sheet=None):
+        calls.append(sheet)
+        time.sleep(delay)
+        return sheet_bank(sheet), []
+
+    monkeypatch.setattr(main, 'load_question_bank', load_question_bank)
+    return calls
+
+
+def test_concurrent_loads_of_the_same_topic_parse_once(monkeypatch):
+    calls = counting_loader(monkeypatch, delay=0.2)
+    topic = Topic("kho.xlsx", "Chương 1")
+    library = TopicLibrary([topic, Topic("kho.xlsx", "Chương 2")])
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(library.load(topic))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    assert library.loading(topic)
+    for thread in threads:
+        thread.join()
+    assert calls == ["Chương 1"]
+    assert not library.loading(topic)
+    assert len({id(bank) for bank, _ in results}) == 1
+
+
+def test_prefetch_computes_and_keeps_near_duplicates(monkeypatch):
+    calls = counting_loader(monkeypatch)
+    topics = [Topic("kho.xlsx", f"Chương {i}") for i in range(3)]
+    library = TopicLibrary(topics, max_loaded=3, near_duplicate_threshold=0.8)
+    library.store(topics[0], sheet_bank("Chương 0"), [])
+    library.prefetch(topics[0])
+    deadline = time.monotonic() + 5
+    while library.get(topics[2])[0] is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert calls == ["Chương 1", "Chương 2"]
+
+    computed = []
+    monkeypatch.setattr(main, 'find_near_duplicates', lambda *args: computed.append(args) or [])
+    bank, near_duplicates = library.get(topics[1])
+    assert bank is not None and len(near_duplicates) == 1  # tính sẵn trên luồng đọc trước
+    assert computed == []
+
+
+def test_lru_keeps_at_most_max_loaded(monkeypatch):
+    counting_loader(monkeypatch)
+    topics = [Topic("kho.xlsx", f"Chương {i}") for i in range(4)]
+    library = TopicLibrary(topics, max_loaded=2)
+    for topic in topics:
+        library.load(topic)
+    assert [library.get(topic)[0] is not None for topic in topics] == [False, False, True, True]
+
+
+def write_sources(directory):
+    """Hai file CSV (một sheet) và một file Excel hai sheet"""
+    from openpyxl import Workbook
+    records = question_records(10)
+    columns = list(records[0])
+    for name in ("a", "b"):
+        rows = [dict(record, cau_hoi=f"{name}: {record['cau_hoi']}") for record in records]
+        with open(directory / f"{name}.csv", 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(rows)
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for sheet in ("Chương 1", "Chương 2"):
+        worksheet = workbook.create_sheet(sheet)
+        worksheet.append(columns)
+        for record in records:
+            worksheet.append([record[column] for column in columns])
+    workbook.save(directory / "kho.xlsx")
+    return [str(directory / name) for name in ("a.csv", "kho.xlsx", "b.csv")]
+
+
+def test_discover_splits_only_multi_sheet_workbooks(tmp_path):
+    a, workbook, b = write_sources(tmp_path)
+    assert TopicLibrary.discover([a, b]) is None  # không có file nhiều sheet: nạp và gộp như trước
+    library = TopicLibrary.discover([a, workbook, b])
+    merged = Topic((a, b), None)
+    assert library.topics == [merged, Topic(workbook, "Chương 1"), Topic(workbook, "Chương 2")]
+    assert merged.file_paths == [a, b]
+    assert library.label(merged) == "Gộp 2 file: a.csv, b.csv"
+    assert library.label(library.topics[1]) == "Chương 1 (kho.xlsx)"
+
+    bank, issues = library.load(merged)
+    assert not issues and len(bank) == 20  # câu của cả hai file CSV trong một chủ đề
+    assert {bank.question(i).split(":")[0] for i in range(len(bank))} == {"a", "b"}
+    bank, issues = library.load(library.topics[2])
+    assert not issues and len(bank) == 10
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""Tracer (TRACE_FILE): phần đọc file trên luồng nền của BackgroundQuestionLoader có trong trace"""
+import csv
+import threading
+import time
+
+from conftest import question_records
+from main import BackgroundQuestionLoader, QuizApplication, Tracer
+
+
+def test_traced_methods_exist():
+    assert all(callable(getattr(QuizApplication, name, None)) for name in QuizApplication.TRACED_METHODS)
+
+
+def test_background_load_is_traced_on_its_own_thread(tmp_path):
+    path = tmp_path / "kho.csv"
+    records = question_records(200)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(records[0]))
+        writer.writeheader()
+        writer.writerows(records)
+    tracer = Tracer(str(tmp_path / "trace.json"))
+    loader = BackgroundQuestionLoader([str(path)], near_duplicate_threshold=0.8, tracer=tracer).start()
+    deadline = time.monotonic() + 10
+    done = []
+    while not done and time.monotonic() < deadline:
+        done = [event for event in loader.poll() if event[0] == 'done']
+        time.sleep(0.01)
+    assert done and len(done[0][1]) == 200
+
+    spans = {event['name']: event for event in tracer.events}
+    assert {'load_question_bank', 'find_near_duplicates'} <= set(spans)
+    assert spans['load_question_bank']['tid'] != threading.get_ident()
+    assert tracer.summary()['load_question_bank']['count'] == 1
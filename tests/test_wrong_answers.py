@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""Danh sách câu sai (hàng cao cố định, chữ dài bị cắt): nút trên hàng mở cửa sổ hiện toàn văn"""
+import main
+
+
+def test_detail_button_shows_full_question_and_explanation(app, make_bank, monkeypatch):
+    app.questions = make_bank(20, question="Câu hỏi rất dài " * 40 + "{i}?",
+                              explanation="Giải thích chi tiết " * 30 + "{i}.")
+    app._questions_changed()
+    lists = []
+    virtual_list_view = main.VirtualListView
+
+    def capture_list(*args, **kwargs):
+        lists.append(virtual_list_view(*args, **kwargs))
+        return lists[-1]
+
+    monkeypatch.setattr(main, 'VirtualListView', capture_list)
+    app.show_wrong_answers(app.session, {}, list(range(len(app.session))))
+    wrong_list = lists[0]
+    wrong_list._on_resize()  # khung nhìn có kích thước: tạo và đổ các hàng
+    row = wrong_list.rows[3]
+    assert row.question_label.cget('text').endswith("...")
+
+    labels = []
+    label = main.ctk.CTkLabel
+
+    def capture_label(*args, **kwargs):
+        labels.append(kwargs.get('text', ""))
+        return label(*args, **kwargs)
+
+    monkeypatch.setattr(main.ctk, 'CTkLabel', capture_label)
+    row.detail_btn.cget('command')()
+    expected = main.result_row(app.session, {}, 3)
+    assert f"❓ {expected['cau_hoi']}" in labels
+    assert f"💡 Giải thích: {expected['giai_thich']}" in labels